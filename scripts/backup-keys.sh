@@ -5,9 +5,6 @@ DAEMON_HOME=${DAEMON_HOME}
 BACKUP_DIR=${BACKUP_DIR:-$DAEMON_HOME/backup}
 TIMESTAMP=$(date +%Y%m%d_%H%M%S)
 
-# Create backup directory
-mkdir -p "$BACKUP_DIR"
-
 # Files to backup
 CRITICAL_FILES=(
     "$DAEMON_HOME/config/priv_validator_key.json"
@@ -15,8 +12,29 @@ CRITICAL_FILES=(
     "$DAEMON_HOME/config/node_key.json"
 )
 
+# Stream mode: write an uncompressed tar of the critical files (relative to
+# DAEMON_HOME) to stdout so the CLI can ingest it without leaving a copy here
+if [ "$1" = "--stream" ]; then
+    RELATIVE_FILES=()
+    for FILE in "${CRITICAL_FILES[@]}"; do
+        if [ -f "$FILE" ]; then
+            RELATIVE_FILES+=("${FILE#$DAEMON_HOME/}")
+        fi
+    done
+    
+    if [ ${#RELATIVE_FILES[@]} -eq 0 ]; then
+        echo "Error: No files found to backup" >&2
+        exit 1
+    fi
+    
+    exec tar -cf - -C "$DAEMON_HOME" "${RELATIVE_FILES[@]}"
+fi
+
 BACKUP_ARCHIVE="$BACKUP_DIR/validator_backup_$TIMESTAMP.tar.gz"
 
+# Create backup directory
+mkdir -p "$BACKUP_DIR"
+
 # Collect files that exist
 FILES_TO_BACKUP=""
 for FILE in "${CRITICAL_FILES[@]}"; do
@@ -0,0 +1,35 @@
+#!/bin/bash
+set -e
+
+DAEMON_HOME=${DAEMON_HOME}
+RPC_PORT=${RPC_PORT:-26657}
+P2P_PORT=${P2P_PORT:-26656}
+REST_API_PORT=${REST_API_PORT:-1317}
+GRPC_PORT=${GRPC_PORT:-9090}
+PROMETHEUS_PORT=${PROMETHEUS_PORT:-26660}
+
+CONFIG_FILE="$DAEMON_HOME/config/config.toml"
+APP_CONFIG="$DAEMON_HOME/config/app.toml"
+
+if [ ! -f "$CONFIG_FILE" ] || [ ! -f "$APP_CONFIG" ]; then
+    echo "Error: $CONFIG_FILE or $APP_CONFIG not found; initialize the node first" >&2
+    exit 1
+fi
+
+echo "Configuring listen ports: P2P $P2P_PORT, RPC $RPC_PORT, API $REST_API_PORT, gRPC $GRPC_PORT, metrics $PROMETHEUS_PORT"
+
+# config.toml: RPC and P2P listen addresses, Prometheus metrics. Only the
+# port is replaced; the listen host stays whatever init-node.sh or the
+# operator configured
+sed -i.bak "/^\[rpc\]/,/^\[/ s|^\(laddr = \"[a-z]*://[^\"]*\):[0-9]*\"|\1:${RPC_PORT}\"|" "$CONFIG_FILE"
+sed -i.bak "/^\[p2p\]/,/^\[/ s|^\(laddr = \"[a-z]*://[^\"]*\):[0-9]*\"|\1:${P2P_PORT}\"|" "$CONFIG_FILE"
+sed -i.bak "s|^\(prometheus_listen_addr = \"[^\"]*\):[0-9]*\"|\1:${PROMETHEUS_PORT}\"|" "$CONFIG_FILE"
+
+# Keep an external address advertised on the P2P port in step
+sed -i.bak "s|^external_address = \"\(.*\):[0-9]*\"|external_address = \"\1:${P2P_PORT}\"|" "$CONFIG_FILE"
+
+# app.toml: REST API and gRPC addresses
+sed -i.bak "/^\[api\]/,/^\[/ s|^\(address = \"[a-z]*://[^\"]*\):[0-9]*\"|\1:${REST_API_PORT}\"|" "$APP_CONFIG"
+sed -i.bak "/^\[grpc\]/,/^\[/ s|^\(address = \"[^\"]*\):[0-9]*\"|\1:${GRPC_PORT}\"|" "$APP_CONFIG"
+
+rm -f "$CONFIG_FILE.bak" "$APP_CONFIG.bak"
@@ -23,6 +23,10 @@ if [ ! -f "$DAEMON_HOME/config/config.toml" ]; then
     /scripts/init-node.sh
 fi
 
+# Listen on the ports published for this chain, which differ from the
+# defaults when they were set in chains.yaml or assigned by validay
+/scripts/configure-ports.sh
+
 # Setup keys (script is idempotent - will display address even if key exists)
 echo "Setting up validator keys..."
 /scripts/setup-keys.sh
@@ -0,0 +1,103 @@
+"""Filesystem cost of resolving the project root and loading the configuration"""
+
+import os
+
+import pytest
+
+from validay import cli, config
+
+CHAINS_YAML = """\
+chains:
+  cosmos:
+    enabled: true
+    chain_id: cosmoshub-4
+    bech32_prefix: cosmos
+    binary_name: gaiad
+    daemon_home: /root/.gaia
+"""
+
+CONFIG_YML = """\
+docker:
+  network_name: validay-network
+"""
+
+# Directories between the working directory and the project root
+DEPTH = 4
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A project with one chain, entered DEPTH directories below its root"""
+    (tmp_path / 'chains.yaml').write_text(CHAINS_YAML)
+    (tmp_path / 'config.yml').write_text(CONFIG_YML)
+    cwd = tmp_path.joinpath(*(f"d{i}" for i in range(DEPTH)))
+    cwd.mkdir(parents=True)
+    monkeypatch.chdir(cwd)
+    monkeypatch.delenv('VALIDAY_ROOT', raising=False)
+    monkeypatch.setenv('VALIDAY_NO_DAEMON', '1')
+    config.clear_cache()
+    yield tmp_path
+    config.clear_cache()
+
+
+@pytest.fixture
+def stat_calls(monkeypatch):
+    """Record the path of every os.stat call; Path.exists() and is_file() go through it too"""
+    calls = []
+    real_stat = os.stat
+    
+    def counting_stat(path, *args, **kwargs):
+        calls.append(os.fspath(path))
+        return real_stat(path, *args, **kwargs)
+    
+    monkeypatch.setattr(os, 'stat', counting_stat)
+    return calls
+
+
+def _validate():
+    # Exits through SystemExit, failing the test, if the project is invalid
+    cli.main(['validate'])
+
+
+def _probes(calls, root):
+    """chains.yaml lookups in the directories between the working directory and root"""
+    return [path for path in calls if path.endswith('chains.yaml') and not path.startswith(f"{root}/chains.yaml")]
+
+
+def test_walk_runs_once_per_command(project, stat_calls):
+    # Warm the parsed YAML cache so only steady-state stats are counted
+    _validate()
+    config.clear_cache()
+    stat_calls.clear()
+    
+    _validate()
+    
+    assert len(_probes(stat_calls, project)) == DEPTH
+    assert len(stat_calls) <= 12
+    
+    stat_calls.clear()
+    assert config.get_project_root() == project
+    assert stat_calls == []
+
+
+def test_validay_root_skips_the_walk(project, stat_calls, monkeypatch):
+    monkeypatch.setenv('VALIDAY_ROOT', str(project))
+    _validate()
+    config.clear_cache()
+    stat_calls.clear()
+    
+    _validate()
+    
+    assert _probes(stat_calls, project) == []
+    assert len(stat_calls) <= 8
+
+
+def test_clear_cache_resets_project_root(project, tmp_path_factory, monkeypatch):
+    assert config.get_project_root() == project
+    
+    other = tmp_path_factory.mktemp('other')
+    monkeypatch.setenv('VALIDAY_ROOT', str(other))
+    assert config.get_project_root() == project
+    
+    config.clear_cache()
+    assert config.get_project_root() == other.resolve()
@@ -35,15 +35,41 @@ DOCKER_EXEC_TIMEOUT = int(os.getenv('DOCKER_EXEC_TIMEOUT', '300'))
 STATE_FILE = '/tmp/upgrade-monitor-state.json'
 
 
+# Parsed chains.yaml, re-read only when the file's mtime or size changes
+_chains_cache: Dict = {'signature': None, 'chains': {}}
+
+# libyaml's C loader when available
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
 def load_chains_config() -> Dict:
-    """Load chains configuration"""
+    """Load chains configuration, re-parsing only when the file changed"""
     try:
+        st = os.stat(CHAINS_CONFIG)
+        signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if signature == _chains_cache['signature']:
+            return _chains_cache['chains']
+        
         with open(CHAINS_CONFIG, 'r') as f:
-            config = yaml.safe_load(f)
-            return config.get('chains', {})
+            config = yaml.load(f, Loader=YAML_LOADER)
+        chains = config.get('chains', {})
     except Exception as e:
         logger.error(f"Failed to load chains config: {e}")
-        return {}
+        # Keep monitoring with the last good configuration
+        return _chains_cache['chains']
+    
+    if _chains_cache['signature'] is not None:
+        def _enabled(chains_config):
+            return {name for name, cfg in chains_config.items() if (cfg or {}).get('enabled', False)}
+        previous, current = _enabled(_chains_cache['chains']), _enabled(chains)
+        for name in sorted(current - previous):
+            logger.info(f"Chain enabled in chains.yaml: {name}")
+        for name in sorted(previous - current):
+            logger.info(f"Chain disabled in chains.yaml: {name}")
+    
+    _chains_cache['signature'] = signature
+    _chains_cache['chains'] = chains
+    return chains
 
 
 def load_state() -> Dict:
@@ -1,7 +1,14 @@
 """Entry point for python -m validay"""
 
-from .cli import main
+import sys
+
+from .utils.daemon_client import forward
 
 if __name__ == '__main__':
+    # Hand the command to a running `validay daemon` when there is one
+    exit_code = forward(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+    
+    from .cli import main
     main()
-
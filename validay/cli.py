@@ -2,6 +2,7 @@
 
 import argparse
 import sys
+from typing import List, Optional
 
 from . import __version__
 from .output import error, info
@@ -9,7 +10,7 @@ from .utils.errors import ValidatorError, ChainNotFoundError, ContainerNotRunnin
 
 # Import command modules
 from .commands import (
-    chain, keys, query, snapshot, upgrade, service, config, backup, system
+    chain, keys, query, snapshot, upgrade, service, config, backup, system, placement, profile, daemon
 )
 
 
@@ -33,13 +34,22 @@ def create_parser():
     chain_subparsers = chain_parser.add_subparsers(dest='subcommand', metavar='COMMAND', help='')
     
     chain_start = chain_subparsers.add_parser('start', help='Start a chain')
-    chain_start.add_argument('chain', help='Chain name')
+    chain_start.add_argument('chain', nargs='?', help='Chain name')
+    chain_start.add_argument('--all', action='store_true',
+                              help='Start all enabled chains in health-gated waves, highest priority first')
+    chain_start.add_argument('--concurrency', type=int,
+                              help='Chains starting at once with --all (default: docker.waves.concurrency; 0 = all)')
     
     chain_stop = chain_subparsers.add_parser('stop', help='Stop a chain')
-    chain_stop.add_argument('chain', help='Chain name')
+    chain_stop.add_argument('chain', nargs='?', help='Chain name')
+    chain_stop.add_argument('--all', action='store_true', help='Stop all enabled chains in one operation')
     
     chain_restart = chain_subparsers.add_parser('restart', help='Restart a chain')
-    chain_restart.add_argument('chain', help='Chain name')
+    chain_restart.add_argument('chain', nargs='?', help='Chain name')
+    chain_restart.add_argument('--all', action='store_true',
+                              help='Restart all enabled chains in health-gated waves, highest priority first')
+    chain_restart.add_argument('--concurrency', type=int,
+                              help='Chains starting at once with --all (default: docker.waves.concurrency; 0 = all)')
     
     chain_logs = chain_subparsers.add_parser('logs', help='View chain logs')
     chain_logs.add_argument('chain', help='Chain name')
@@ -76,7 +86,10 @@ def create_parser():
     keys_subparsers = keys_parser.add_subparsers(dest='subcommand', metavar='COMMAND', help='')
     
     keys_setup = keys_subparsers.add_parser('setup', help='Setup private key')
-    keys_setup.add_argument('chain', help='Chain name')
+    keys_setup.add_argument('chain', nargs='?', help='Chain name')
+    keys_setup.add_argument('--all', action='store_true', help='Derive keys for all enabled chains (requires --mnemonic-file)')
+    keys_setup.add_argument('--mnemonic-file', help='File containing the mnemonic to derive keys from')
+    keys_setup.add_argument('--force', action='store_true', help='With --all, overwrite existing key files')
     
     keys_create = keys_subparsers.add_parser('create', help='Create new keys')
     keys_create.add_argument('chain', help='Chain name')
@@ -87,6 +100,16 @@ def create_parser():
     keys_show = keys_subparsers.add_parser('show', help='Show validator addresses')
     keys_show.add_argument('chain', help='Chain name')
     
+    keys_bench = keys_subparsers.add_parser('bench', help='Batch-generate consensus keys and report keys/sec')
+    keys_bench.add_argument('-n', '--count', type=int, default=10000, help='Number of keys to generate (default: 10000)')
+    keys_bench.add_argument('-w', '--workers', type=int, help='Worker processes (default: number of CPUs)')
+    keys_bench.add_argument('--chain', help='Use this chain\'s bech32 prefix (default: cosmos)')
+    keys_bench.add_argument('--output-dir', help='Write one priv_validator_key.json per key into this directory')
+    keys_bench.add_argument('--ndjson', metavar='PATH', help='Write keys as NDJSON to PATH (- for stdout)')
+    keys_bench.add_argument('--with-mnemonic', action='store_true', help='Derive each key from a fresh mnemonic')
+    keys_bench.add_argument('--vanity', metavar='HEX', help='Only keep keys whose hex address starts with HEX')
+    keys_bench.add_argument('--count-pbkdf2', action='store_true', help='Also report PBKDF2 (BIP39 seed) runs per key')
+    
     # Query commands
     query_parser = subparsers.add_parser('query', help='Query chain data', add_help=False)
     query_parser.add_argument('-h', '--help', action='help', help='Show this help message and exit')
@@ -132,6 +155,18 @@ def create_parser():
     backup_parser.add_argument('-h', '--help', action='help', help='Show this help message and exit')
     backup_parser.add_argument('chain', nargs='?', help='Chain name (backs up single chain, omit for all)')
     backup_parser.add_argument('--list', action='store_true', help='List all backups')
+    backup_parser.add_argument('--since', help='With --list, only backups created on or after this date (YYYY-MM-DD)')
+    backup_parser.add_argument('--until', help='With --list, only backups created on or before this date (YYYY-MM-DD)')
+    backup_parser.add_argument('--min-size', help='With --list, only backups at least this large (e.g. 10K)')
+    backup_parser.add_argument('--max-size', help='With --list, only backups at most this large (e.g. 1M)')
+    backup_parser.add_argument('--reindex', action='store_true', help='Rebuild the backup catalog from stored manifests')
+    backup_parser.add_argument('--import-legacy', action='store_true', help='Import backups/<chain>/*.tar.gz archives from earlier versions')
+    backup_parser.add_argument('-j', '--concurrency', type=int, help='Number of chains to back up in parallel (default: backup.concurrency)')
+    backup_parser.add_argument('--timeout', type=float, help='Per-chain backup timeout in seconds (default: backup.timeout)')
+    backup_parser.add_argument('--prune', action='store_true', help='Apply retention policy and remove unreferenced data')
+    backup_parser.add_argument('--dry-run', action='store_true', help='With --prune, only show what would be removed')
+    backup_parser.add_argument('--restore', metavar='ID', nargs='?', const='latest', help='Restore a backup of <chain> (default: latest)')
+    backup_parser.add_argument('--output', default='.', help='Directory to restore files into (default: current directory)')
     
     # Service commands
     service_parser = subparsers.add_parser('service', help='Monitoring services', add_help=False)
@@ -145,12 +180,38 @@ def create_parser():
     service_logs = service_subparsers.add_parser('logs', help='View service logs')
     service_logs.add_argument('service', nargs='?', help='Service name (prometheus/grafana/alertmanager)')
     
+    # Profile commands
+    profile_parser = subparsers.add_parser('profile', help='Record and report per-chain resource usage', add_help=False)
+    profile_parser.add_argument('-h', '--help', action='help', help='Show this help message and exit')
+    profile_subparsers = profile_parser.add_subparsers(dest='subcommand', metavar='COMMAND', help='')
+    
+    profile_collect = profile_subparsers.add_parser('collect', help='Sample enabled chains until interrupted')
+    profile_collect.add_argument('--interval', type=float, help='Seconds between samples (default: monitoring.profile.interval)')
+    
+    profile_report = profile_subparsers.add_parser('report', help='Show p50/p95/max usage and suggested limits')
+    profile_report.add_argument('chain', nargs='?', help='Chain name (omit for all profiled chains)')
+    profile_report.add_argument('--window', default='24h', help='How far back to look, e.g. 90m, 24h, 7d (default: 24h)')
+    
     # Top-level setup/maintenance commands
-    subparsers.add_parser('generate', help='Generate docker-compose.yml and prometheus.yml')
+    generate_parser = subparsers.add_parser('generate', help='Generate docker-compose.yml and prometheus.yml')
+    generate_parser.add_argument('--changed', action='store_true', help='Only print the names of added or changed services')
+    apply_parser = subparsers.add_parser('apply', help='Recreate only the services whose configuration changed')
+    apply_parser.add_argument('-j', '--concurrency', type=int, help='Services recreated per batch (default: docker.apply.concurrency)')
+    apply_parser.add_argument('--timeout', type=float, help='Seconds to wait for each batch to become healthy (default: docker.apply.health_timeout)')
+    apply_parser.add_argument('--dry-run', action='store_true', help='Show which services would be recreated')
+    daemon_parser = subparsers.add_parser('daemon', help='Serve CLI commands from a long-running process')
+    daemon_parser.add_argument('--socket', help='Unix socket path (default: .validay/daemon.sock in the project)')
+    place_parser = subparsers.add_parser('place', help='Place enabled chains across the host inventory')
+    place_parser.add_argument('--dry-run', action='store_true', help='Show the placement without writing files')
+    place_parser.add_argument('--rebalance', action='store_true', help='Ignore the previous placement and repack every chain')
     subparsers.add_parser('validate', help='Validate chains.yaml syntax')
     subparsers.add_parser('list', help='List all configured chains')
     subparsers.add_parser('ps', help='Show container status')
-    subparsers.add_parser('stats', help='Show container resource usage')
+    stats_parser = subparsers.add_parser('stats', help='Show container resource usage')
+    stats_parser.add_argument('-w', '--watch', action='store_true', help='Keep streaming stats and redraw the table')
+    stats_parser.add_argument('--interval', type=float, default=2.0, help='Seconds between redraws with --watch (default: 2)')
+    stats_parser.add_argument('--sort', choices=['cpu', 'memory', 'network', 'name'], default='cpu', help='Sort column with --watch (default: cpu)')
+    stats_parser.add_argument('--backend', choices=['docker', 'cgroup'], help='Where to read usage from (default: monitoring.stats_backend)')
     subparsers.add_parser('diagnose', help='Run system diagnostics')
     subparsers.add_parser('prune', help='Prune unused Docker resources')
     subparsers.add_parser('upgrades', help='List all pending upgrades')
@@ -171,6 +232,7 @@ def create_parser():
         'snapshot': snapshot_parser,
         'upgrade': upgrade_parser,
         'service': service_parser,
+        'profile': profile_parser,
         'backup': backup_parser
     }
 
@@ -183,10 +245,14 @@ def print_help(parser):
     
     # Group commands into Setup/Maintenance and Daily Operations
     setup_maintenance = {
+        'apply': 'Recreate only the services whose configuration changed',
         'clean': 'Clean all containers, volumes, and generated files',
+        'daemon': 'Serve CLI commands from a long-running process',
         'generate': 'Generate docker-compose.yml and prometheus.yml',
         'validate': 'Validate chains.yaml syntax',
         'list': 'List all configured chains',
+        'place': 'Place enabled chains across the host inventory',
+        'profile': 'Record and report per-chain resource usage',
         'ps': 'Show container status',
         'stats': 'Show container resource usage',
         'diagnose': 'Run system diagnostics',
@@ -324,26 +390,29 @@ def check_dependencies():
         sys.exit(1)
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main CLI entry point"""
+    if argv is None:
+        argv = sys.argv[1:]
+    
     # Check dependencies first
     check_dependencies()
     
     parser, subparsers_dict = create_parser()
     
     # Handle --help before parsing (to show custom help)
-    if '--help' in sys.argv or '-h' in sys.argv:
-        if len(sys.argv) == 2:  # Just 'validay --help'
+    if '--help' in argv or '-h' in argv:
+        if len(argv) == 1:  # Just 'validay --help'
             print_help(parser)
             sys.exit(0)
-        elif len(sys.argv) == 3:  # 'validay COMMAND --help'
-            cmd = sys.argv[1]
+        elif len(argv) == 2:  # 'validay COMMAND --help'
+            cmd = argv[0]
             if cmd in subparsers_dict:
                 print_subcommand_help(parser, cmd, subparsers_dict[cmd])
                 sys.exit(0)
         # For deeper subcommand help, let argparse handle it
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if not args.command:
         print_help(parser)
@@ -356,11 +425,29 @@ def main():
                 print_subcommand_help(parser, 'chain', subparsers_dict['chain'])
                 sys.exit(0)
             elif args.subcommand == 'start':
-                chain.start(args.chain)
+                if args.all:
+                    chain.start_all(args.concurrency)
+                elif args.chain:
+                    chain.start(args.chain)
+                else:
+                    error("Specify a chain name or --all")
+                    sys.exit(1)
             elif args.subcommand == 'stop':
-                chain.stop(args.chain)
+                if args.all:
+                    chain.stop_all()
+                elif args.chain:
+                    chain.stop(args.chain)
+                else:
+                    error("Specify a chain name or --all")
+                    sys.exit(1)
             elif args.subcommand == 'restart':
-                chain.restart(args.chain)
+                if args.all:
+                    chain.restart_all(args.concurrency)
+                elif args.chain:
+                    chain.restart(args.chain)
+                else:
+                    error("Specify a chain name or --all")
+                    sys.exit(1)
             elif args.subcommand == 'logs':
                 chain.logs(args.chain, follow=not args.no_follow)
             elif args.subcommand == 'status':
@@ -388,13 +475,27 @@ def main():
                 print_subcommand_help(parser, 'keys', subparsers_dict['keys'])
                 sys.exit(0)
             elif args.subcommand == 'setup':
-                keys.setup(args.chain)
+                if args.all:
+                    if not args.mnemonic_file:
+                        error("--all requires --mnemonic-file")
+                        sys.exit(1)
+                    keys.setup_all(args.mnemonic_file, overwrite=args.force)
+                elif args.chain:
+                    keys.setup(args.chain)
+                else:
+                    error("Specify a chain name or --all")
+                    sys.exit(1)
             elif args.subcommand == 'create':
                 keys.create(args.chain)
             elif args.subcommand == 'import':
                 keys.import_key(args.chain)
             elif args.subcommand == 'show':
                 keys.show(args.chain)
+            elif args.subcommand == 'bench':
+                keys.bench(args.count, workers=args.workers, chain_name=args.chain,
+                           output_dir=args.output_dir, ndjson=args.ndjson,
+                           with_mnemonic=args.with_mnemonic, vanity=args.vanity,
+                           count_pbkdf2=args.count_pbkdf2)
             else:
                 print_subcommand_help(parser, 'keys', subparsers_dict['keys'])
                 sys.exit(0)
@@ -453,18 +554,46 @@ def main():
                 print_subcommand_help(parser, 'service', subparsers_dict['service'])
                 sys.exit(0)
         
+        elif args.command == 'profile':
+            if args.subcommand == 'collect':
+                profile.collect(interval=args.interval)
+            elif args.subcommand == 'report':
+                profile.report(args.chain, window=args.window)
+            else:
+                print_subcommand_help(parser, 'profile', subparsers_dict['profile'])
+                sys.exit(0)
+        
         elif args.command == 'backup':
             if args.list:
-                backup.list_backups()
+                backup.list_backups(args.chain, since=args.since, until=args.until,
+                                    min_size=args.min_size, max_size=args.max_size)
+            elif args.reindex:
+                backup.reindex_backups()
+            elif args.import_legacy:
+                backup.import_legacy_backups(args.chain)
+            elif args.prune:
+                backup.prune_backups(dry_run=args.dry_run)
+            elif args.restore:
+                if not args.chain:
+                    error("A chain name is required with --restore")
+                    sys.exit(1)
+                backup.restore_backup(args.chain, args.restore, args.output)
             elif args.chain:
-                # Import keys.backup function for single chain backup
-                from .commands import keys
-                keys.backup(args.chain)
+                backup.backup_chain(args.chain, timeout=args.timeout)
             else:
-                backup.backup_all()
+                backup.backup_all(concurrency=args.concurrency, timeout=args.timeout)
         
         elif args.command == 'generate':
-            config.generate()
+            config.generate(changed_only=args.changed)
+        
+        elif args.command == 'apply':
+            config.apply(concurrency=args.concurrency, health_timeout=args.timeout, dry_run=args.dry_run)
+        
+        elif args.command == 'daemon':
+            daemon.run(socket_path=args.socket)
+        
+        elif args.command == 'place':
+            placement.place(dry_run=args.dry_run, rebalance=args.rebalance)
         
         elif args.command == 'validate':
             config.validate()
@@ -476,7 +605,7 @@ def main():
             system.ps()
         
         elif args.command == 'stats':
-            system.stats()
+            system.stats(watch=args.watch, interval=args.interval, sort=args.sort, backend=args.backend)
         
         elif args.command == 'diagnose':
             system.diagnose()
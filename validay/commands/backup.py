@@ -1,93 +1,325 @@
 """Backup commands"""
 
 import sys
+import time
+import tarfile
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, Optional, Set
 
-from ..output import success, error, info
-from ..config import get_enabled_chains, get_project_root, get_backup_dir
-from ..utils.docker import exec_in_container, is_container_running, run_docker
+from ..output import success, error, info, warning, print_table, format_bytes
+from ..progress import ProgressBar
+from ..config import get_chains, get_project_root, get_backup_dir, load_global_config
+from ..utils.docker import get_running_containers, open_exec_stream
 from ..utils.chain_config import get_container_name, get_daemon_home
-from ..utils.errors import ChainNotFoundError
+from ..utils.backup_store import BackupStore
+from ..utils.errors import DockerError, BackupStoreError, ChainNotFoundError
+from ..utils.validation import validate_chain_name
 
 
-def backup_all():
+def get_backup_store() -> BackupStore:
+    """Get the backup repository for the configured backup directory"""
+    return BackupStore(get_backup_dir())
+
+
+def _backup_chain(chain_name: str, running: Set[str], timeout: float) -> Dict:
+    """Back up a single chain's keys, returning a result record for the summary"""
+    started = time.monotonic()
+    deadline = started + timeout
+    container_name = get_container_name(chain_name)
+    record = {'chain': chain_name, 'status': 'ok', 'bytes': 0, 'new_bytes': 0, 'id': '', 'message': ''}
+    
+    def _remaining() -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DockerError(f"Timed out after {timeout}s")
+        return remaining
+    
+    try:
+        if container_name not in running:
+            record['status'] = 'skipped'
+            record['message'] = 'container not running'
+            return record
+        
+        # Stream a tar of the key files straight from the container into the
+        # store: nothing is staged in the container or on the host
+        process = open_exec_stream(container_name, ['/scripts/backup-keys.sh', '--stream'])
+        timed_out = threading.Event()
+        
+        def _kill():
+            timed_out.set()
+            process.kill()
+        
+        timer = threading.Timer(_remaining(), _kill)
+        timer.start()
+        store = get_backup_store()
+        manifest = None
+        try:
+            manifest = store.ingest_tar(chain_name, process.stdout,
+                                        source=f'{container_name}:{get_daemon_home(chain_name)}')
+        except BackupStoreError as e:
+            stream_error = e
+        except tarfile.TarError as e:
+            stream_error = BackupStoreError(f"Invalid backup stream: {e}")
+        else:
+            stream_error = None
+        finally:
+            # Drain tar's trailing padding so it does not die of SIGPIPE
+            process.stdout.read()
+            process.stdout.close()
+            stderr = process.stderr.read().decode(errors='replace').strip()
+            returncode = process.wait()
+            timer.cancel()
+        
+        if timed_out.is_set() or returncode != 0:
+            # Never keep a manifest for a stream that did not complete cleanly
+            if manifest is not None:
+                store.delete_manifest(manifest)
+            record['status'] = 'failed'
+            record['message'] = f"Timed out after {timeout}s" if timed_out.is_set() else stderr
+            return record
+        if stream_error is not None:
+            record['status'] = 'failed'
+            record['message'] = str(stream_error)
+            return record
+        
+        record['id'] = manifest['id']
+        record['bytes'] = manifest['total_bytes']
+        record['new_bytes'] = manifest['new_bytes']
+        return record
+    except Exception as e:
+        record['status'] = 'failed'
+        record['message'] = str(e)
+        return record
+    finally:
+        record['duration'] = time.monotonic() - started
+
+
+def backup_chain(chain_name: str, timeout: Optional[float] = None):
+    """Backup keys for a single chain"""
+    try:
+        validate_chain_name(chain_name)
+        if timeout is None:
+            timeout = load_global_config().get('backup', {}).get('timeout', 300)
+        
+        info(f"Backing up keys for {chain_name}...")
+        record = _backup_chain(chain_name, get_running_containers(), float(timeout))
+        
+        if record['status'] == 'skipped':
+            error(f"Container '{get_container_name(chain_name)}' is not running")
+            sys.exit(1)
+        if record['status'] == 'failed':
+            error(f"Backup failed: {record['message']}")
+            sys.exit(1)
+        
+        success(f"Backup {record['id']} saved for {chain_name} "
+                f"({format_bytes(record['bytes'])}, {format_bytes(record['new_bytes'])} new)")
+    except ChainNotFoundError as e:
+        error(str(e))
+        sys.exit(1)
+
+
+def backup_all(concurrency: Optional[int] = None, timeout: Optional[float] = None):
     """Backup all chain keys"""
     try:
-        enabled_chains = get_enabled_chains()
+        enabled_chains = get_chains(enabled_only=True)
         
         if not enabled_chains:
             info("No enabled chains found")
             return
         
-        info("Backing up all chain keys...")
-        
-        for chain_name in enabled_chains.keys():
-            container_name = get_container_name(chain_name)
-            
-            if not is_container_running(container_name):
-                info(f"Skipping {chain_name} - container not running")
-                continue
-            
-            try:
-                # Run backup script in container
-                result = exec_in_container(container_name, ['/scripts/backup-keys.sh'], interactive=False)
-                
-                if result.returncode == 0:
-                    # Parse JSON output
-                    import json
-                    try:
-                        backup_info = json.loads(result.stdout)
-                        backup_path = backup_info.get('backup_path', '')
-                        if backup_path:
-                            info(f"Backup created: {backup_path}")
-                    except json.JSONDecodeError:
-                        pass
-                    
-                    # Copy backup from container
-                    backup_dir = get_backup_dir() / chain_name
-                    backup_dir.mkdir(parents=True, exist_ok=True)
-                    
-                    daemon_home = get_daemon_home(chain_name)
-                    run_docker([
-                        'cp', f'{container_name}:{daemon_home}/backup/.', str(backup_dir)
-                    ], check=False)
-                    
-                    success(f"Backed up {chain_name}")
-                else:
-                    error(f"Failed to backup {chain_name}: {result.stderr}")
-            except Exception as e:
-                error(f"Error backing up {chain_name}: {e}")
+        backup_config = load_global_config().get('backup', {})
+        if concurrency is None:
+            concurrency = backup_config.get('concurrency', 4)
+        if timeout is None:
+            timeout = backup_config.get('timeout', 300)
+        concurrency = max(1, min(int(concurrency), len(enabled_chains)))
+        
+        info(f"Backing up {len(enabled_chains)} chains ({concurrency} in parallel)...")
+        
+        # One docker ps for all chains instead of one per chain
+        running = get_running_containers()
+        
+        results = []
+        progress = ProgressBar(len(enabled_chains), "Backing up")
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(_backup_chain, chain_name, running, float(timeout))
+                for chain_name in enabled_chains.keys()
+            ]
+            for future in as_completed(futures):
+                results.append(future.result())
+                progress.increment()
+        progress.finish()
+        
+        results.sort(key=lambda r: r['chain'])
+        headers = ['Chain', 'Status', 'Duration', 'Size', 'New']
+        rows = [[r['chain'], r['status'], f"{r['duration']:.1f}s",
+                 format_bytes(r['bytes']), format_bytes(r['new_bytes'])]
+                for r in results]
+        print("")
+        print_table(headers, rows)
+        print("")
+        
+        for r in results:
+            if r['status'] == 'failed':
+                error(f"Failed to backup {r['chain']}: {r['message']}")
+            elif r['status'] == 'skipped':
+                info(f"Skipped {r['chain']} - {r['message']}")
         
         backup_base = get_backup_dir().relative_to(get_project_root())
+        failed = [r for r in results if r['status'] == 'failed']
+        if failed:
+            error(f"{len(failed)} of {len(results)} chain backups failed")
+            sys.exit(1)
         success(f"All backups complete in {backup_base}/")
     except Exception as e:
         error(f"Failed to backup all chains: {e}")
         sys.exit(1)
 
 
-def list_backups():
+def _parse_date(value: str, end_of_day: bool = False) -> datetime:
+    """Parse a YYYY-MM-DD or ISO 8601 date given on the command line (UTC)"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise BackupStoreError(f"Invalid date '{value}'. Use YYYY-MM-DD or ISO 8601")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1) - timedelta(microseconds=1)
+    return parsed
+
+
+def _parse_size(value: str) -> int:
+    """Parse a size such as 512, 10K, 5M or 1G into bytes"""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = value.strip().upper().rstrip('B').rstrip('I')
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise BackupStoreError(f"Invalid size '{value}'. Use a byte count or a K/M/G suffix")
+
+
+def _legacy_hint(store: BackupStore, chain_name: Optional[str] = None):
+    """Point at --import-legacy while archives from earlier versions are not in the store"""
+    pending = store.legacy_archives(chain_name)
+    if pending:
+        warning(f"{len(pending)} backup archives from an earlier version are not in the repository yet; "
+                f"run 'validay backup --import-legacy' to list and restore them")
+
+
+def list_backups(chain_name: Optional[str] = None, since: Optional[str] = None,
+                 until: Optional[str] = None, min_size: Optional[str] = None,
+                 max_size: Optional[str] = None):
     """List all backups"""
     try:
-        root = get_project_root()
-        backup_dir = get_backup_dir()
+        store = get_backup_store()
+        _legacy_hint(store, chain_name)
+        entries = store.query(
+            chain_name,
+            since=_parse_date(since) if since else None,
+            until=_parse_date(until, end_of_day=True) if until else None,
+            min_size=_parse_size(min_size) if min_size else None,
+            max_size=_parse_size(max_size) if max_size else None
+        )
         
-        if not backup_dir.exists():
+        if not entries:
             info("No backups found")
             return
         
         info("Available backups:")
         print("=" * 60)
         
-        backup_files = list(backup_dir.rglob("*.tar.gz")) + list(backup_dir.rglob("*.json"))
-        backup_files.sort()
-        
-        if backup_files:
-            for backup_file in backup_files:
-                rel_path = backup_file.relative_to(root)
-                print(str(rel_path))
-        else:
-            info("No backup files found")
+        headers = ['Chain', 'Backup ID', 'Created', 'Files', 'Size']
+        rows = [[e['chain'], e['id'], e['created_at'][:19].replace('T', ' '),
+                 str(e['file_count']), format_bytes(e['total_bytes'])]
+                for e in entries]
+        print_table(headers, rows)
     except Exception as e:
         error(f"Failed to list backups: {e}")
         sys.exit(1)
 
+
+def import_legacy_backups(chain_name: Optional[str] = None):
+    """Bring backups/<chain>/*.tar.gz archives from earlier versions into the repository"""
+    try:
+        store = get_backup_store()
+        pending = store.legacy_archives(chain_name)
+        if not pending:
+            info("No legacy backup archives to import")
+            return
+        
+        chains = get_chains()
+        for chain, path in pending:
+            # Archives of chains no longer configured keep their absolute paths
+            daemon_home = chains[chain].daemon_home if chain in chains else ''
+            manifest = store.import_legacy(path, chain, strip_prefix=daemon_home)
+            info(f"Imported {path.relative_to(store.root)} as {chain}/{manifest['id']}")
+        success(f"Imported {len(pending)} legacy backups; the archives were moved to <chain>/imported/")
+    except BackupStoreError as e:
+        error(str(e))
+        sys.exit(1)
+
+
+def reindex_backups():
+    """Rebuild the backup catalog from the manifests on disk"""
+    try:
+        count = get_backup_store().reindex()
+        success(f"Backup catalog rebuilt ({count} backups indexed)")
+    except Exception as e:
+        error(f"Failed to reindex backups: {e}")
+        sys.exit(1)
+
+
+def restore_backup(chain_name: str, backup_id: Optional[str], output_dir: str):
+    """Write the files of a stored backup to a directory"""
+    store = get_backup_store()
+    try:
+        manifest = store.get_manifest(chain_name, backup_id)
+        restored = store.restore(manifest, Path(output_dir))
+        for path in restored:
+            info(f"Restored {path}")
+        success(f"Backup {manifest['id']} of {chain_name} restored to {output_dir}")
+    except BackupStoreError as e:
+        error(str(e))
+        _legacy_hint(store, chain_name)
+        sys.exit(1)
+
+
+def prune_backups(dry_run: bool = False):
+    """Apply the retention policy and garbage-collect unreferenced blobs"""
+    try:
+        retention = load_global_config().get('backup', {}).get('retention', {})
+        keep_last = int(retention.get('keep_last', 0))
+        keep_daily = int(retention.get('keep_daily', 0))
+        keep_weekly = int(retention.get('keep_weekly', 0))
+        
+        if not (keep_last or keep_daily or keep_weekly):
+            warning("No retention policy configured (backup.retention); nothing to prune")
+            return
+        
+        store = get_backup_store()
+        expired = []
+        for chain in store.chains():
+            expired.extend(store.select_expired(store.list_manifests(chain),
+                                                keep_last, keep_daily, keep_weekly))
+        
+        if dry_run:
+            for manifest in expired:
+                info(f"Would remove {manifest['chain']}/{manifest['id']}")
+            info(f"{len(expired)} backups would be removed")
+            return
+        
+        store.delete_manifests(expired)
+        
+        result = store.gc()
+        success(f"Removed {len(expired)} backups and {result['removed']} unreferenced blobs "
+                f"({format_bytes(result['freed_bytes'])} freed)")
+    except BackupStoreError as e:
+        error(str(e))
+        sys.exit(1)
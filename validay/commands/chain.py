@@ -3,19 +3,22 @@
 import sys
 import json
 import yaml
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
-from ..output import success, error, info, warning
+from ..output import success, error, info, warning, print_table
 from ..progress import Spinner, show_progress
-from ..config import load_chains_config, get_chain_config, clear_cache
+from ..config import load_chains_config, load_global_config, get_chain, get_chains, clear_cache
 from ..utils.docker import (
     start_container, stop_container, restart_container, get_container_logs,
     exec_in_container, rebuild_container, remove_container, is_container_running,
-    get_container_status
+    get_container_status, start_containers, stop_containers, restart_containers,
+    get_health_states
 )
-from ..utils.chain_config import get_container_name, get_daemon_home, get_binary_name, get_rpc_port
+from ..utils.chain_config import get_container_name
 from ..utils.errors import ChainNotFoundError, ContainerNotRunningError, DockerError
 from ..utils.validation import validate_chain_name
+from ..utils.waves import WaveResult, run_waves
+from ..utils.yaml_cache import load_yaml
 
 
 def start(chain_name: str):
@@ -79,6 +82,115 @@ def restart(chain_name: str):
         sys.exit(1)
 
 
+# Container states that count as stopped
+_STOPPED_STATES = ('exited', 'created', 'missing')
+
+
+def _run_batch(message: str, operation: Callable[[List[str]], None], done_states: Tuple[str, ...]) -> Dict[str, str]:
+    """
+    Run one batched container operation on every enabled chain and report each chain's state
+    
+    The operation is a single docker-compose call (or parallel Engine API
+    calls), so its outcome per chain is read back afterwards with one
+    docker inspect. Exits non-zero if any chain did not reach done_states.
+    """
+    containers = {chain_name: get_container_name(chain_name) for chain_name in sorted(get_chains(enabled_only=True))}
+    if not containers:
+        info("No enabled chains found")
+        return {}
+    
+    failure = None
+    try:
+        show_progress(f"{message} {len(containers)} chains...", operation, list(containers.values()))
+    except DockerError as e:
+        # Compose may have handled some services before failing; report them all
+        failure = str(e)
+    
+    states = get_health_states(list(containers.values()))
+    rows = [[chain_name, container, states.get(container, 'missing')] for chain_name, container in containers.items()]
+    print_table(['Chain', 'Container', 'State'], rows)
+    
+    failed = [row[0] for row in rows if row[2] not in done_states]
+    if failure:
+        error(failure)
+    if failed:
+        error(f"{len(failed)} of {len(containers)} chains failed: {', '.join(failed)}")
+        sys.exit(1)
+    return states
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    return f"{seconds:.0f}s" if seconds is not None else '-'
+
+
+def _run_waves(message: str, operation: Callable[[List[str]], None], concurrency: Optional[int]) -> int:
+    """
+    Bring every enabled chain up through operation in health-gated waves and report time to healthy
+    
+    Exits non-zero if any chain failed; otherwise returns how many chains are ready.
+    """
+    chains = list(get_chains(enabled_only=True).values())
+    if not chains:
+        info("No enabled chains found")
+        return 0
+    settings = load_global_config().get('docker', {}).get('waves', {})
+    if concurrency is None:
+        concurrency = int(settings.get('concurrency', 4))
+    timeout = float(settings.get('health_timeout', 1800))
+    info(f"{message} {len(chains)} chains, {concurrency or len(chains)} at a time, highest priority first")
+    
+    def _operation(containers: List[str]):
+        try:
+            operation(containers)
+        except DockerError as e:
+            # Reported per chain once their states are read back
+            error(str(e))
+    
+    def _on_wave(number: int, names: List[str]):
+        info(f"Wave {number}: {', '.join(names)}")
+    
+    def _on_result(result: WaveResult):
+        if result.state == 'ready':
+            success(f"{result.chain} healthy and caught up after {_format_seconds(result.ready_after)}")
+        else:
+            error(f"{result.chain}: {result.state}")
+    
+    results = run_waves(chains, _operation, concurrency, timeout, on_result=_on_result, on_wave=_on_wave)
+    
+    print("")
+    rows = [[result.chain, str(result.wave), result.state, _format_seconds(result.healthy_after),
+             _format_seconds(result.ready_after)]
+            for result in sorted(results.values(), key=lambda r: (r.wave, r.ready_after is None, r.ready_after or 0))]
+    print_table(['Chain', 'Wave', 'State', 'Healthy after', 'Caught up after'], rows)
+    
+    failed = [result.chain for result in results.values() if result.state != 'ready']
+    if failed:
+        error(f"{len(failed)} of {len(results)} chains failed: {', '.join(failed)}")
+        sys.exit(1)
+    return len(results)
+
+
+def start_all(concurrency: Optional[int] = None):
+    """Start every enabled chain in health-gated waves"""
+    count = _run_waves("Starting", start_containers, concurrency)
+    if count:
+        success(f"Started {count} chains")
+
+
+def stop_all():
+    """Stop every enabled chain in one operation"""
+    states = _run_batch("Stopping", stop_containers, _STOPPED_STATES)
+    if states:
+        success(f"Stopped {len(states)} chains")
+
+
+def restart_all(concurrency: Optional[int] = None):
+    """Restart every enabled chain in health-gated waves"""
+    count = _run_waves("Restarting", restart_containers, concurrency)
+    if count:
+        success(f"Restarted {count} chains")
+
+
 def logs(chain_name: str, follow: bool = True):
     """View chain logs"""
     try:
@@ -122,9 +234,9 @@ def status(chain_name: str):
             sys.exit(1)
         
         # Format and display status
-        config = get_chain_config(chain_name)
-        denom_display = config.get('denom_display', '')
-        decimals = config.get('decimals', 6)
+        chain = get_chain(chain_name)
+        denom_display = chain.denom_display
+        decimals = chain.decimals
         
         info(f"{chain_name.title()} Validator Status")
         print("=" * 60)
@@ -316,8 +428,7 @@ def enable(chain_name: str):
         root = get_project_root()
         config_file = root / "chains.yaml"
         
-        with open(config_file, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_yaml(config_file)
         
         if chain_name not in config.get('chains', {}):
             error(f"Chain '{chain_name}' not found in chains.yaml")
@@ -347,8 +458,7 @@ def disable(chain_name: str):
         root = get_project_root()
         config_file = root / "chains.yaml"
         
-        with open(config_file, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_yaml(config_file)
         
         if chain_name not in config.get('chains', {}):
             error(f"Chain '{chain_name}' not found in chains.yaml")
@@ -374,19 +484,19 @@ def create_validator(chain_name: str):
     try:
         validate_chain_name(chain_name)
         container_name = get_container_name(chain_name)
-        config = get_chain_config(chain_name)
+        chain = get_chain(chain_name)
         
         if not is_container_running(container_name):
             error(f"Container '{container_name}' is not running")
             sys.exit(1)
         
-        daemon_name = get_binary_name(chain_name)
-        daemon_home = get_daemon_home(chain_name)
-        rpc_port = get_rpc_port(chain_name)
-        denom = config.get('denom', '')
-        denom_display = config.get('denom_display', '')
-        decimals = config.get('decimals', 6)
-        min_self_delegation = int(config.get('min_self_delegation', '1000000'))
+        daemon_name = chain.binary_name
+        daemon_home = chain.daemon_home
+        rpc_port = chain.rpc_port
+        denom = chain.denom
+        denom_display = chain.denom_display
+        decimals = chain.decimals
+        min_self_delegation = chain.min_self_delegation
         
         info(f"Preparing validator creation for {chain_name}...")
         
@@ -446,14 +556,16 @@ def create_validator(chain_name: str):
         info(f"✓ Sufficient balance: {balance_display} {denom_display}")
         
         # Display validator configuration
-        validator_name = config.get('validator', {}).get('name', config.get('moniker', f'{chain_name}-validator'))
-        validator_website = config.get('validator', {}).get('website', '')
-        validator_identity = config.get('validator', {}).get('identity', '')
-        validator_details = config.get('validator', {}).get('details', 'A reliable validator')
-        validator_security = config.get('validator', {}).get('security_contact', '')
-        commission_rate = config.get('validator', {}).get('commission_rate', 0.10)
-        commission_max_rate = config.get('validator', {}).get('commission_max_rate', 0.20)
-        commission_max_change_rate = config.get('validator', {}).get('commission_max_change_rate', 0.01)
+        # Same merged values the container receives through its environment
+        validator_config = chain.validator
+        validator_name = validator_config['name'] or validator_config['moniker']
+        validator_website = validator_config['website']
+        validator_identity = validator_config['identity']
+        validator_details = validator_config['details'] or 'A reliable validator'
+        validator_security = validator_config['security_contact']
+        commission_rate = validator_config['commission_rate']
+        commission_max_rate = validator_config['commission_max_rate']
+        commission_max_change_rate = validator_config['commission_max_change_rate']
         
         print("")
         info("Validator Configuration:")
@@ -489,7 +601,7 @@ def create_validator(chain_name: str):
             print("  2. Check your validator status: validay chain status " + chain_name)
             valoper_addr = validator.get('operator_address', '')
             if valoper_addr:
-                block_explorer = config.get('block_explorer_url', '')
+                block_explorer = chain.block_explorer_url
                 if block_explorer:
                     explorer_url = block_explorer.replace('{address}', valoper_addr)
                     print(f"  3. View on block explorer: {explorer_url}")
@@ -1,21 +1,26 @@
 """Configuration commands"""
 
 import sys
+import time
+from typing import Optional
 
-from ..output import success, error, info
+from ..output import success, error, info, warning
 from ..progress import show_progress
 from ..config import (
-    load_chains_config, validate_config, get_enabled_chains,
+    load_chains_config, get_chains,
     get_project_root, clear_cache, load_global_config
 )
-from ..utils.errors import ConfigError
-from ..utils.docker import is_container_running
-from ..utils.chain_config import get_container_name
-from ..utils.generate_compose import write_files
+from ..utils.errors import ConfigError, DockerError
+from ..utils.docker import (
+    is_container_running, get_labeled_containers, recreate_services, wait_for_healthy
+)
+from ..utils.generate_compose import generate_files, write_files, MANAGED_LABEL, CONFIG_HASH_LABEL
+from ..utils.ports import find_port_conflicts
+from ..models import DEFAULT_PORTS
 from ..output import print_table
 
 
-def generate():
+def generate(changed_only: bool = False):
     """Generate docker-compose.yml and prometheus.yml"""
     # Check for required config files
     root = get_project_root()
@@ -27,21 +32,34 @@ def generate():
     
     def _generate():
         root = get_project_root()
-        compose_file, prom_file = write_files(root)
+        result = write_files(root)
         
         # Get enabled chains for summary
-        config = load_chains_config()
-        enabled_chains = [name for name, cfg in config['chains'].items() if cfg.get('enabled', False)]
+        enabled_chains = list(get_chains(enabled_only=True))
         
-        return compose_file, prom_file, enabled_chains
+        return result, enabled_chains
     
     try:
-        compose_file, prom_file, enabled_chains = show_progress(
+        if changed_only:
+            # Machine-readable: the services to recreate, one per line
+            result, _ = _generate()
+            for name in result['added'] + result['changed']:
+                print(name)
+            return
+        
+        result, enabled_chains = show_progress(
             "Generating docker-compose.yml and prometheus.yml...", 
             _generate
         )
-        success(f"Generated {compose_file.name}")
-        success(f"Generated {prom_file.name}")
+        for path, written in ((result['compose_file'], result['compose_written']),
+                              (result['prom_file'], result['prom_written'])):
+            if written:
+                success(f"Generated {path.name}")
+            else:
+                info(f"{path.name} is up to date")
+        for label, key in (('Added', 'added'), ('Changed', 'changed'), ('Removed', 'removed')):
+            if result[key]:
+                info(f"{label} services: {', '.join(result[key])}")
         if enabled_chains:
             info(f"Enabled chains: {', '.join(enabled_chains)}")
         else:
@@ -52,13 +70,35 @@ def generate():
 
 
 def validate():
-    """Validate chains.yaml syntax"""
+    """Validate chains.yaml syntax and bech32 prefixes"""
     try:
-        if validate_config():
-            success("chains.yaml is valid")
-        else:
-            error("chains.yaml has syntax errors")
+        try:
+            load_chains_config()
+        except ConfigError as e:
+            error(f"chains.yaml is invalid: {e}")
+            sys.exit(1)
+        
+        for chain_name, chain in sorted(get_chains().items()):
+            for problem in chain.problems:
+                warning(f"{problem} (chain '{chain_name}' is disabled)")
+        
+        enabled = get_chains(enabled_only=True)
+        for chain_name, chain in sorted(enabled.items()):
+            if not chain.bech32_prefix:
+                warning(f"Chain '{chain_name}' has no bech32_prefix; keys cannot be generated for it")
+            configured = dict(DEFAULT_PORTS, **(chain.get('ports') or {}))
+            moved = {role: port for role, port in chain.ports.items() if configured[role] != port}
+            if moved:
+                info(f"Chain '{chain_name}' ports reassigned: "
+                     + ', '.join(f"{role} {configured[role]} -> {port}" for role, port in moved.items()))
+        
+        conflicts = find_port_conflicts(enabled.values(), load_global_config())
+        if conflicts:
+            for port, owners in conflicts.items():
+                error(f"Port {port} is published by {', '.join(owners)}")
+            info("Change the ports in chains.yaml or set docker.port_allocation.auto_assign in config.yml")
             sys.exit(1)
+        success("chains.yaml is valid")
     except Exception as e:
         error(f"Validation failed: {e}")
         sys.exit(1)
@@ -67,8 +107,7 @@ def validate():
 def list_chains():
     """List all configured chains with status"""
     try:
-        chains_config = load_chains_config()
-        chains = chains_config.get('chains', {})
+        chains = get_chains()
         
         if not chains:
             info("No chains configured")
@@ -77,23 +116,91 @@ def list_chains():
         info("Configured chains in chains.yaml:")
         print("=" * 60)
         
-        headers = ['Chain', 'Chain ID', 'Status', 'Enabled']
+        headers = ['Chain', 'Chain ID', 'Prefix', 'Status', 'Enabled']
         rows = []
         
-        for name, config in sorted(chains.items()):
-            chain_id = config.get('chain_id', 'N/A')
-            enabled = 'yes' if config.get('enabled', False) else 'no'
+        for name, chain in sorted(chains.items()):
+            chain_id = chain.chain_id or 'N/A'
+            enabled = 'yes' if chain.enabled else 'no'
             
-            container_name = get_container_name(name)
-            if is_container_running(container_name):
+            if is_container_running(chain.container_name):
                 status = 'running'
             else:
                 status = 'stopped'
             
-            rows.append([name, chain_id, status, enabled])
+            rows.append([name, chain_id, chain.bech32_prefix or '-', status, enabled])
         
         print_table(headers, rows)
     except Exception as e:
         error(f"Failed to list chains: {e}")
         sys.exit(1)
 
+
+def apply(concurrency: Optional[int] = None, health_timeout: Optional[float] = None,
+          dry_run: bool = False):
+    """Regenerate configuration and recreate only the services whose definition changed"""
+    try:
+        apply_config = load_global_config().get('docker', {}).get('apply', {})
+        if concurrency is None:
+            concurrency = apply_config.get('concurrency', 2)
+        if health_timeout is None:
+            health_timeout = apply_config.get('health_timeout', 600)
+        concurrency = max(1, int(concurrency))
+        
+        # A dry run only compares hashes in memory; the files are written when applying
+        if dry_run:
+            compose, _ = generate_files(get_project_root())
+        else:
+            compose = write_files(get_project_root())['compose']
+        services = compose['services']
+        
+        # One docker call for the config hash of every managed container
+        current = get_labeled_containers(MANAGED_LABEL, CONFIG_HASH_LABEL)
+        
+        pending = []
+        wanted_containers = set()
+        for service_name, service in services.items():
+            container_name = service.get('container_name', service_name)
+            wanted_containers.add(container_name)
+            state, running_hash = current.get(container_name, (None, ''))
+            if state is None:
+                pending.append((service_name, container_name, 'new'))
+            elif running_hash != service['labels'][CONFIG_HASH_LABEL]:
+                pending.append((service_name, container_name, 'changed'))
+        
+        orphans = sorted(name for name in current if name not in wanted_containers)
+        for name in orphans:
+            warning(f"Container '{name}' is no longer defined; remove it with: docker rm -f {name}")
+        
+        if not pending:
+            success("All services are up to date")
+            return
+        
+        print_table(['Service', 'Reason'], [[name, reason] for name, _, reason in pending])
+        print("")
+        if dry_run:
+            info(f"{len(pending)} services would be recreated")
+            return
+        
+        batches = [pending[i:i + concurrency] for i in range(0, len(pending), concurrency)]
+        for number, batch in enumerate(batches, 1):
+            names = [service_name for service_name, _, _ in batch]
+            info(f"Batch {number}/{len(batches)}: recreating {', '.join(names)}")
+            started = time.monotonic()
+            recreate_services(names)
+            
+            # Gate the next batch on the healthchecks of this one
+            states = wait_for_healthy([container for _, container, _ in batch], health_timeout)
+            not_ready = {name: state for name, state in states.items() if state not in ('healthy', 'running')}
+            if not_ready:
+                for name, state in sorted(not_ready.items()):
+                    error(f"{name} is {state}")
+                remaining = sum(len(b) for b in batches[number:])
+                error(f"Rollout stopped after batch {number}; {remaining} services were not recreated")
+                sys.exit(1)
+            success(f"Batch {number}/{len(batches)} healthy in {time.monotonic() - started:.0f}s")
+        
+        success(f"Recreated {len(pending)} services")
+    except (ConfigError, DockerError) as e:
+        error(f"Failed to apply configuration: {e}")
+        sys.exit(1)
@@ -0,0 +1,206 @@
+"""Long-running daemon that serves CLI commands over a unix socket"""
+
+import io
+import os
+import sys
+import json
+import signal
+import socket
+import threading
+import socketserver
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..output import success, error, info
+from ..config import get_project_root
+from ..utils.config_watcher import get_config_provider
+from ..utils.daemon_client import (
+    get_daemon_socket, is_forwardable, forwarded_environment, FORWARDED_ENV, FORWARDED_ENV_PREFIXES
+)
+from ..utils.docker import start_container_inventory
+from ..utils.errors import ConfigError
+
+# Commands share the process's stdout, stdin and config caches, so they run one at a
+# time; the config watcher takes the same lock to reload the caches between commands
+_command_lock = threading.RLock()
+
+
+class _Capture(io.TextIOBase):
+    """
+    Captured stdout or stderr of a command
+    
+    Every write is sent to the client as it happens, tagged with its
+    stream, so output shows up live and in the order it was written.
+    isatty() reports the client's terminal, which decides whether output
+    is colored.
+    """
+    
+    def __init__(self, stream: int, send: Callable[[Dict], None], tty: bool):
+        super().__init__()
+        self._stream = stream
+        self._send = send
+        self._tty = tty
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, text: str) -> int:
+        if text:
+            self._send({'stream': self._stream, 'text': text})
+        return len(text)
+    
+    def isatty(self) -> bool:
+        return self._tty
+
+
+def _set_forwarded_environment(env: Dict[str, str]):
+    """Replace the forwarded variables of os.environ with env"""
+    for name in forwarded_environment():
+        if name not in env:
+            del os.environ[name]
+    os.environ.update(env)
+
+
+@contextmanager
+def _client_context(cwd: str, env: Dict[str, str]):
+    """Run with a client's working directory and environment, then restore the daemon's"""
+    saved_cwd = os.getcwd()
+    saved_env = forwarded_environment()
+    os.chdir(cwd)
+    try:
+        _set_forwarded_environment(env)
+        yield
+    finally:
+        _set_forwarded_environment(saved_env)
+        os.chdir(saved_cwd)
+
+
+def _run_command(argv: List[str], tty: bool, cwd: str, env: Dict[str, str],
+                 send: Callable[[Dict], None]) -> Optional[int]:
+    """
+    Run one CLI command in this process as the client would, streaming its output
+    
+    Returns the exit code, or None if the client should run the command
+    itself: the daemon's configuration and container inventory belong to
+    one project and one Docker engine.
+    """
+    from .. import cli
+    
+    stdout, stderr = _Capture(1, send, tty), _Capture(2, send, tty)
+    exit_code = 0
+    with _command_lock:
+        if env.get('DOCKER_HOST', '') != os.environ.get('DOCKER_HOST', '') or not os.path.isdir(cwd):
+            return None
+        # Pick up edits to chains.yaml/config.yml made since the last command
+        get_config_provider(_command_lock).refresh()
+        saved_stdin, sys.stdin = sys.stdin, io.StringIO()
+        try:
+            with _client_context(cwd, env), redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    cli.main(argv)
+                except SystemExit as e:
+                    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except Exception as e:
+                    error(f"Unexpected error: {e}")
+                    exit_code = 1
+        finally:
+            sys.stdin = saved_stdin
+    return exit_code
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Read one JSON request line, run it and answer with JSON lines as output is written"""
+    
+    def _send(self, message: Dict):
+        if self._connected:
+            try:
+                self.wfile.write(json.dumps(message).encode() + b'\n')
+            except OSError:
+                # The client went away; the command still runs to completion
+                self._connected = False
+    
+    def handle(self):
+        self._connected = True
+        try:
+            request = json.loads(self.rfile.readline())
+            argv = [str(arg) for arg in request['argv']]
+            cwd = str(request.get('cwd') or os.getcwd())
+            root = Path(request.get('root') or get_project_root())
+            env = {str(name): str(value) for name, value in (request.get('env') or {}).items()
+                   if name in FORWARDED_ENV or str(name).startswith(FORWARDED_ENV_PREFIXES)}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return
+        
+        if not is_forwardable(argv):
+            self._send({'stream': 2, 'text': f"[ERROR] The daemon does not serve: validay {' '.join(argv)}\n"})
+            self._send({'exit_code': 2})
+            return
+        exit_code = None
+        if root == get_project_root():
+            exit_code = _run_command(argv, bool(request.get('tty')), cwd, env, self._send)
+        self._send({'fallback': True} if exit_code is None else {'exit_code': exit_code})
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # Automation fires bursts of commands; let them queue rather than be refused
+    request_queue_size = 128
+
+
+def _is_listening(path: Path) -> bool:
+    """Check whether a daemon already answers on a socket path"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def run(socket_path: Optional[str] = None):
+    """Serve forwarded CLI commands until interrupted"""
+    try:
+        root = get_project_root()
+        path = Path(socket_path) if socket_path else get_daemon_socket(root)
+        # Parse the configuration now and keep it fresh from the watcher thread
+        get_config_provider(_command_lock)
+    except ConfigError as e:
+        error(f"Cannot start the daemon: {e}")
+        sys.exit(1)
+    
+    if path.exists():
+        if _is_listening(path):
+            error(f"A validay daemon is already listening on {path}")
+            sys.exit(1)
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    
+    # Only the owner may connect: commands run with the daemon's privileges
+    old_umask = os.umask(0o177)
+    try:
+        server = _DaemonServer(str(path), _RequestHandler)
+    finally:
+        os.umask(old_umask)
+    
+    def _terminate(signum, frame):
+        raise KeyboardInterrupt
+    
+    # Stop cleanly, removing the socket, under a service manager as well
+    signal.signal(signal.SIGTERM, _terminate)
+    
+    # Container state for the served commands comes from Docker events, not polling
+    start_container_inventory()
+    
+    info(f"Serving validay commands for {root} on {path} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("")
+    finally:
+        server.server_close()
+        if path.exists():
+            path.unlink()
+    success("Daemon stopped")
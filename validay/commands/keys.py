@@ -1,24 +1,32 @@
 """Key management commands"""
 
+import re
 import sys
 import json
+import contextlib
+from pathlib import Path
+from typing import Optional
 
-from ..output import success, error, info, warning
-from ..progress import show_progress
-from ..config import get_project_root, get_chain_config, get_secrets_dir, get_backup_dir
+from ..output import success, error, info, warning, print_table
+from ..progress import show_progress, ProgressBar
+from ..config import get_chain, get_chains, get_secrets_dir
 from ..utils.docker import exec_in_container, is_container_running
-from ..utils.chain_config import get_container_name, get_daemon_home, get_binary_name
-from ..utils.errors import ChainNotFoundError, ContainerNotRunningError
+from ..utils.chain_config import get_container_name, get_address_prefix
+from ..utils.errors import ChainNotFoundError, ContainerNotRunningError, ConfigError
 from ..utils.validation import validate_chain_name
 from ..utils.generate_validator_key import (
-    generate_validator_key, generate_validator_key_from_mnemonic
+    generate_validator_key, generate_validator_key_from_mnemonic,
+    derive_seed, generate_validator_keys_from_seed
 )
+from ..utils.files import write_atomic
+from ..utils.key_batch import generate_keys
 
 
 def setup(chain_name: str):
     """Setup private key for a chain"""
     try:
         validate_chain_name(chain_name)
+        address_prefix = get_address_prefix(chain_name)
         secrets_dir = get_secrets_dir()
         secrets_dir.mkdir(parents=True, exist_ok=True)
         
@@ -54,8 +62,7 @@ def setup(chain_name: str):
                 sys.exit(1)
             
             try:
-                result = generate_validator_key_from_mnemonic(mnemonic, str(key_file), chain_name)
-                key_file.chmod(0o600)
+                result = generate_validator_key_from_mnemonic(mnemonic, str(key_file), address_prefix)
                 success(f"Validator key derived from mnemonic and saved to secrets/{chain_name}-private-key.json")
                 info(f"Validator Address (hex): {result['address_hex']}")
                 if result['account_address']:
@@ -92,17 +99,14 @@ def setup(chain_name: str):
                 error("Invalid JSON format. Please provide valid priv_validator_key.json content.")
                 sys.exit(1)
             
-            with open(key_file, 'w') as f:
-                f.write(private_key)
-            key_file.chmod(0o600)
+            write_atomic(key_file, private_key, mode=0o600)
             success(f"Private key saved to secrets/{chain_name}-private-key.json")
         
         elif choice == "3":
             info(f"Generating new private key for {chain_name}...")
             
             try:
-                result = generate_validator_key(str(key_file), chain_name)
-                key_file.chmod(0o600)
+                result = generate_validator_key(str(key_file), address_prefix)
                 success(f"Private key generated and saved to secrets/{chain_name}-private-key.json")
                 print("")
                 print("=" * 60)
@@ -121,7 +125,7 @@ def setup(chain_name: str):
             error("Invalid choice. Cancelled.")
             sys.exit(1)
     
-    except ChainNotFoundError as e:
+    except (ChainNotFoundError, ConfigError) as e:
         error(str(e))
         sys.exit(1)
     except Exception as e:
@@ -129,6 +133,152 @@ def setup(chain_name: str):
         sys.exit(1)
 
 
+def setup_all(mnemonic_file: str, overwrite: bool = False):
+    """Derive private keys for every enabled chain from one mnemonic"""
+    try:
+        enabled_chains = get_chains(enabled_only=True)
+        if not enabled_chains:
+            info("No enabled chains found")
+            return
+        
+        mnemonic_path = Path(mnemonic_file).expanduser()
+        if not mnemonic_path.is_file():
+            error(f"Mnemonic file not found: {mnemonic_file}")
+            sys.exit(1)
+        if mnemonic_path.stat().st_mode & 0o077:
+            warning(f"{mnemonic_file} is readable by other users. Consider: chmod 600 {mnemonic_file}")
+        
+        mnemonic = ' '.join(mnemonic_path.read_text().split())
+        word_count = len(mnemonic.split())
+        if word_count < 12 or word_count > 24:
+            error(f"Mnemonic should be 12-24 words. Got {word_count} words.")
+            sys.exit(1)
+        
+        # Resolve every prefix before touching any key file
+        prefixes = {chain_name: get_address_prefix(chain_name) for chain_name in enabled_chains}
+        
+        secrets_dir = get_secrets_dir()
+        secrets_dir.mkdir(parents=True, exist_ok=True)
+        
+        targets = {}
+        skipped = []
+        for chain_name in sorted(enabled_chains):
+            key_file = secrets_dir / f"{chain_name}-private-key.json"
+            if key_file.exists() and not overwrite:
+                skipped.append(chain_name)
+                continue
+            targets[chain_name] = (str(key_file), prefixes[chain_name])
+        
+        for chain_name in skipped:
+            warning(f"secrets/{chain_name}-private-key.json already exists, skipping (use --force to overwrite)")
+        
+        if not targets:
+            info("No keys to generate")
+            return
+        
+        def _derive():
+            # The PBKDF2 seed is computed once for all chains
+            return generate_validator_keys_from_seed(derive_seed(mnemonic), targets)
+        
+        try:
+            results = show_progress(f"Deriving keys for {len(targets)} chains...", _derive)
+        except ValueError as e:
+            error(str(e))
+            sys.exit(1)
+        
+        headers = ['Chain', 'Validator Address (hex)', 'Account Address']
+        rows = [[name, r['address_hex'], r['account_address'] or '-'] for name, r in results.items()]
+        print_table(headers, rows)
+        success(f"Saved {len(results)} private keys to secrets/")
+    except Exception as e:
+        error(f"Failed to setup keys: {e}")
+        sys.exit(1)
+
+
+def bench(count: int, workers: Optional[int] = None, chain_name: Optional[str] = None,
+          output_dir: Optional[str] = None, ndjson: Optional[str] = None,
+          with_mnemonic: bool = False, vanity: Optional[str] = None, count_pbkdf2: bool = False):
+    """
+    Batch-generate consensus keys across all cores and report throughput
+    
+    With count_pbkdf2, also report the BIP39 seed derivations (PBKDF2 runs)
+    each key costs: 1 with --with-mnemonic, 0 for random keys.
+    """
+    if count < 1:
+        error("--count must be at least 1")
+        sys.exit(1)
+    if vanity:
+        # int(vanity, 16) would also accept '0x', '_' and surrounding whitespace
+        if not re.fullmatch(r'[0-9A-Fa-f]+', vanity):
+            error(f"--vanity must be a hex prefix, got '{vanity}'")
+            sys.exit(1)
+        if len(vanity) > 6:
+            warning(f"A {len(vanity)}-character vanity prefix needs about 16^{len(vanity)} attempts per key")
+    
+    # With NDJSON on stdout, status messages go to stderr to keep the stream clean
+    stream = sys.stdout
+    status = contextlib.redirect_stdout(sys.stderr) if ndjson == '-' else contextlib.nullcontext()
+    
+    with status:
+        try:
+            address_prefix = get_address_prefix(chain_name) if chain_name else "cosmos"
+            
+            key_dir = None
+            if output_dir:
+                key_dir = Path(output_dir)
+                key_dir.mkdir(parents=True, exist_ok=True)
+            
+            ndjson_file = None
+            if ndjson and ndjson != '-':
+                ndjson_file = open(ndjson, 'w')
+            elif ndjson == '-':
+                ndjson_file = stream
+            
+            progress = ProgressBar(count, "Generating keys")
+            
+            def _write(records):
+                for record in records:
+                    if key_dir is not None:
+                        key_data = {k: v for k, v in record.items() if k != 'mnemonic'}
+                        write_atomic(key_dir / f"{record['address']}.json", json.dumps(key_data, indent=2), mode=0o600)
+                        if 'mnemonic' in record:
+                            write_atomic(key_dir / f"{record['address']}.mnemonic", record['mnemonic'] + '\n', mode=0o600)
+                    if ndjson_file is not None:
+                        ndjson_file.write(json.dumps(record, separators=(',', ':')) + '\n')
+                progress.increment(len(records))
+            
+            try:
+                result = generate_keys(count, _write, workers=workers, address_prefix=address_prefix,
+                                       with_mnemonic=with_mnemonic, vanity=vanity)
+            finally:
+                if ndjson_file is not None and ndjson_file is not stream:
+                    ndjson_file.close()
+                elif ndjson_file is stream:
+                    stream.flush()
+            progress.finish()
+            
+            elapsed = result['elapsed']
+            headers = ['Keys', 'Attempts', 'Workers', 'Elapsed', 'Keys/sec', 'Attempts/sec']
+            rows = [[str(result['keys']), str(result['attempts']), str(result['workers']),
+                     f"{elapsed:.2f}s", f"{result['keys'] / elapsed:,.0f}", f"{result['attempts'] / elapsed:,.0f}"]]
+            if count_pbkdf2:
+                headers += ['Worker ms/attempt', 'PBKDF2/attempt']
+                rows[0] += [f"{elapsed * 1000 * result['workers'] / result['attempts']:.2f}",
+                            f"{result['pbkdf2_runs'] / result['attempts']:.1f}"]
+            print_table(headers, rows)
+            
+            if key_dir is not None:
+                success(f"Wrote {result['keys']} keys to {key_dir}/")
+            if ndjson_file is not None and ndjson != '-':
+                success(f"Wrote {result['keys']} keys to {ndjson}")
+        except (ChainNotFoundError, ConfigError) as e:
+            error(str(e))
+            sys.exit(1)
+        except Exception as e:
+            error(f"Key generation failed: {e}")
+            sys.exit(1)
+
+
 def create(chain_name: str):
     """Create new keys in container"""
     try:
@@ -139,9 +289,9 @@ def create(chain_name: str):
             error(f"Container '{container_name}' is not running")
             sys.exit(1)
         
-        config = get_chain_config(chain_name)
-        daemon_name = get_binary_name(chain_name)
-        daemon_home = get_daemon_home(chain_name)
+        chain = get_chain(chain_name)
+        daemon_name = chain.binary_name
+        daemon_home = chain.daemon_home
         
         info(f"Creating new keys for {chain_name}...")
         result = exec_in_container(
@@ -219,9 +369,9 @@ def show(chain_name: str):
             error(f"Container '{container_name}' is not running")
             sys.exit(1)
         
-        config = get_chain_config(chain_name)
-        daemon_name = get_binary_name(chain_name)
-        daemon_home = get_daemon_home(chain_name)
+        chain = get_chain(chain_name)
+        daemon_name = chain.binary_name
+        daemon_home = chain.daemon_home
         
         info(f"Addresses for {chain_name}:")
         print("=" * 50)
@@ -252,48 +402,5 @@ def show(chain_name: str):
 
 def backup(chain_name: str):
     """Backup keys for a chain"""
-    try:
-        validate_chain_name(chain_name)
-        container_name = get_container_name(chain_name)
-        
-        if not is_container_running(container_name):
-            error(f"Container '{container_name}' is not running")
-            sys.exit(1)
-        
-        backup_dir = get_backup_dir() / chain_name
-        backup_dir.mkdir(parents=True, exist_ok=True)
-        
-        info(f"Backing up keys for {chain_name}...")
-        result = exec_in_container(container_name, ['/scripts/backup-keys.sh'], interactive=False)
-        
-        if result.returncode == 0:
-            # Parse JSON output
-            import json
-            try:
-                backup_info = json.loads(result.stdout)
-                backup_path = backup_info.get('backup_path', '')
-                if backup_path:
-                    info(f"Backup created in container: {backup_path}")
-            except json.JSONDecodeError:
-                pass
-            
-            # Copy backup from container
-            from ..utils.docker import run_docker
-            daemon_home = get_daemon_home(chain_name)
-            
-            run_docker([
-                'cp', f'{container_name}:{daemon_home}/backup/.', str(backup_dir)
-            ], check=False)
-            
-            backup_base = get_backup_dir().relative_to(get_project_root())
-            success(f"Backup saved to {backup_base}/{chain_name}/")
-        else:
-            error(f"Backup failed: {result.stderr}")
-            sys.exit(1)
-    except ChainNotFoundError as e:
-        error(str(e))
-        sys.exit(1)
-    except ContainerNotRunningError as e:
-        error(str(e))
-        sys.exit(1)
-
+    from .backup import backup_chain
+    backup_chain(chain_name)
@@ -0,0 +1,78 @@
+"""Multi-host placement commands"""
+
+import sys
+from pathlib import Path
+
+from ..output import success, error, info, warning
+from ..config import load_chains_config, load_global_config, get_chains, get_project_root
+from ..utils.errors import ConfigError, PlacementError
+from ..utils.placement import (
+    RESOURCES, load_inventory, load_profiles, place_chains, host_usage,
+    read_placement, render_placement, write_placement_files, format_size
+)
+from ..output import print_table
+
+
+def _format_amount(resource: str, amount: float) -> str:
+    """Format a resource amount for the placement table"""
+    if resource in ('memory', 'disk'):
+        return format_size(amount)
+    if resource == 'cpus':
+        return f"{amount:g}"
+    return f"{int(amount)}"
+
+
+def place(dry_run: bool = False, rebalance: bool = False):
+    """Place enabled chains on the host inventory and write per-host configuration"""
+    try:
+        global_config = load_global_config()
+        placement_config = global_config.get('placement', {})
+        hosts = load_inventory(global_config)
+        central = placement_config.get('central') or next(iter(hosts))
+        if central not in hosts:
+            raise ConfigError(f"placement.central '{central}' is not in placement.hosts")
+        
+        output_dir = Path(placement_config.get('output_dir', './placement'))
+        if not output_dir.is_absolute():
+            output_dir = get_project_root() / output_dir
+        
+        chains = get_chains(enabled_only=True)
+        profiles = load_profiles(chains.values(), global_config)
+        previous = read_placement(output_dir)
+        placement = place_chains(profiles, hosts, {} if rebalance else previous)
+        usage = host_usage(placement, profiles, hosts)
+        
+        rows = []
+        for name, host in hosts.items():
+            count = sum(1 for host_name in placement.values() if host_name == name)
+            rows.append([name + (' *' if name == central else '')]
+                        + [f"{_format_amount(r, usage[name][r])}/{_format_amount(r, host.capacity[r])}"
+                           for r in RESOURCES]
+                        + [str(count)])
+        print_table(['Host', 'CPUs', 'Memory', 'Disk', 'IOPS', 'Chains'], rows)
+        print("")
+        
+        moves = sorted((chain, previous[chain], host) for chain, host in placement.items()
+                       if chain in previous and previous[chain] != host)
+        for chain, old_host, new_host in moves:
+            warning(f"{chain} moves from {old_host} to {new_host}")
+        new = sorted(chain for chain in placement if chain not in previous)
+        if new and previous:
+            info(f"Newly placed: {', '.join(new)}")
+        
+        if dry_run:
+            info("Dry run; no files written")
+            return
+        
+        files = render_placement(load_chains_config(), global_config, chains, placement, hosts, central)
+        written = write_placement_files(output_dir, files)
+        if written:
+            success(f"Wrote {len(written)} files to {output_dir}")
+        else:
+            info(f"Placement files in {output_dir} are up to date")
+        for stale in sorted(path.name for path in output_dir.iterdir() if path.is_dir() and path.name not in hosts):
+            warning(f"{output_dir / stale} belongs to a host no longer in placement.hosts")
+        info("Copy <host>/docker-compose.yml and <host>/prometheus/prometheus.yml into the project directory on each host")
+    except (ConfigError, PlacementError) as e:
+        error(str(e))
+        sys.exit(1)
@@ -0,0 +1,157 @@
+"""Resource profiling commands"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import yaml
+
+from ..output import success, error, info, warning
+from ..config import load_global_config, get_chains, get_project_root, get_stats_backend
+from ..utils.cgroup import CgroupSampler
+from ..utils.chain_config import get_container_name
+from ..utils.config_watcher import get_config_provider
+from ..utils.docker_api import DockerAPI
+from ..utils.errors import ConfigError, DockerError
+from ..utils.profiler import (
+    RingBuffer, read_ring, counters_from_stats, sample_between, summarize, suggest_limits, parse_window
+)
+from ..utils.placement import format_size
+from ..output import print_table
+
+
+def _get_profile_settings():
+    """Get the profile directory, sampling interval and ring capacity"""
+    profile_config = load_global_config().get('monitoring', {}).get('profile', {})
+    interval = float(profile_config.get('interval', 10))
+    retention = parse_window(str(profile_config.get('retention', '7d')))
+    profile_dir = Path(profile_config.get('dir', './.validay/profile'))
+    if not profile_dir.is_absolute():
+        profile_dir = get_project_root() / profile_dir
+    return profile_dir, interval, max(1, int(retention / interval))
+
+
+def _rate(summary: Dict, field: str) -> str:
+    """Format the p95 of a byte rate"""
+    return f"{format_size(summary[field]['p95'])}/s"
+
+
+def collect(interval: Optional[float] = None):
+    """Sample every enabled chain's resource usage until interrupted"""
+    try:
+        profile_dir, default_interval, capacity = _get_profile_settings()
+        interval = interval or default_interval
+        provider = get_config_provider()
+        api = DockerAPI(timeout=max(5.0, interval))
+        sampler = CgroupSampler(api) if get_stats_backend() == 'cgroup' else None
+    except (ConfigError, ValueError) as e:
+        error(f"Cannot start the profiler: {e}")
+        sys.exit(1)
+    
+    buffers: Dict[str, RingBuffer] = {}
+    previous = {}
+    info(f"Sampling enabled chains every {interval:g}s into {profile_dir} (Ctrl+C to stop)")
+    
+    try:
+        while True:
+            started = time.monotonic()
+            # The watcher thread reloads the config caches; read them under its lock
+            with provider.cache_lock:
+                enabled = provider.snapshot().enabled
+                containers = {chain_name: get_container_name(chain_name) for chain_name in enabled}
+            if sampler is not None:
+                readings = sampler.read(containers.values())
+            for chain_name in sorted(enabled):
+                container = containers[chain_name]
+                if sampler is not None:
+                    counters = readings[container][0] if container in readings else None
+                else:
+                    try:
+                        counters = counters_from_stats(api.container_stats(container))
+                    except DockerError:
+                        counters = None
+                if counters is None:
+                    # Not running: the next reading starts a new baseline
+                    previous.pop(chain_name, None)
+                    continue
+                
+                now = time.monotonic()
+                if chain_name in previous:
+                    last_counters, last_time = previous[chain_name]
+                    sample = sample_between(last_counters, counters, now - last_time, int(time.time()))
+                    if sample is not None:
+                        if chain_name not in buffers:
+                            buffers[chain_name] = RingBuffer(profile_dir / f"{chain_name}.ring", capacity)
+                        buffers[chain_name].append(sample)
+                previous[chain_name] = (counters, now)
+            
+            for chain_name in set(previous) - set(enabled):
+                del previous[chain_name]
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        print("")
+        success(f"Profiler stopped; {len(buffers)} chains recorded")
+    finally:
+        if sampler is not None:
+            sampler.close()
+        api.close()
+        for buffer in buffers.values():
+            buffer.close()
+
+
+def report(chain_name: Optional[str] = None, window: str = '24h'):
+    """Show p50/p95/max usage per chain and suggest resource limits"""
+    try:
+        profile_dir, _, _ = _get_profile_settings()
+        since = int(time.time()) - parse_window(window)
+        chains = get_chains()
+        if chain_name:
+            if chain_name not in chains:
+                raise ConfigError(f"Chain '{chain_name}' not found in chains.yaml")
+            names = [chain_name]
+        else:
+            names = sorted(path.stem for path in profile_dir.glob('*.ring') if path.stem in chains)
+    except (ConfigError, ValueError) as e:
+        error(str(e))
+        sys.exit(1)
+    
+    rows = []
+    suggestions = {}
+    for name in names:
+        path = profile_dir / f"{name}.ring"
+        if not path.exists():
+            warning(f"No profile recorded for {name}; run: validay profile collect")
+            continue
+        samples = read_ring(path, since)
+        if not samples:
+            warning(f"No samples for {name} in the last {window}")
+            continue
+        
+        summary = summarize(samples)
+        cpu, memory = summary['cpu'], summary['memory']
+        rows.append([
+            name, str(len(samples)),
+            f"{cpu['p50']:.2f}/{cpu['p95']:.2f}/{cpu['max']:.2f}",
+            f"{format_size(memory['p50'])}/{format_size(memory['p95'])}/{format_size(memory['max'])}",
+            f"{_rate(summary, 'net_rx')} {_rate(summary, 'net_tx')}",
+            f"{_rate(summary, 'disk_read')} {_rate(summary, 'disk_write')}"
+        ])
+        suggestions[name] = suggest_limits(summary)
+    
+    if not rows:
+        info("No profile data; start the collector with: validay profile collect")
+        return
+    
+    info(f"Resource usage over the last {window}")
+    print_table(['Chain', 'Samples', 'CPU p50/p95/max', 'Memory p50/p95/max',
+                 'Net p95 rx tx', 'Disk p95 r w'], rows, max_width=140)
+    print("")
+    info("Suggested limits for chains.yaml:")
+    snippet = {'chains': {name: {'docker': {'limits': limits}} for name, limits in suggestions.items()}}
+    print(yaml.dump(snippet, default_flow_style=False, sort_keys=False).rstrip())
+    
+    for name, limits in suggestions.items():
+        current = chains[name].limits
+        if current.get('cpus') is not None or current.get('memory') is not None:
+            info(f"{name} currently: cpus={current.get('cpus')}, memory={current.get('memory')}")
@@ -4,10 +4,10 @@ import sys
 
 from ..output import error
 from ..utils.docker import exec_in_container, is_container_running
-from ..utils.chain_config import get_container_name, get_daemon_home, get_binary_name, get_rpc_port
+from ..utils.chain_config import get_container_name
 from ..utils.errors import ChainNotFoundError, ContainerNotRunningError
 from ..utils.validation import validate_chain_name
-from ..config import get_chain_config
+from ..config import get_chain
 
 
 def balance(chain_name: str):
@@ -20,10 +20,10 @@ def balance(chain_name: str):
             error(f"Container '{container_name}' is not running")
             sys.exit(1)
         
-        config = get_chain_config(chain_name)
-        daemon_name = get_binary_name(chain_name)
-        daemon_home = get_daemon_home(chain_name)
-        rpc_port = get_rpc_port(chain_name)
+        chain = get_chain(chain_name)
+        daemon_name = chain.binary_name
+        daemon_home = chain.daemon_home
+        rpc_port = chain.rpc_port
         
         result = exec_in_container(
             container_name,
@@ -61,10 +61,10 @@ def validator_info(chain_name: str):
             error(f"Container '{container_name}' is not running")
             sys.exit(1)
         
-        config = get_chain_config(chain_name)
-        daemon_name = get_binary_name(chain_name)
-        daemon_home = get_daemon_home(chain_name)
-        rpc_port = get_rpc_port(chain_name)
+        chain = get_chain(chain_name)
+        daemon_name = chain.binary_name
+        daemon_home = chain.daemon_home
+        rpc_port = chain.rpc_port
         
         result = exec_in_container(
             container_name,
@@ -102,10 +102,10 @@ def delegations(chain_name: str):
             error(f"Container '{container_name}' is not running")
             sys.exit(1)
         
-        config = get_chain_config(chain_name)
-        daemon_name = get_binary_name(chain_name)
-        daemon_home = get_daemon_home(chain_name)
-        rpc_port = get_rpc_port(chain_name)
+        chain = get_chain(chain_name)
+        daemon_name = chain.binary_name
+        daemon_home = chain.daemon_home
+        rpc_port = chain.rpc_port
         
         result = exec_in_container(
             container_name,
@@ -5,8 +5,8 @@ import sys
 from ..output import success, error, info
 from ..progress import show_progress
 from ..utils.docker import (
-    start_container, stop_container, restart_container, get_container_logs,
-    is_container_running
+    start_containers, stop_containers, restart_containers, get_container_logs,
+    is_container_running, get_running_containers
 )
 from ..utils.errors import DockerError
 
@@ -16,31 +16,24 @@ SERVICES = ['prometheus', 'grafana', 'alertmanager']
 
 def start_services():
     """Start all monitoring services"""
-    def _start():
-        for service in SERVICES:
-            start_container(service)
-    
-    show_progress("Starting monitoring services...", _start)
+    show_progress("Starting monitoring services...", start_containers, SERVICES)
     success("All monitoring services started")
 
 
 def stop_services():
     """Stop all monitoring services"""
-    def _stop():
-        for service in SERVICES:
-            if is_container_running(service):
-                stop_container(service)
-    
-    show_progress("Stopping monitoring services...", _stop)
+    show_progress("Stopping monitoring services...", stop_containers, SERVICES)
     success("All monitoring services stopped")
 
 
 def restart_services():
     """Restart all monitoring services"""
     def _restart():
-        for service in SERVICES:
-            if is_container_running(service):
-                restart_container(service)
+        # Only restart what is running, rather than starting stopped services
+        running = get_running_containers()
+        services = [service for service in SERVICES if service in running]
+        if services:
+            restart_containers(services)
     
     show_progress("Restarting monitoring services...", _restart)
     success("All monitoring services restarted")
@@ -6,17 +6,16 @@ import subprocess
 from ..output import success, error, info
 from ..progress import show_progress
 from ..utils.docker import stop_container, start_container, run_docker
-from ..utils.chain_config import get_container_name, get_daemon_home, get_binary_name
+from ..utils.chain_config import get_container_name
 from ..utils.errors import ChainNotFoundError, DockerError
 from ..utils.validation import validate_chain_name
-from ..config import get_chain_config, get_project_root
+from ..config import get_chain, get_project_root
 
 
 def list_snapshots(chain_name: str):
     """List available snapshots for a chain"""
     try:
         validate_chain_name(chain_name)
-        config = get_chain_config(chain_name)
         
         info(f"Available snapshots for {chain_name} from Polkachu:")
         print("=" * 60)
@@ -60,9 +59,9 @@ def apply(chain_name: str, snapshot_url: str):
     try:
         validate_chain_name(chain_name)
         container_name = get_container_name(chain_name)
-        config = get_chain_config(chain_name)
-        daemon_home = get_daemon_home(chain_name)
-        daemon_name = get_binary_name(chain_name)
+        chain = get_chain(chain_name)
+        daemon_home = chain.daemon_home
+        daemon_name = chain.binary_name
         
         if not snapshot_url:
             error("Snapshot URL is required. Use --url <url>")
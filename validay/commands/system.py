@@ -1,15 +1,21 @@
 """System commands"""
 
 import sys
+import time
 import subprocess
 from pathlib import Path
+from typing import Optional
 
-from ..output import success, error, info, warning
+from ..output import success, error, info, warning, format_bytes
 from ..progress import show_progress
-from ..config import get_enabled_chains, get_project_root
+from ..config import get_project_root, get_stats_backend
 from ..utils.docker import (
     get_all_containers, get_container_stats, run_docker, run_docker_compose
 )
+from ..utils.cgroup import CgroupSampler
+from ..utils.docker_api import DockerAPI
+from ..utils.errors import ConfigError, DockerError
+from ..utils.live_stats import StatsWatcher, sort_usage
 from ..output import print_table
 
 
@@ -84,9 +90,18 @@ def ps():
         info("No containers found")
 
 
-def stats():
+def stats(watch: bool = False, interval: float = 2.0, sort: str = 'cpu', backend: Optional[str] = None):
     """Show container resource usage"""
-    stats_list = get_container_stats()
+    try:
+        backend = backend or get_stats_backend()
+        if watch:
+            watch_stats(interval, sort, backend)
+            return
+        stats_list = get_container_stats(backend)
+    except (ConfigError, DockerError) as e:
+        error(str(e))
+        sys.exit(1)
+    
     if stats_list:
         headers = ['Name', 'CPU', 'Memory', 'Network']
         rows = [[s['name'], s['cpu'], s['memory'], s['network']] for s in stats_list]
@@ -95,6 +110,41 @@ def stats():
         info("No container stats available")
 
 
+def watch_stats(interval: float = 2.0, sort: str = 'cpu', backend: str = 'docker'):
+    """Redraw container resource usage every `interval` seconds until interrupted"""
+    api = DockerAPI(timeout=10.0)
+    sampler = CgroupSampler(api) if backend == 'cgroup' else None
+    watcher = StatsWatcher(api, sampler)
+    clear = '\033[H\033[2J' if sys.stdout.isatty() else ''
+    try:
+        while True:
+            started = time.monotonic()
+            names = watcher.refresh_containers()
+            usage = sort_usage(watcher.usage(), sort)
+            
+            rows = []
+            for u in usage:
+                limit = f" / {format_bytes(u.memory_limit)}" if u.memory_limit else ''
+                rows.append([u.name, f"{u.cpu * 100:.1f}%", f"{format_bytes(u.memory)}{limit}",
+                             f"{format_bytes(u.net_rx)}/s", f"{format_bytes(u.net_tx)}/s",
+                             f"{format_bytes(u.disk_read)}/s", f"{format_bytes(u.disk_write)}/s"])
+            print(clear, end='')
+            info(f"{len(names)} running containers, sorted by {sort}, every {interval:g}s (Ctrl+C to stop)")
+            if rows:
+                print_table(['Name', 'CPU', 'Memory', 'Net In', 'Net Out', 'Disk Read', 'Disk Write'],
+                            rows, max_width=120)
+            elif names:
+                print("Waiting for samples...")
+            sys.stdout.flush()
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        print("")
+    finally:
+        if sampler is not None:
+            sampler.close()
+        api.close()
+
+
 def prune():
     """Prune unused Docker resources"""
     def _prune():
@@ -5,10 +5,10 @@ import json
 
 from ..output import success, error, info, warning
 from ..utils.docker import exec_in_container, is_container_running
-from ..utils.chain_config import get_container_name, get_daemon_home, get_binary_name, get_rpc_port
+from ..utils.chain_config import get_container_name
 from ..utils.errors import ChainNotFoundError, ContainerNotRunningError
 from ..utils.validation import validate_chain_name
-from ..config import get_chain_config
+from ..config import get_chain
 
 
 def create(chain_name: str):
@@ -16,19 +16,19 @@ def create(chain_name: str):
     try:
         validate_chain_name(chain_name)
         container_name = get_container_name(chain_name)
-        config = get_chain_config(chain_name)
+        chain = get_chain(chain_name)
         
         if not is_container_running(container_name):
             error(f"Container '{container_name}' is not running")
             sys.exit(1)
         
-        daemon_name = get_binary_name(chain_name)
-        daemon_home = get_daemon_home(chain_name)
-        rpc_port = get_rpc_port(chain_name)
-        denom = config.get('denom', '')
-        denom_display = config.get('denom_display', '')
-        decimals = config.get('decimals', 6)
-        min_self_delegation = int(config.get('min_self_delegation', '1000000'))
+        daemon_name = chain.binary_name
+        daemon_home = chain.daemon_home
+        rpc_port = chain.rpc_port
+        denom = chain.denom
+        denom_display = chain.denom_display
+        decimals = chain.decimals
+        min_self_delegation = chain.min_self_delegation
         
         info(f"Preparing validator creation for {chain_name}...")
         
@@ -88,14 +88,16 @@ def create(chain_name: str):
         info(f"✓ Sufficient balance: {balance_display} {denom_display}")
         
         # Display validator configuration
-        validator_name = config.get('validator', {}).get('name', config.get('moniker', f'{chain_name}-validator'))
-        validator_website = config.get('validator', {}).get('website', '')
-        validator_identity = config.get('validator', {}).get('identity', '')
-        validator_details = config.get('validator', {}).get('details', 'A reliable validator')
-        validator_security = config.get('validator', {}).get('security_contact', '')
-        commission_rate = config.get('validator', {}).get('commission_rate', 0.10)
-        commission_max_rate = config.get('validator', {}).get('commission_max_rate', 0.20)
-        commission_max_change_rate = config.get('validator', {}).get('commission_max_change_rate', 0.01)
+        # Same merged values the container receives through its environment
+        validator_config = chain.validator
+        validator_name = validator_config['name'] or validator_config['moniker']
+        validator_website = validator_config['website']
+        validator_identity = validator_config['identity']
+        validator_details = validator_config['details'] or 'A reliable validator'
+        validator_security = validator_config['security_contact']
+        commission_rate = validator_config['commission_rate']
+        commission_max_rate = validator_config['commission_max_rate']
+        commission_max_change_rate = validator_config['commission_max_change_rate']
         
         print("")
         info("Validator Configuration:")
@@ -131,7 +133,7 @@ def create(chain_name: str):
             print("  2. Check your validator status: validay chain status " + chain_name)
             valoper_addr = validator.get('operator_address', '')
             if valoper_addr:
-                block_explorer = config.get('block_explorer_url', '')
+                block_explorer = chain.block_explorer_url
                 if block_explorer:
                     explorer_url = block_explorer.replace('{address}', valoper_addr)
                     print(f"  3. View on block explorer: {explorer_url}")
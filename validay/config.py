@@ -6,30 +6,83 @@ from typing import Dict, Optional
 from pathlib import Path
 
 from .utils.errors import ConfigError
+from .utils.yaml_cache import load_yaml
+from .models import ChainConfig, build_chain_configs
+from .utils.ports import assign_ports
 
 
+_project_root: Optional[Path] = None
 _config_cache: Optional[Dict] = None
 _chains_cache: Optional[Dict] = None
+_prefix_index: Optional[Dict[str, str]] = None
+_chain_models: Optional[Dict[str, ChainConfig]] = None
 
 
 def get_project_root() -> Path:
-    """Get the project root directory"""
+    """Get the project root directory (resolved once per process)"""
+    global _project_root
+    
+    if _project_root is not None:
+        return _project_root
+    
+    # An explicit root (set by bin/validay) skips the directory walk
+    env_root = os.environ.get('VALIDAY_ROOT')
+    if env_root:
+        _project_root = Path(env_root).expanduser().resolve()
+        return _project_root
+    
     # If running in Docker, we're already in /work
     # If running locally, find the directory containing chains.yaml
     cwd = Path.cwd()
+    _project_root = cwd
     
     # Check current directory and parents
     for path in [cwd] + list(cwd.parents):
         if (path / "chains.yaml").exists():
-            return path
+            _project_root = path
+            break
+    
+    return _project_root
+
+
+def get_cache_dir() -> Path:
+    """Get the directory holding compiled configuration caches"""
+    return get_project_root() / ".validay" / "cache"
+
+
+def _validate_bech32_prefix(chain_name: str, prefix) -> str:
+    """Check a bech32 prefix by round-tripping a test address through it"""
+    import bech32
     
-    # Fallback to current directory
-    return cwd
+    if not isinstance(prefix, str) or not prefix or prefix != prefix.lower():
+        raise ConfigError(f"Chain '{chain_name}': bech32_prefix must be a non-empty lowercase string")
+    
+    test_address = bech32.bech32_encode(prefix, bech32.convertbits(bytes(20), 8, 5, True))
+    decoded_prefix, data = bech32.bech32_decode(test_address) if test_address else (None, None)
+    if decoded_prefix != prefix or data is None:
+        raise ConfigError(f"Chain '{chain_name}': bech32_prefix '{prefix}' cannot encode a valid address")
+    return prefix
+
+
+def _build_prefix_index(config: Dict) -> Dict[str, str]:
+    """Build the chain -> bech32 prefix lookup, validating every declared prefix"""
+    index = {}
+    for chain_name, chain_config in (config.get('chains') or {}).items():
+        prefix = (chain_config or {}).get('bech32_prefix')
+        if prefix is not None:
+            index[chain_name] = _validate_bech32_prefix(chain_name, prefix)
+    return index
+
+
+def get_prefix_index() -> Dict[str, str]:
+    """Get the bech32 prefix of every chain that declares one in chains.yaml"""
+    load_chains_config()
+    return _prefix_index
 
 
 def load_chains_config() -> Dict:
     """Load chains.yaml configuration"""
-    global _chains_cache
+    global _chains_cache, _prefix_index
     
     if _chains_cache is not None:
         return _chains_cache
@@ -41,16 +94,19 @@ def load_chains_config() -> Dict:
         raise ConfigError(f"chains.yaml not found in {root}")
     
     try:
-        with open(config_file, 'r') as f:
-            config = yaml.safe_load(f)
-            if not config:
-                raise ConfigError("chains.yaml is empty")
-            _chains_cache = config
-            return config
+        config = load_yaml(config_file, get_cache_dir())
+        if not config:
+            raise ConfigError("chains.yaml is empty")
     except yaml.YAMLError as e:
         raise ConfigError(f"Error parsing chains.yaml: {e}")
+    except ConfigError:
+        raise
     except Exception as e:
         raise ConfigError(f"Error reading chains.yaml: {e}")
+    
+    _prefix_index = _build_prefix_index(config)
+    _chains_cache = config
+    return config
 
 
 def load_global_config() -> Dict:
@@ -68,6 +124,15 @@ def load_global_config() -> Dict:
             'secrets_dir': './secrets',
             'backup_dir': './backups'
         },
+        'backup': {
+            'concurrency': 4,
+            'timeout': 300,
+            'retention': {
+                'keep_last': 10,
+                'keep_daily': 7,
+                'keep_weekly': 4
+            }
+        },
         'monitoring': {
             'prometheus_retention': '15d',
             'grafana_admin_password': 'admin',
@@ -84,6 +149,12 @@ def load_global_config() -> Dict:
             },
             'grafana': {
                 'query_timeout': '60s'
+            },
+            'stats_backend': 'docker',
+            'profile': {
+                'interval': 10,
+                'retention': '7d',
+                'dir': './.validay/profile'
             }
         },
         'alerting': {
@@ -130,6 +201,7 @@ def load_global_config() -> Dict:
             'base_image': 'debian:bookworm-slim',
             'network_name': 'validay-network',
             'restart_policy': 'unless-stopped',
+            'backend': 'compose',
             'healthcheck_defaults': {
                 'interval': '30s',
                 'timeout': '10s',
@@ -139,7 +211,35 @@ def load_global_config() -> Dict:
             'logging_defaults': {
                 'max_size': '100m',
                 'max_files': 3
+            },
+            'apply': {
+                'concurrency': 2,
+                'health_timeout': 600
+            },
+            'waves': {
+                'concurrency': 4,
+                'health_timeout': 1800
+            },
+            'port_allocation': {
+                'auto_assign': False,
+                'stride': 100
+            },
+            'limits_defaults': {},
+            'cpu_pinning': {
+                'enabled': False,
+                'reserve_cores': 0
             }
+        },
+        'placement': {
+            'output_dir': './placement',
+            'central': '',
+            'default_profile': {
+                'cpus': 2,
+                'memory': '8G',
+                'disk': '500G',
+                'iops': 1000
+            },
+            'hosts': {}
         }
     }
     
@@ -148,34 +248,56 @@ def load_global_config() -> Dict:
         return defaults
     
     try:
-        with open(config_file, 'r') as f:
-            user_config = yaml.safe_load(f) or {}
-            # Deep merge with defaults
-            config = defaults.copy()
-            for key, value in user_config.items():
-                if isinstance(value, dict) and key in config and isinstance(config[key], dict):
-                    # Recursively merge nested dictionaries
-                    def deep_merge(base, update):
-                        for k, v in update.items():
-                            if k in base and isinstance(base[k], dict) and isinstance(v, dict):
-                                deep_merge(base[k], v)
-                            else:
-                                base[k] = v
-                    deep_merge(config[key], value)
-                else:
-                    config[key] = value
-            _config_cache = config
-            return config
+        user_config = load_yaml(config_file, get_cache_dir()) or {}
+        # Deep merge with defaults
+        config = defaults.copy()
+        for key, value in user_config.items():
+            if isinstance(value, dict) and key in config and isinstance(config[key], dict):
+                # Recursively merge nested dictionaries
+                def deep_merge(base, update):
+                    for k, v in update.items():
+                        if k in base and isinstance(base[k], dict) and isinstance(v, dict):
+                            deep_merge(base[k], v)
+                        else:
+                            base[k] = v
+                deep_merge(config[key], value)
+            else:
+                config[key] = value
+        _config_cache = config
+        return config
     except yaml.YAMLError as e:
         raise ConfigError(f"Error parsing config.yml: {e}")
     except Exception as e:
         raise ConfigError(f"Error reading config.yml: {e}")
 
 
-def get_chain_config(chain_name: str) -> Dict:
-    """Get configuration for a specific chain"""
-    chains_config = load_chains_config()
-    chains = chains_config.get('chains', {})
+def get_chains(enabled_only: bool = False) -> Dict[str, ChainConfig]:
+    """Get the chain models, built once per configuration load"""
+    global _chain_models
+    
+    if _chain_models is None:
+        global_config = load_global_config()
+        models = build_chain_configs(load_chains_config(), global_config)
+        
+        # Move enabled chains off host ports another service already publishes
+        allocation = global_config.get('docker', {}).get('port_allocation', {})
+        if allocation.get('auto_assign', False):
+            enabled = [chain for chain in models.values() if chain.enabled]
+            try:
+                moved = assign_ports(enabled, global_config, int(allocation.get('stride', 100)))
+            except ValueError as e:
+                raise ConfigError(f"Port allocation failed: {e}")
+            for name, ports in moved.items():
+                models[name] = models[name].with_ports(ports)
+        _chain_models = models
+    if enabled_only:
+        return {name: chain for name, chain in _chain_models.items() if chain.enabled}
+    return _chain_models
+
+
+def get_chain(chain_name: str) -> ChainConfig:
+    """Get the model for a specific chain"""
+    chains = get_chains()
     
     if chain_name not in chains:
         available = ', '.join(sorted(chains.keys()))
@@ -187,23 +309,6 @@ def get_chain_config(chain_name: str) -> Dict:
     return chains[chain_name]
 
 
-def get_enabled_chains() -> Dict[str, Dict]:
-    """Get all enabled chains"""
-    chains_config = load_chains_config()
-    chains = chains_config.get('chains', {})
-    return {name: config for name, config in chains.items() 
-            if config.get('enabled', False)}
-
-
-def validate_config() -> bool:
-    """Validate chains.yaml syntax"""
-    try:
-        load_chains_config()
-        return True
-    except ConfigError:
-        return False
-
-
 def get_secrets_dir() -> Path:
     """Get the secrets directory path from config"""
     root = get_project_root()
@@ -226,9 +331,28 @@ def get_backup_dir() -> Path:
     return Path(backup_path).resolve()
 
 
+def get_stats_backend() -> str:
+    """Get where container resource counters are read from: docker or cgroup"""
+    backend = load_global_config().get('monitoring', {}).get('stats_backend', 'docker')
+    if backend not in ('docker', 'cgroup'):
+        raise ConfigError(f"monitoring.stats_backend must be 'docker' or 'cgroup', not '{backend}'")
+    return backend
+
+
+def get_orchestration_backend() -> str:
+    """Get what creates, starts and stops containers: compose or engine"""
+    backend = load_global_config().get('docker', {}).get('backend', 'compose')
+    if backend not in ('compose', 'engine'):
+        raise ConfigError(f"docker.backend must be 'compose' or 'engine', not '{backend}'")
+    return backend
+
+
 def clear_cache():
-    """Clear configuration cache (useful for testing or after config changes)"""
-    global _config_cache, _chains_cache
+    """Clear configuration cache and the resolved project root (useful for testing or after config changes)"""
+    global _project_root, _config_cache, _chains_cache, _prefix_index, _chain_models
+    _project_root = None
     _config_cache = None
     _chains_cache = None
+    _prefix_index = None
+    _chain_models = None
 
@@ -0,0 +1,242 @@
+"""Typed chain configuration model"""
+
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from .utils.errors import ConfigError
+
+
+# Port roles in the order they are published by the chain container
+PORT_ROLES = ('p2p', 'rpc', 'rest_api', 'grpc', 'prometheus')
+
+# Resource limit settings, from `docker.limits` in chains.yaml over
+# `docker.limits_defaults` in config.yml; unset ones are not emitted
+LIMIT_KEYS = (
+    'cpus', 'memory', 'memory_reservation', 'cpuset', 'pids', 'nofile', 'blkio_weight',
+    'device_read_iops', 'device_write_iops', 'device_read_bps', 'device_write_bps'
+)
+
+DEFAULT_PORTS = {
+    'p2p': 26656,
+    'rpc': 26657,
+    'rest_api': 1317,
+    'grpc': 9090,
+    'prometheus': 26660
+}
+
+
+def _merge(overrides: Optional[Dict], defaults: Optional[Dict], fallbacks: Dict) -> Dict:
+    """Merge chain overrides over config.yml defaults over built-in fallbacks"""
+    overrides = overrides or {}
+    defaults = defaults or {}
+    return {key: overrides.get(key, defaults.get(key, fallback)) for key, fallback in fallbacks.items()}
+
+
+def _int_field(name: str, raw: Dict, key: str, default: int, problems: List[str]) -> int:
+    """Read an integer chains.yaml field, recording a problem and using default if invalid"""
+    value = raw.get(key, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        problems.append(f"chains.{name}.{key} must be an integer, not {value!r}")
+        return default
+
+
+def _peer_list(name: str, raw: Dict, problems: List[str]) -> Tuple[str, ...]:
+    """Split persistent_peers, recording a problem if it is not a comma-separated string"""
+    peers = raw.get('persistent_peers') or ''
+    if not isinstance(peers, str):
+        problems.append(f"chains.{name}.persistent_peers must be a comma-separated string, not {peers!r}")
+        return ()
+    return tuple(filter(None, map(str.strip, peers.split(','))))
+
+
+@dataclass
+class ChainConfig:
+    """
+    A chain from chains.yaml with config.yml defaults merged in
+    
+    Built once per configuration load; derived values such as the container
+    name, published ports and peer list are computed here so callers never
+    walk the raw dictionaries. Fields not modelled here are available via get().
+    
+    Invalid fields raise ConfigError for an enabled chain; a disabled chain
+    is built with defaults in their place and the problems kept in
+    `problems`, so it cannot break commands about the other chains.
+    """
+    __slots__ = (
+        'name', 'raw', 'enabled', 'chain_id', 'display_name', 'network', 'bech32_prefix',
+        'binary_name', 'binary_version', 'binary_url', 'daemon_home', 'repo',
+        'container_name', 'volume_name', 'secret_name',
+        'ports', 'port_list', 'rpc_port', 'p2p_port', 'prometheus_port',
+        'persistent_peers', 'state_sync_rpc',
+        'denom', 'denom_display', 'decimals', 'min_self_delegation',
+        'block_time_seconds', 'block_explorer_url',
+        'validator', 'state_sync', 'consensus', 'telemetry', 'healthcheck', 'logging',
+        'limits', 'scrape_interval', 'priority', 'problems'
+    )
+    
+    name: str
+    raw: Dict
+    enabled: bool
+    chain_id: str
+    display_name: str
+    network: str
+    bech32_prefix: Optional[str]
+    binary_name: str
+    binary_version: str
+    binary_url: str
+    daemon_home: str
+    repo: str
+    container_name: str
+    volume_name: str
+    secret_name: str
+    ports: Dict[str, int]
+    port_list: Tuple[int, ...]
+    rpc_port: int
+    p2p_port: int
+    prometheus_port: int
+    persistent_peers: Tuple[str, ...]
+    state_sync_rpc: Tuple[str, ...]
+    denom: str
+    denom_display: str
+    decimals: int
+    min_self_delegation: int
+    block_time_seconds: int
+    block_explorer_url: str
+    validator: Dict
+    state_sync: Dict
+    consensus: Dict
+    telemetry: Dict
+    healthcheck: Dict
+    logging: Dict
+    limits: Dict
+    scrape_interval: str
+    priority: int
+    problems: Tuple[str, ...]
+    
+    def get(self, key: str, default=None):
+        """Get a raw chains.yaml field"""
+        return self.raw.get(key, default)
+    
+    def with_limits(self, **limits) -> 'ChainConfig':
+        """Get a copy of this chain with some resource limits replaced"""
+        return replace(self, limits=dict(self.limits, **limits))
+    
+    def with_ports(self, ports: Dict[str, int]) -> 'ChainConfig':
+        """Get a copy of this chain publishing different host ports"""
+        return replace(
+            self,
+            ports=dict(ports),
+            port_list=tuple(ports[role] for role in PORT_ROLES),
+            rpc_port=ports['rpc'],
+            p2p_port=ports['p2p'],
+            prometheus_port=ports['prometheus']
+        )
+    
+    @classmethod
+    def from_dict(cls, name: str, raw: Dict, global_config: Optional[Dict] = None) -> 'ChainConfig':
+        """
+        Build the model for one chain from its chains.yaml entry and config.yml
+        
+        Raises ConfigError naming the chain and field if an enabled chain has
+        an invalid value.
+        """
+        global_config = global_config or {}
+        enabled = bool(raw.get('enabled', False))
+        problems: List[str] = []
+        docker_config = global_config.get('docker', {})
+        prometheus_config = global_config.get('monitoring', {}).get('prometheus', {})
+        
+        ports = dict(DEFAULT_PORTS)
+        ports.update(raw.get('ports') or {})
+        
+        validator = _merge(raw.get('validator'), global_config.get('validator_defaults'), {
+            'moniker': '',
+            'external_ip': '',
+            'name': '',
+            'website': '',
+            'identity': '',
+            'details': '',
+            'security_contact': '',
+            'commission_rate': 0.10,
+            'commission_max_rate': 0.20,
+            'commission_max_change_rate': 0.01,
+            'gas_adjustment': 1.5
+        })
+        # If moniker is empty, use default pattern
+        if not validator['moniker']:
+            validator['moniker'] = f'{name}-validator'
+        
+        persistent_peers = _peer_list(name, raw, problems)
+        decimals = _int_field(name, raw, 'decimals', 6, problems)
+        min_self_delegation = _int_field(name, raw, 'min_self_delegation', 1000000, problems)
+        priority = _int_field(name, raw, 'priority', 0, problems)
+        if problems and enabled:
+            raise ConfigError('; '.join(problems))
+        
+        return cls(
+            name=name,
+            raw=raw,
+            enabled=enabled,
+            chain_id=raw.get('chain_id', ''),
+            display_name=raw.get('chain_name', name.title()),
+            network=raw.get('network', name),
+            bech32_prefix=raw.get('bech32_prefix'),
+            binary_name=raw.get('binary_name', name),
+            binary_version=raw.get('binary_version', ''),
+            binary_url=raw.get('binary_url', ''),
+            daemon_home=raw.get('daemon_home', f"/root/.{name}"),
+            repo=raw.get('repo', ''),
+            container_name=f"{name}-validator",
+            volume_name=f"{name}-data",
+            secret_name=f"{name}_private_key",
+            ports=ports,
+            port_list=tuple(ports[role] for role in PORT_ROLES),
+            rpc_port=ports['rpc'],
+            p2p_port=ports['p2p'],
+            prometheus_port=ports['prometheus'],
+            persistent_peers=persistent_peers,
+            state_sync_rpc=tuple(raw.get('state_sync_rpc') or ()),
+            denom=raw.get('denom', ''),
+            denom_display=raw.get('denom_display', ''),
+            decimals=decimals,
+            min_self_delegation=min_self_delegation,
+            block_time_seconds=raw.get('block_time_seconds', 6),
+            block_explorer_url=raw.get('block_explorer_url', ''),
+            validator=validator,
+            state_sync=_merge(raw.get('state_sync'), global_config.get('state_sync_defaults'), {
+                'trust_height_offset': 2000,
+                'trust_period': '168h0m0s'
+            }),
+            consensus=_merge(raw.get('consensus'), global_config.get('consensus_defaults'), {
+                'timeout_commit': '5s'
+            }),
+            telemetry=_merge(raw.get('telemetry'), global_config.get('telemetry_defaults'), {
+                'prometheus_retention_time': 60
+            }),
+            healthcheck=_merge(raw.get('healthcheck'), docker_config.get('healthcheck_defaults'), {
+                'interval': '30s',
+                'timeout': '10s',
+                'retries': 3,
+                'start_period': '120s'
+            }),
+            logging=_merge((raw.get('docker') or {}).get('logging'), docker_config.get('logging_defaults'), {
+                'max_size': '100m',
+                'max_files': 3
+            }),
+            limits=_merge((raw.get('docker') or {}).get('limits'), docker_config.get('limits_defaults'),
+                          dict.fromkeys(LIMIT_KEYS)),
+            scrape_interval=(raw.get('monitoring') or {}).get(
+                'scrape_interval', prometheus_config.get('chain_scrape_interval', '10s')),
+            priority=priority,
+            problems=tuple(problems)
+        )
+
+
+def build_chain_configs(chains_config: Dict, global_config: Optional[Dict] = None) -> Dict[str, ChainConfig]:
+    """Build the model for every chain in a parsed chains.yaml"""
+    return {
+        name: ChainConfig.from_dict(name, raw or {}, global_config)
+        for name, raw in (chains_config.get('chains') or {}).items()
+    }
@@ -70,6 +70,15 @@ def info(message: str):
     print(_colorize(f"[INFO] {message}", Colors.BLUE))
 
 
+def format_bytes(num_bytes: float) -> str:
+    """Format a byte count as a human-readable string"""
+    for unit in ['B', 'KiB', 'MiB', 'GiB']:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.0f}{unit}" if unit == 'B' else f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}TiB"
+
+
 def print_table(headers: List[str], rows: List[List[str]], max_width: int = 80):
     """Print a formatted table"""
     if not rows:
@@ -0,0 +1,429 @@
+"""
+Content-addressed backup repository
+
+File contents are stored once as gzip-compressed blobs keyed by their sha256,
+and every backup run is recorded as a small JSON manifest that references them:
+    
+    <backup_dir>/blobs/<sha[:2]>/<sha>.gz
+    <backup_dir>/manifests/<chain>/<backup_id>.json
+
+A JSON-lines catalog (<backup_dir>/catalog.jsonl) with one summary line per
+manifest is kept alongside, so listing backups never walks the tree.
+
+Archives written by earlier versions (<backup_dir>/<chain>/*.tar.gz) are
+brought into the repository with import_legacy, which then moves each one
+to <backup_dir>/<chain>/imported/.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Set, Tuple
+
+from .errors import BackupStoreError
+
+
+CHUNK_SIZE = 1024 * 1024
+
+CATALOG_FIELDS = ('chain', 'id', 'created_at', 'file_count', 'total_bytes', 'new_bytes')
+
+# Top-level entries of the backup directory that are not legacy chain directories
+RESERVED_NAMES = ('blobs', 'manifests', 'catalog.jsonl')
+LEGACY_PATTERN = 'validator_backup_*.tar.gz'
+LEGACY_IMPORTED_DIR = 'imported'
+
+_catalog_lock = threading.Lock()
+
+
+class BackupStore:
+    """Deduplicated, manifest-based backup repository"""
+    
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.blobs_dir = self.root / 'blobs'
+        self.manifests_dir = self.root / 'manifests'
+        self.catalog_path = self.root / 'catalog.jsonl'
+    
+    # Blobs
+    
+    def blob_path(self, sha256: str) -> Path:
+        """Get the on-disk path of a blob"""
+        return self.blobs_dir / sha256[:2] / f"{sha256}.gz"
+    
+    def has_blob(self, sha256: str) -> bool:
+        """Check whether a blob is already stored"""
+        return self.blob_path(sha256).exists()
+    
+    def put_stream(self, stream: BinaryIO) -> Dict:
+        """
+        Store the contents of a stream, compressing and hashing in one pass
+        
+        Returns:
+            dict: sha256, size and whether the blob was newly written
+        """
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.blobs_dir, prefix='.incoming-')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as gz:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    size += len(chunk)
+                    gz.write(chunk)
+            
+            sha256 = digest.hexdigest()
+            target = self.blob_path(sha256)
+            if target.exists():
+                os.unlink(tmp_name)
+                return {'sha256': sha256, 'size': size, 'new': False}
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_name, target)
+            return {'sha256': sha256, 'size': size, 'new': True}
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+    
+    def open_blob(self, sha256: str) -> BinaryIO:
+        """Open a stored blob for reading (decompressed)"""
+        path = self.blob_path(sha256)
+        if not path.exists():
+            raise BackupStoreError(f"Blob {sha256} is missing from the backup store")
+        return gzip.open(path, 'rb')
+    
+    # Manifests
+    
+    def _new_backup_id(self, chain_name: str, created_at: datetime) -> str:
+        """Generate a sortable, unique backup id"""
+        base = created_at.strftime('%Y%m%dT%H%M%SZ')
+        backup_id = base
+        suffix = 1
+        while (self.manifests_dir / chain_name / f"{backup_id}.json").exists():
+            backup_id = f"{base}-{suffix}"
+            suffix += 1
+        return backup_id
+    
+    def ingest_tar(self, chain_name: str, fileobj: BinaryIO, source: str = '',
+                   created_at: Optional[datetime] = None, strip_prefix: str = '') -> Dict:
+        """
+        Store every regular file of a tar archive and write a manifest for it
+        
+        The archive is read sequentially, so non-seekable streams work too.
+        strip_prefix is removed from the start of member paths that have it.
+        
+        Returns:
+            dict: The written manifest
+        """
+        strip_prefix = strip_prefix.strip('/')
+        files = []
+        with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                path = member.name.lstrip('/')
+                if strip_prefix and path.startswith(strip_prefix + '/'):
+                    path = path[len(strip_prefix) + 1:]
+                extracted = archive.extractfile(member)
+                stored = self.put_stream(extracted)
+                files.append({
+                    'path': path,
+                    'sha256': stored['sha256'],
+                    'size': stored['size'],
+                    'mode': member.mode,
+                    'new': stored['new']
+                })
+        
+        if not files:
+            raise BackupStoreError(f"Backup archive for {chain_name} contained no files")
+        return self.write_manifest(chain_name, files, source, created_at)
+    
+    def write_manifest(self, chain_name: str, files: List[Dict], source: str = '',
+                       created_at: Optional[datetime] = None) -> Dict:
+        """Record a backup run referencing already-stored blobs"""
+        created_at = created_at or datetime.now(timezone.utc)
+        manifest = {
+            'id': self._new_backup_id(chain_name, created_at),
+            'chain': chain_name,
+            'created_at': created_at.isoformat(),
+            'source': source,
+            'files': [{k: f[k] for k in ('path', 'sha256', 'size', 'mode')} for f in files],
+            'total_bytes': sum(f['size'] for f in files),
+            'new_bytes': sum(f['size'] for f in files if f.get('new'))
+        }
+        
+        chain_dir = self.manifests_dir / chain_name
+        chain_dir.mkdir(parents=True, exist_ok=True)
+        target = chain_dir / f"{manifest['id']}.json"
+        tmp = target.with_suffix('.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, target)
+        
+        self._append_catalog(manifest)
+        return manifest
+    
+    def chains(self) -> List[str]:
+        """List chains that have at least one backup"""
+        if not self.manifests_dir.exists():
+            return []
+        return sorted(p.name for p in self.manifests_dir.iterdir() if p.is_dir())
+    
+    def list_manifests(self, chain_name: Optional[str] = None) -> List[Dict]:
+        """Load manifests, oldest first"""
+        chains = [chain_name] if chain_name else self.chains()
+        manifests = []
+        for chain in chains:
+            chain_dir = self.manifests_dir / chain
+            if not chain_dir.exists():
+                continue
+            for path in sorted(chain_dir.glob('*.json')):
+                with open(path, 'r') as f:
+                    manifests.append(json.load(f))
+        manifests.sort(key=lambda m: (m['chain'], m['created_at']))
+        return manifests
+    
+    def get_manifest(self, chain_name: str, backup_id: Optional[str] = None) -> Dict:
+        """Load a manifest by id, or the latest one for the chain"""
+        if backup_id and backup_id != 'latest':
+            path = self.manifests_dir / chain_name / f"{backup_id}.json"
+            if not path.exists():
+                raise BackupStoreError(f"Backup '{backup_id}' not found for {chain_name}")
+            with open(path, 'r') as f:
+                return json.load(f)
+        
+        manifests = self.list_manifests(chain_name)
+        if not manifests:
+            raise BackupStoreError(f"No backups found for {chain_name}")
+        return manifests[-1]
+    
+    def delete_manifests(self, manifests: List[Dict]):
+        """Remove manifests and their catalog entries (blobs are reclaimed by gc)"""
+        removed = set()
+        for manifest in manifests:
+            path = self.manifests_dir / manifest['chain'] / f"{manifest['id']}.json"
+            if path.exists():
+                path.unlink()
+            removed.add((manifest['chain'], manifest['id']))
+        
+        if removed:
+            with _catalog_lock:
+                entries = [e for e in self._read_catalog() if (e['chain'], e['id']) not in removed]
+                self._write_catalog(entries)
+    
+    def delete_manifest(self, manifest: Dict):
+        """Remove a single manifest"""
+        self.delete_manifests([manifest])
+    
+    # Legacy archives
+    
+    def legacy_archives(self, chain_name: Optional[str] = None) -> List[Tuple[str, Path]]:
+        """Find archives from before the repository not imported yet, oldest first"""
+        if not self.root.exists():
+            return []
+        if chain_name:
+            chain_dirs = [self.root / chain_name]
+        else:
+            chain_dirs = [p for p in self.root.iterdir() if p.is_dir() and p.name not in RESERVED_NAMES]
+        return [(chain_dir.name, path)
+                for chain_dir in sorted(chain_dirs) if chain_dir.is_dir()
+                for path in sorted(chain_dir.glob(LEGACY_PATTERN))]
+    
+    @staticmethod
+    def _legacy_created_at(path: Path) -> datetime:
+        """Get when a legacy archive was made: its name's timestamp, else its mtime"""
+        stamp = path.name[len('validator_backup_'):-len('.tar.gz')]
+        try:
+            # backup-keys.sh named archives after the container's clock, which is UTC
+            return datetime.strptime(stamp, '%Y%m%d_%H%M%S').replace(tzinfo=timezone.utc)
+        except ValueError:
+            return datetime.fromtimestamp(path.stat().st_mtime, timezone.utc)
+    
+    def import_legacy(self, path: Path, chain_name: str, strip_prefix: str = '') -> Dict:
+        """
+        Ingest one legacy archive as a backup dated when the archive was made
+        
+        strip_prefix is the chain's daemon home: legacy archives hold absolute
+        paths, while backups store paths relative to it. The archive is then
+        moved to the chain's imported/ directory so it is not imported twice.
+        """
+        with open(path, 'rb') as f:
+            try:
+                manifest = self.ingest_tar(chain_name, f, source=f"legacy:{path.relative_to(self.root)}",
+                                           created_at=self._legacy_created_at(path), strip_prefix=strip_prefix)
+            except tarfile.TarError as e:
+                raise BackupStoreError(f"Invalid legacy archive {path}: {e}")
+        imported_dir = path.parent / LEGACY_IMPORTED_DIR
+        imported_dir.mkdir(exist_ok=True)
+        path.rename(imported_dir / path.name)
+        return manifest
+    
+    # Catalog
+    
+    @staticmethod
+    def _catalog_entry(manifest: Dict) -> Dict:
+        """Summarize a manifest into a catalog line"""
+        return {
+            'chain': manifest['chain'],
+            'id': manifest['id'],
+            'created_at': manifest['created_at'],
+            'file_count': len(manifest['files']),
+            'total_bytes': manifest['total_bytes'],
+            'new_bytes': manifest.get('new_bytes', 0)
+        }
+    
+    def _append_catalog(self, manifest: Dict):
+        """Record a new manifest in the catalog"""
+        line = json.dumps(self._catalog_entry(manifest), separators=(',', ':')) + '\n'
+        with _catalog_lock:
+            # A missing catalog is rebuilt on first read, so only append to an existing one
+            if not self.catalog_path.exists() and self.manifests_dir.exists():
+                self._write_catalog(self._scan_manifests())
+                return
+            with open(self.catalog_path, 'a') as f:
+                f.write(line)
+    
+    def _read_catalog(self) -> List[Dict]:
+        """
+        Read all catalog lines, skipping any that are corrupt or repeated
+        
+        A backup can be listed twice: when the catalog is rebuilt from the
+        manifests on disk, concurrent backups that already wrote their
+        manifest still append their own line afterwards.
+        """
+        entries = {}
+        with open(self.catalog_path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if all(field in entry for field in CATALOG_FIELDS):
+                    entries.setdefault((entry['chain'], entry['id']), entry)
+        return list(entries.values())
+    
+    def _write_catalog(self, entries: List[Dict]):
+        """Atomically replace the catalog"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.catalog_path.with_suffix('.jsonl.tmp')
+        with open(tmp, 'w') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        os.replace(tmp, self.catalog_path)
+    
+    def _scan_manifests(self) -> List[Dict]:
+        """Build catalog entries by reading every manifest on disk"""
+        return [self._catalog_entry(m) for m in self.list_manifests()]
+    
+    def reindex(self) -> int:
+        """Rebuild the catalog from the manifests on disk"""
+        with _catalog_lock:
+            entries = self._scan_manifests()
+            self._write_catalog(entries)
+        return len(entries)
+    
+    def query(self, chain_name: Optional[str] = None, since: Optional[datetime] = None,
+              until: Optional[datetime] = None, min_size: Optional[int] = None,
+              max_size: Optional[int] = None) -> List[Dict]:
+        """Answer a backup listing from the catalog, oldest first"""
+        if not self.catalog_path.exists():
+            if not self.manifests_dir.exists():
+                return []
+            self.reindex()
+        
+        with _catalog_lock:
+            entries = self._read_catalog()
+        
+        results = []
+        for entry in entries:
+            if chain_name and entry['chain'] != chain_name:
+                continue
+            if since or until:
+                created_at = datetime.fromisoformat(entry['created_at'])
+                if since and created_at < since:
+                    continue
+                if until and created_at > until:
+                    continue
+            if min_size is not None and entry['total_bytes'] < min_size:
+                continue
+            if max_size is not None and entry['total_bytes'] > max_size:
+                continue
+            results.append(entry)
+        results.sort(key=lambda e: (e['chain'], e['created_at']))
+        return results
+    
+    def restore(self, manifest: Dict, dest: Path) -> List[Path]:
+        """Materialize the files of a backup under dest"""
+        dest = Path(dest).resolve()
+        restored = []
+        for entry in manifest['files']:
+            target = (dest / entry['path']).resolve()
+            if dest not in target.parents:
+                raise BackupStoreError(f"Refusing to restore outside {dest}: {entry['path']}")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with self.open_blob(entry['sha256']) as src, open(target, 'wb') as out:
+                shutil.copyfileobj(src, out, CHUNK_SIZE)
+            target.chmod(entry.get('mode', 0o600) & 0o777)
+            restored.append(target)
+        return restored
+    
+    # Retention and garbage collection
+    
+    def select_expired(self, manifests: List[Dict], keep_last: int = 0,
+                       keep_daily: int = 0, keep_weekly: int = 0) -> List[Dict]:
+        """
+        Pick the manifests of one chain that fall outside the retention policy
+        
+        A backup is kept if it is one of the newest keep_last backups, or the
+        newest backup of one of the keep_daily most recent days, or the newest
+        backup of one of the keep_weekly most recent ISO weeks.
+        """
+        newest_first = sorted(manifests, key=lambda m: m['created_at'], reverse=True)
+        keep: Set[str] = {m['id'] for m in newest_first[:keep_last]}
+        
+        def _keep_buckets(bucket_of, count):
+            seen = []
+            for manifest in newest_first:
+                bucket = bucket_of(datetime.fromisoformat(manifest['created_at']))
+                if bucket not in seen:
+                    if len(seen) >= count:
+                        break
+                    seen.append(bucket)
+                    keep.add(manifest['id'])
+        
+        _keep_buckets(lambda ts: ts.date(), keep_daily)
+        _keep_buckets(lambda ts: ts.isocalendar()[:2], keep_weekly)
+        return [m for m in newest_first if m['id'] not in keep]
+    
+    def referenced_blobs(self) -> Set[str]:
+        """Collect the sha256 of every blob referenced by a manifest"""
+        return {entry['sha256'] for manifest in self.list_manifests() for entry in manifest['files']}
+    
+    def iter_blobs(self) -> Iterable[Path]:
+        """Iterate over all stored blob files"""
+        if not self.blobs_dir.exists():
+            return []
+        return self.blobs_dir.glob('*/*.gz')
+    
+    def gc(self) -> Dict:
+        """Delete blobs that no manifest references"""
+        referenced = self.referenced_blobs()
+        removed = 0
+        freed = 0
+        for path in list(self.iter_blobs()):
+            sha256 = path.name[:-len('.gz')]
+            if sha256 not in referenced:
+                freed += path.stat().st_size
+                path.unlink()
+                removed += 1
+        return {'removed': removed, 'freed_bytes': freed}
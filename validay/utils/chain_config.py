@@ -1,7 +1,7 @@
 """Chain configuration helpers"""
 
-from typing import Dict
-from ..config import get_chain_config
+from ..config import get_chain, get_prefix_index
+from .errors import ConfigError
 
 
 def get_container_name(chain_name: str) -> str:
@@ -11,19 +11,23 @@ def get_container_name(chain_name: str) -> str:
 
 def get_daemon_home(chain_name: str) -> str:
     """Get daemon home directory for a chain"""
-    config = get_chain_config(chain_name)
-    return config.get('daemon_home', f"/root/.{chain_name}")
+    return get_chain(chain_name).daemon_home
 
 
 def get_binary_name(chain_name: str) -> str:
     """Get binary name for a chain"""
-    config = get_chain_config(chain_name)
-    return config.get('binary_name', chain_name)
+    return get_chain(chain_name).binary_name
 
 
 def get_rpc_port(chain_name: str) -> int:
     """Get RPC port for a chain"""
-    config = get_chain_config(chain_name)
-    ports = config.get('ports', {})
-    return ports.get('rpc', 26657)
+    return get_chain(chain_name).rpc_port
 
+
+def get_address_prefix(chain_name: str) -> str:
+    """Get the bech32 account address prefix for a chain from chains.yaml"""
+    get_chain(chain_name)
+    prefix = get_prefix_index().get(chain_name)
+    if prefix is None:
+        raise ConfigError(f"Chain '{chain_name}' has no bech32_prefix in chains.yaml")
+    return prefix
@@ -0,0 +1,274 @@
+"""Hot-reloading configuration provider for long-running processes
+
+The CLI loads chains.yaml and config.yml once per process. Long-running
+components (the CLI daemon, watch loops) instead hold a ConfigProvider,
+which watches both files and re-parses them only when they change. Readers
+get immutable snapshots; subscribers are told when chains are enabled or
+disabled.
+
+Changes are detected with inotify (through ctypes, Linux only) on the
+project directory, so editors that replace the file by rename are seen as
+well. Elsewhere, or when inotify is unavailable, the files are polled by
+mtime and size.
+
+A change clears and reloads the CLI's per-process caches in
+validay.config. A process that reads them from other threads passes the
+lock those readers hold, so a reload never lands in the middle of a
+command.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple
+
+from .. import config as config_module
+from .errors import ConfigError
+
+WATCHED_FILES = ('chains.yaml', 'config.yml')
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Editors write a file in several steps; wait this long for them to settle
+DEBOUNCE_SECONDS = 0.1
+
+
+class ConfigSnapshot(NamedTuple):
+    """An immutable view of chains.yaml and config.yml at one point in time"""
+    version: int
+    chains: Mapping
+    config: Mapping
+    enabled: FrozenSet[str]
+
+
+class ChainEvent(NamedTuple):
+    """A chain changed state between two snapshots"""
+    kind: str  # 'enabled' or 'disabled'
+    chain: str
+    snapshot: ConfigSnapshot
+
+
+def _freeze(value):
+    """Recursively convert dicts and lists to read-only equivalents"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Identify a file version by inode, size and mtime"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class _PollingWatcher:
+    """Wake up every interval; the provider compares file signatures"""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+    
+    def wait(self, timeout: float) -> bool:
+        time.sleep(min(timeout, self.interval))
+        return True
+    
+    def close(self):
+        pass
+
+
+class _InotifyWatcher:
+    """Block until inotify reports a change to one of the watched files"""
+    
+    def __init__(self, directory: Path, names):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.names = {name.encode() for name in names}
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(self.fd, str(directory).encode(), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {directory}")
+    
+    def _drain(self) -> bool:
+        """Read all pending events, returning whether any concern a watched file"""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    return relevant
+                raise
+            offset = 0
+            while offset < len(data):
+                _, _, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b'\0')
+                offset += name_len
+                if name in self.names:
+                    relevant = True
+    
+    def wait(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable or not self._drain():
+            return False
+        time.sleep(DEBOUNCE_SECONDS)
+        self._drain()
+        return True
+    
+    def close(self):
+        os.close(self.fd)
+
+
+class ConfigProvider:
+    """Publish configuration snapshots and chain enable/disable events"""
+    
+    def __init__(self, poll_interval: float = 2.0, use_inotify: bool = True,
+                 cache_lock: Optional[threading.RLock] = None):
+        self.root = config_module.get_project_root()
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        # Held by readers of validay.config's caches; reentrant so they can refresh()
+        self.cache_lock = cache_lock or threading.RLock()
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[ChainEvent], None]] = []
+        self._signatures: Dict[str, Optional[Tuple[int, int, int]]] = {}
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_error: Optional[Exception] = None
+        self.refresh()
+        if self._snapshot is None:
+            raise self.last_error
+    
+    def snapshot(self) -> ConfigSnapshot:
+        """Get the current configuration snapshot"""
+        return self._snapshot
+    
+    def subscribe(self, callback: Callable[[ChainEvent], None]) -> Callable[[], None]:
+        """Call `callback` for every chain enabled or disabled; returns an unsubscribe function"""
+        with self._lock:
+            self._subscribers.append(callback)
+        
+        def _unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return _unsubscribe
+    
+    def refresh(self) -> bool:
+        """Reload the configuration if a watched file changed; returns whether it did"""
+        with self.cache_lock, self._lock:
+            signatures = {name: _file_signature(self.root / name) for name in WATCHED_FILES}
+            if self._snapshot is not None and signatures == self._signatures:
+                return False
+            
+            # Drop the CLI's per-process caches so they see the new files too
+            config_module.clear_cache()
+            try:
+                chains_config = config_module.load_chains_config()
+                global_config = config_module.load_global_config()
+            except ConfigError as e:
+                # Keep serving the last good snapshot until the files are fixed
+                self.last_error = e
+                self._signatures = signatures
+                return False
+            self.last_error = None
+            self._signatures = signatures
+            
+            chains = chains_config.get('chains') or {}
+            previous = self._snapshot
+            snapshot = ConfigSnapshot(
+                version=previous.version + 1 if previous else 1,
+                chains=_freeze(chains),
+                config=_freeze(global_config),
+                enabled=frozenset(name for name, cfg in chains.items() if (cfg or {}).get('enabled', False))
+            )
+            self._snapshot = snapshot
+            subscribers = list(self._subscribers)
+        
+        if previous is not None:
+            events = [ChainEvent('enabled', name, snapshot) for name in sorted(snapshot.enabled - previous.enabled)]
+            events += [ChainEvent('disabled', name, snapshot) for name in sorted(previous.enabled - snapshot.enabled)]
+            for event in events:
+                for callback in subscribers:
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        print(f"Config subscriber failed on {event.kind} {event.chain}: {e}", file=sys.stderr)
+        return True
+    
+    def _make_watcher(self):
+        if self.use_inotify and sys.platform.startswith('linux'):
+            try:
+                return _InotifyWatcher(self.root, WATCHED_FILES)
+            except (OSError, AttributeError):
+                pass
+        return _PollingWatcher(self.poll_interval)
+    
+    def _run(self):
+        watcher = self._make_watcher()
+        try:
+            while not self._stop.is_set():
+                # Re-check on every wake-up: inotify can miss changes made
+                # while the previous reload was running
+                watcher.wait(self.poll_interval)
+                if not self._stop.is_set():
+                    self.refresh()
+        finally:
+            watcher.close()
+    
+    def start(self) -> 'ConfigProvider':
+        """Watch the files from a background thread"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop the background watcher"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+
+_provider: Optional[ConfigProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_config_provider(cache_lock: Optional[threading.RLock] = None) -> ConfigProvider:
+    """
+    Get the process-wide provider, starting its watcher on first use
+    
+    cache_lock is only used when the provider is created: the lock the
+    process's readers of validay.config hold while they use it.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = ConfigProvider(cache_lock=cache_lock).start()
+        return _provider
@@ -0,0 +1,130 @@
+"""
+CPU topology discovery and automatic cpuset assignment
+
+With docker.cpu_pinning.enabled set, every enabled chain without an
+explicit cpuset is given whole physical cores (with their hyperthread
+siblings), all on one NUMA node when they fit, spreading chains across
+nodes. A chain catching up then competes only for its own cores instead of
+every chain's.
+"""
+
+import math
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from ..models import ChainConfig
+
+CPUINFO = Path('/proc/cpuinfo')
+NODE_DIR = Path('/sys/devices/system/node')
+
+
+class Core(NamedTuple):
+    """A physical core and the logical CPUs (hyperthreads) on it"""
+    node: int
+    package: int
+    core_id: int
+    cpus: Tuple[int, ...]
+
+
+def parse_cpu_list(text: str) -> List[int]:
+    """Parse a kernel CPU list such as 0-3,8-11"""
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-')
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def format_cpu_list(cpus: Sequence[int]) -> str:
+    """Format CPUs as a kernel CPU list, collapsing consecutive runs"""
+    ranges = []
+    for cpu in sorted(set(cpus)):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(f"{start}-{end}" if start != end else f"{start}" for start, end in ranges)
+
+
+def read_cpu_topology(cpuinfo: Path = CPUINFO, node_dir: Path = NODE_DIR) -> List[Core]:
+    """
+    Read the physical cores from /proc/cpuinfo and NUMA nodes from sysfs
+    
+    Logical CPUs without "physical id"/"core id" (some ARM and virtual
+    machines) are treated as separate cores on package 0; without NUMA
+    information every CPU is on node 0.
+    """
+    numa = {}
+    for node_path in sorted(node_dir.glob('node[0-9]*')):
+        try:
+            for cpu in parse_cpu_list((node_path / 'cpulist').read_text()):
+                numa[cpu] = int(node_path.name[4:])
+        except (OSError, ValueError):
+            continue
+    
+    siblings: Dict[Tuple[int, int], List[int]] = {}
+    for block in cpuinfo.read_text().split('\n\n'):
+        fields = {}
+        for line in block.splitlines():
+            key, _, value = line.partition(':')
+            fields[key.strip()] = value.strip()
+        if 'processor' not in fields:
+            continue
+        cpu = int(fields['processor'])
+        package = int(fields.get('physical id', 0))
+        core_id = int(fields['core id']) if 'core id' in fields else cpu
+        siblings.setdefault((package, core_id), []).append(cpu)
+    
+    cores = [Core(numa.get(cpus[0], 0), package, core_id, tuple(sorted(cpus)))
+             for (package, core_id), cpus in siblings.items()]
+    return sorted(cores, key=lambda core: (core.node, core.cpus[0]))
+
+
+def assign_cpusets(chains: Sequence[ChainConfig], cores: List[Core], reserve_cores: int = 0) -> Dict[str, str]:
+    """
+    Give each chain whole cores, preferring a single NUMA node per chain
+    
+    Chains with an explicit cpuset keep it, and its cores are not handed
+    out. The others get ceil(cpus limit) cores, or an even share of the
+    cores when they have no CPU limit. Chains are visited in order; each goes to the
+    NUMA node with the most free cores. When the host has fewer cores than
+    requested, assignment starts again from the first core, so later chains
+    share cores with earlier ones rather than going unpinned.
+    
+    Returns:
+        dict: chain name -> cpuset string
+    """
+    explicit = {cpu for chain in chains if chain.limits.get('cpuset') is not None
+                for cpu in parse_cpu_list(str(chain.limits['cpuset']))}
+    chains = [chain for chain in chains if chain.limits.get('cpuset') is None]
+    usable = [core for core in cores[reserve_cores:] if explicit.isdisjoint(core.cpus)] or cores
+    if not chains:
+        return {}
+    even_share = max(1, len(usable) // len(chains))
+    
+    def _fresh_pool() -> Dict[int, List[Core]]:
+        pool: Dict[int, List[Core]] = {}
+        for core in usable:
+            pool.setdefault(core.node, []).append(core)
+        return pool
+    
+    free = _fresh_pool()
+    cpusets = {}
+    for chain in chains:
+        cpus = chain.limits.get('cpus')
+        wanted = min(len(usable), math.ceil(float(cpus)) if cpus else even_share)
+        if sum(len(node_cores) for node_cores in free.values()) < wanted:
+            free = _fresh_pool()
+        
+        taken: List[Core] = []
+        # Take cores from the node with the most free ones, spilling over only if it is too small
+        for node in sorted(free, key=lambda n: (-len(free[n]), n)):
+            while free[node] and len(taken) < wanted:
+                taken.append(free[node].pop(0))
+        cpusets[chain.name] = format_cpu_list([cpu for core in taken for cpu in core.cpus])
+    return cpusets
@@ -0,0 +1,136 @@
+"""
+Forward CLI invocations to a running `validay daemon`
+
+This module is imported before anything else on every invocation, so it
+only uses the standard library and must stay cheap: no YAML, no command
+modules. When no daemon is listening, or the command is not one the
+daemon serves, `forward` returns None and the CLI runs in process.
+
+A request is one JSON line with the command line, the caller's working
+directory and the environment variables that change what a command does;
+the daemon applies them for that command only. It answers with one JSON
+line per chunk of output as it is written, then a line with the exit code.
+"""
+
+import os
+import sys
+import json
+import socket
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SOCKET_NAME = 'daemon.sock'
+
+# Commands the daemon serves; None means every subcommand. Interactive
+# commands, log followers, shells and long-running loops (including the
+# health-gated `chain start/restart --all`) always run in process so they
+# keep the caller's terminal.
+FORWARDED_COMMANDS = {
+    'list': None,
+    'validate': None,
+    'ps': None,
+    'stats': None,
+    'upgrades': None,
+    'generate': None,
+    'place': None,
+    'version': None,
+    'chain': {'status', 'start', 'stop', 'restart', 'enable', 'disable'},
+    'keys': {'show'},
+    'query': {'balance', 'validator', 'delegations'},
+    'snapshot': {'list'},
+    'upgrade': {'check'},
+    'profile': {'report'},
+}
+IN_PROCESS_FLAGS = {'-h', '--help', '-w', '--watch', '--all'}
+
+# Caller environment sent with every request: what validay itself reads
+# and what docker/docker-compose subprocesses inherit
+FORWARDED_ENV = {'VALIDAY_ROOT', 'NO_COLOR', 'TERM', 'COLUMNS', 'PATH'}
+FORWARDED_ENV_PREFIXES = ('DOCKER_', 'COMPOSE_')
+
+
+def forwarded_environment() -> Dict[str, str]:
+    """Get the variables of this process's environment a forwarded command runs with"""
+    return {name: value for name, value in os.environ.items()
+            if name in FORWARDED_ENV or name.startswith(FORWARDED_ENV_PREFIXES)}
+
+
+def find_project_root() -> Path:
+    """Find the project root the same way config.get_project_root does"""
+    env_root = os.environ.get('VALIDAY_ROOT')
+    if env_root:
+        return Path(env_root).expanduser().resolve()
+    cwd = Path.cwd()
+    for path in [cwd] + list(cwd.parents):
+        if (path / 'chains.yaml').exists():
+            return path
+    return cwd
+
+
+def get_daemon_socket(root: Optional[Path] = None) -> Path:
+    """Get the daemon socket path: VALIDAY_DAEMON_SOCKET or .validay/daemon.sock in the project"""
+    env_socket = os.environ.get('VALIDAY_DAEMON_SOCKET')
+    if env_socket:
+        return Path(env_socket)
+    return (root or find_project_root()) / '.validay' / SOCKET_NAME
+
+
+def is_forwardable(argv: List[str]) -> bool:
+    """Check whether the daemon serves this command line"""
+    if not argv or argv[0] not in FORWARDED_COMMANDS or IN_PROCESS_FLAGS.intersection(argv):
+        return False
+    subcommands = FORWARDED_COMMANDS[argv[0]]
+    return subcommands is None or (len(argv) > 1 and argv[1] in subcommands)
+
+
+def forward(argv: List[str]) -> Optional[int]:
+    """
+    Run a command in the daemon and replay its output
+    
+    Returns the command's exit code, or None if it should run in process
+    (daemon disabled with VALIDAY_NO_DAEMON, not running, or the command
+    is not served, or the daemon serves another project or Docker engine).
+    Once the daemon has accepted the command it is not retried in process,
+    since it may already have had effects.
+    """
+    if os.environ.get('VALIDAY_NO_DAEMON') or not is_forwardable(argv):
+        return None
+    socket_path = get_daemon_socket()
+    if not socket_path.exists():
+        return None
+    
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_path))
+        request = {
+            'argv': argv,
+            'tty': sys.stdout.isatty(),
+            'cwd': os.getcwd(),
+            'root': str(find_project_root()),
+            'env': forwarded_environment(),
+        }
+        sock.sendall(json.dumps(request).encode() + b'\n')
+    except OSError:
+        # Stale socket file, a daemon that is shutting down, or a deleted cwd
+        sock.close()
+        return None
+    
+    try:
+        with sock.makefile('rb') as responses:
+            for line in responses:
+                message = json.loads(line)
+                if 'text' in message:
+                    # Flush each chunk so interleaved stdout and stderr keep their order
+                    out = sys.stderr if message.get('stream') == 2 else sys.stdout
+                    out.write(message['text'])
+                    out.flush()
+                elif message.get('fallback'):
+                    return None
+                elif 'exit_code' in message:
+                    return message['exit_code']
+        raise OSError("the daemon closed the connection before the command finished")
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Lost connection to the validay daemon at {socket_path}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        sock.close()
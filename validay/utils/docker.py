@@ -2,11 +2,21 @@
 
 import subprocess
 import sys
-from typing import List, Optional, Dict
+import time
+import threading
+from typing import Callable, List, Mapping, NamedTuple, Optional, Dict, Set, Tuple
 from pathlib import Path
 
-from ..utils.errors import DockerError, ContainerNotRunningError
-from ..config import get_project_root
+from ..utils.errors import ConfigError, DockerError, ContainerNotRunningError
+from ..utils.cgroup import CgroupSampler
+from ..utils.docker_api import DockerAPI
+from ..utils.generate_compose import MANAGED_LABEL
+from ..utils.profiler import sample_between
+from ..config import get_project_root, get_orchestration_backend
+from ..output import format_bytes
+
+# How long the cgroup backend measures CPU usage over
+CGROUP_STATS_WINDOW = 0.5
 
 
 def run_docker_compose(args: List[str], check: bool = True) -> subprocess.CompletedProcess:
@@ -29,28 +39,335 @@ def run_docker_compose(args: List[str], check: bool = True) -> subprocess.Comple
         raise DockerError("docker-compose not found. Is Docker installed?")
 
 
-def run_docker(args: List[str], check: bool = True) -> subprocess.CompletedProcess:
+def run_docker(args: List[str], check: bool = True, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
     """Run docker command"""
     try:
         result = subprocess.run(
             ['docker'] + args,
             capture_output=True,
             text=True,
-            check=check
+            check=check,
+            timeout=timeout
         )
         return result
     except subprocess.CalledProcessError as e:
         raise DockerError(f"Docker command failed: {e.stderr}")
+    except subprocess.TimeoutExpired:
+        raise DockerError(f"Docker command timed out after {timeout}s: docker {' '.join(args)}")
     except FileNotFoundError:
         raise DockerError("docker not found. Is Docker installed?")
 
 
+# Engine API event actions that change what the inventory records
+INVENTORY_EVENTS = ['create', 'start', 'restart', 'die', 'stop', 'pause', 'unpause',
+                    'destroy', 'rename', 'health_status']
+
+
+class ContainerState(NamedTuple):
+    """What the inventory knows about one managed container"""
+    name: str
+    id: str
+    state: str  # created, running, paused, restarting, exited, dead
+    health: str  # starting, healthy, unhealthy, or '' without a healthcheck
+    labels: Mapping[str, str]
+    volumes: Tuple[str, ...]
+    
+    @property
+    def status(self) -> str:
+        """The health while running with a healthcheck, otherwise the state (as get_health_states)"""
+        return self.health if self.state == 'running' and self.health else self.state
+
+
+def _health_from_status(status: str) -> str:
+    """Get the health from a container list Status such as 'Up 2 hours (healthy)'"""
+    for health in ('health: starting', 'unhealthy', 'healthy'):
+        if f"({health})" in status:
+            return health.replace('health: ', '')
+    return ''
+
+
+class ContainerInventory:
+    """
+    In-memory state of validay-managed containers, kept current by Docker events
+    
+    The inventory lists the containers carrying the managed label once,
+    then follows the Engine API /events stream (filtered server-side to that
+    label) from a background thread and applies each event incrementally.
+    If the stream breaks it lists again and resumes, so readers never poll
+    docker themselves. Volume events carry no labels and cannot be filtered
+    the same way; a container's volumes are recorded from its mounts instead.
+    """
+    
+    def __init__(self, api: Optional[DockerAPI] = None, reconnect_delay: float = 2.0):
+        self.api = api or DockerAPI(timeout=10.0)
+        self.reconnect_delay = reconnect_delay
+        self._containers: Dict[str, ContainerState] = {}
+        self._changed = threading.Condition()
+        self._synced = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._subscribers: List[Callable[[ContainerState, str], None]] = []
+    
+    @property
+    def synced(self) -> bool:
+        """Whether the inventory currently reflects the daemon"""
+        return self._synced
+    
+    def get(self, name: str) -> Optional[ContainerState]:
+        """Get a container's state, or None if it is not a managed container"""
+        return self._containers.get(name)
+    
+    def snapshot(self) -> Dict[str, ContainerState]:
+        """Get every managed container's state"""
+        with self._changed:
+            return dict(self._containers)
+    
+    def subscribe(self, callback: Callable[[ContainerState, str], None]):
+        """Call `callback(state, action)` after every applied event"""
+        self._subscribers.append(callback)
+    
+    def wait_for(self, predicate: Callable[[Dict[str, ContainerState]], bool], timeout: float) -> bool:
+        """Block until predicate(containers) holds or the timeout expires; returns whether it held"""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while not predicate(self._containers):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+            return True
+    
+    def _sync(self):
+        """Replace the inventory with a fresh container listing"""
+        containers = {}
+        for item in self.api.list_containers(include_stopped=True, filters={'label': [MANAGED_LABEL]}):
+            if not item.get('Names'):
+                continue
+            name = item['Names'][0].lstrip('/')
+            volumes = tuple(mount['Name'] for mount in item.get('Mounts') or () if mount.get('Type') == 'volume')
+            containers[name] = ContainerState(name, item.get('Id', ''), item.get('State', ''),
+                                              _health_from_status(item.get('Status', '')),
+                                              item.get('Labels') or {}, volumes)
+        with self._changed:
+            self._containers = containers
+            self._synced = True
+            self._changed.notify_all()
+    
+    def _inspect(self, container_id: str) -> Optional[ContainerState]:
+        """Build a container's entry from docker inspect, when an event is not enough"""
+        try:
+            details = self.api.inspect_container(container_id)
+        except DockerError:
+            return None
+        state = details.get('State') or {}
+        volumes = tuple(mount['Name'] for mount in details.get('Mounts') or () if mount.get('Type') == 'volume')
+        return ContainerState(details.get('Name', '').lstrip('/'), details.get('Id', container_id),
+                              state.get('Status', ''), (state.get('Health') or {}).get('Status', ''),
+                              (details.get('Config') or {}).get('Labels') or {}, volumes)
+    
+    def apply_event(self, event: Dict):
+        """Apply one Engine API container event"""
+        if event.get('Type') != 'container':
+            return
+        action = event.get('Action', '')
+        actor = event.get('Actor') or {}
+        attributes = actor.get('Attributes') or {}
+        name = attributes.get('name', '')
+        
+        if action in ('create', 'start', 'restart', 'unpause') or (
+                name not in self._containers and action not in ('destroy', 'rename')):
+            # A listing does not say whether a stopped container has a
+            # healthcheck, so take the state after these events from inspect
+            current = self._inspect(actor.get('ID') or name)
+            if current is None:
+                return
+        else:
+            current = self._containers.get(name)
+        
+        with self._changed:
+            if action == 'rename':
+                current = self._containers.pop(attributes.get('oldName', '').lstrip('/'), None)
+                if current is None:
+                    return
+                current = current._replace(name=name)
+            elif action.startswith('health_status'):
+                current = current._replace(health=action.partition(':')[2].strip())
+            elif action in ('die', 'stop'):
+                current = current._replace(state='exited')
+            elif action == 'pause':
+                current = current._replace(state='paused')
+            
+            if action == 'destroy':
+                current = self._containers.pop(name, None)
+                if current is None:
+                    return
+            else:
+                self._containers[name] = current
+            self._changed.notify_all()
+        
+        for callback in list(self._subscribers):
+            try:
+                callback(current, action)
+            except Exception as e:
+                print(f"Container inventory subscriber failed on {action} {name}: {e}", file=sys.stderr)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                # Ask for events from just before the listing so none fall in between;
+                # replaying one that the listing already reflects is harmless
+                since = time.time() - 1
+                self._sync()
+                events = self.api.events({'type': ['container'], 'label': [MANAGED_LABEL],
+                                          'event': INVENTORY_EVENTS}, since=since)
+                for event in events:
+                    if self._stop.is_set():
+                        break
+                    self.apply_event(event)
+            except DockerError:
+                pass
+            with self._changed:
+                self._synced = False
+            self._stop.wait(self.reconnect_delay)
+    
+    def start(self) -> 'ContainerInventory':
+        """Follow events from a background thread"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='container-inventory', daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop following events; the thread exits at the next event"""
+        self._stop.set()
+        self._thread = None
+
+
+_inventory: Optional[ContainerInventory] = None
+
+
+def start_container_inventory() -> ContainerInventory:
+    """Start the process-wide inventory that the functions below consult instead of polling"""
+    global _inventory
+    if _inventory is None:
+        _inventory = ContainerInventory().start()
+    return _inventory
+
+
+def get_container_inventory() -> Optional[ContainerInventory]:
+    """Get the process-wide inventory if it is running and in sync"""
+    if _inventory is not None and _inventory.synced:
+        return _inventory
+    return None
+
+
+def _inventory_states(container_names: List[str]) -> Optional[Dict[str, str]]:
+    """Get states from the running inventory, if it knows every one of the containers"""
+    inventory = get_container_inventory()
+    if inventory is None:
+        return None
+    containers = inventory.snapshot()
+    if not all(name in containers for name in container_names):
+        return None
+    return {name: containers[name].status for name in container_names}
+
+
 def is_container_running(container_name: str) -> bool:
     """Check if a container is running"""
+    inventory = get_container_inventory()
+    state = inventory.get(container_name) if inventory is not None else None
+    if state is not None:
+        return state.state == 'running'
     result = run_docker(['ps', '--format', '{{.Names}}'], check=False)
     return container_name in result.stdout
 
 
+def get_running_containers() -> Set[str]:
+    """Get the names of all running containers with a single docker call"""
+    result = run_docker(['ps', '--format', '{{.Names}}'], check=False)
+    return {line.strip() for line in result.stdout.split('\n') if line.strip()}
+
+
+def get_labeled_containers(filter_label: str, value_label: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Get all containers carrying a label, with one docker call
+    
+    Returns:
+        dict: container name -> (state, value of value_label)
+    """
+    inventory = get_container_inventory()
+    if inventory is not None and filter_label == MANAGED_LABEL:
+        return {name: (state.state, state.labels.get(value_label, ''))
+                for name, state in inventory.snapshot().items()}
+    
+    result = run_docker(['ps', '-a', '--filter', f'label={filter_label}', '--format',
+                         f'{{{{.Names}}}}\t{{{{.State}}}}\t{{{{.Label "{value_label}"}}}}'], check=False)
+    containers = {}
+    for line in result.stdout.split('\n'):
+        parts = line.strip().split('\t')
+        if len(parts) == 3 and parts[0]:
+            containers[parts[0]] = (parts[1], parts[2])
+    return containers
+
+
+def get_health_states(container_names: List[str]) -> Dict[str, str]:
+    """
+    Get the health of containers with a single docker inspect
+    
+    The state is the healthcheck status (starting, healthy, unhealthy) for
+    containers that define one, otherwise the container state (running,
+    exited, ...), or 'missing' if the container does not exist.
+    """
+    if not container_names:
+        return {}
+    states = _inventory_states(container_names)
+    if states is not None:
+        return states
+    
+    result = run_docker(['inspect', '--format',
+                         '{{.Name}}|{{.State.Status}}|{{if .State.Health}}{{.State.Health.Status}}{{end}}']
+                        + list(container_names), check=False)
+    states = {name: 'missing' for name in container_names}
+    for line in result.stdout.split('\n'):
+        parts = line.strip().split('|')
+        if len(parts) == 3:
+            name = parts[0].lstrip('/')
+            if name in states:
+                states[name] = parts[2] or parts[1]
+    return states
+
+
+def wait_for_healthy(container_names: List[str], timeout: float, interval: float = 2.0) -> Dict[str, str]:
+    """
+    Wait until every container is healthy, one has failed, or the timeout expires
+    
+    Returns:
+        dict: container name -> final state; 'healthy' (or 'running' when the
+        container has no healthcheck) means ready, and containers still
+        starting when the timeout expires are reported as 'timeout'
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        states = get_health_states(container_names)
+        pending = [name for name, state in states.items() if state in ('starting', 'created', 'restarting')]
+        failed = [name for name, state in states.items() if state not in ('healthy', 'running') and name not in pending]
+        if failed or not pending:
+            return states
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return {name: 'timeout' if name in pending else state for name, state in states.items()}
+        
+        inventory = get_container_inventory()
+        if inventory is not None and _inventory_states(container_names) is not None:
+            # Wake up on the next health or state event instead of sleeping the interval out
+            inventory.wait_for(lambda containers: {name: containers[name].status if name in containers else 'missing'
+                                                   for name in container_names} != states,
+                               min(interval, remaining))
+        else:
+            time.sleep(min(interval, remaining))
+
+
 def get_container_status(container_name: str) -> Optional[str]:
     """Get container status (running, stopped, etc.)"""
     result = run_docker(
@@ -62,19 +379,66 @@ def get_container_status(container_name: str) -> Optional[str]:
     return None
 
 
+def get_engine_backend():
+    """Get the Engine API backend when docker.backend is 'engine', else None"""
+    try:
+        if get_orchestration_backend() != 'engine':
+            return None
+        from .engine import EngineBackend
+        return EngineBackend(get_project_root())
+    except ConfigError as e:
+        raise DockerError(f"Cannot use the engine backend: {e}")
+
+
+def recreate_services(service_names: List[str]):
+    """Recreate services in one call, without touching their dependencies"""
+    engine = get_engine_backend()
+    if engine is not None:
+        engine.up(service_names, dependencies=False, recreate=True, build=True)
+        return
+    run_docker_compose(['up', '-d', '--no-deps', '--force-recreate', '--build'] + list(service_names))
+
+
+def start_containers(container_names: List[str]):
+    """Start containers, creating or recreating them as needed, in one operation"""
+    engine = get_engine_backend()
+    if engine is not None:
+        engine.up(container_names)
+        return
+    run_docker_compose(['up', '-d'] + list(container_names))
+
+
+def stop_containers(container_names: List[str]):
+    """Stop containers in one operation; ones that are not running are left alone"""
+    engine = get_engine_backend()
+    if engine is not None:
+        engine.stop(container_names)
+        return
+    run_docker_compose(['stop'] + list(container_names))
+
+
+def restart_containers(container_names: List[str]):
+    """Restart containers in one operation"""
+    engine = get_engine_backend()
+    if engine is not None:
+        engine.restart(container_names)
+        return
+    run_docker_compose(['restart'] + list(container_names))
+
+
 def start_container(container_name: str):
     """Start a container"""
-    run_docker_compose(['up', '-d', container_name])
+    start_containers([container_name])
 
 
 def stop_container(container_name: str):
     """Stop a container"""
-    run_docker_compose(['stop', container_name])
+    stop_containers([container_name])
 
 
 def restart_container(container_name: str):
     """Restart a container"""
-    run_docker_compose(['restart', container_name])
+    restart_containers([container_name])
 
 
 def get_container_logs(container_name: str, follow: bool = False) -> None:
@@ -95,7 +459,8 @@ def get_container_logs(container_name: str, follow: bool = False) -> None:
         print(result.stdout)
 
 
-def exec_in_container(container_name: str, command: List[str], interactive: bool = False) -> subprocess.CompletedProcess:
+def exec_in_container(container_name: str, command: List[str], interactive: bool = False,
+                      timeout: Optional[float] = None) -> subprocess.CompletedProcess:
     """Execute command in container"""
     if not is_container_running(container_name):
         raise ContainerNotRunningError(f"Container '{container_name}' is not running")
@@ -105,16 +470,36 @@ def exec_in_container(container_name: str, command: List[str], interactive: bool
         docker_args.append('-it')
     docker_args.extend([container_name] + command)
     
-    return run_docker(docker_args, check=False)
+    return run_docker(docker_args, check=False, timeout=timeout)
+
+
+def open_exec_stream(container_name: str, command: List[str]) -> subprocess.Popen:
+    """Execute command in container with its binary stdout exposed as a stream"""
+    try:
+        return subprocess.Popen(
+            ['docker', 'exec', container_name] + command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+    except FileNotFoundError:
+        raise DockerError("docker not found. Is Docker installed?")
 
 
 def rebuild_container(container_name: str):
     """Rebuild a container"""
+    engine = get_engine_backend()
+    if engine is not None:
+        engine.rebuild([container_name])
+        return
     run_docker_compose(['build', '--no-cache', container_name])
 
 
 def remove_container(container_name: str, volumes: bool = False):
     """Remove a container"""
+    engine = get_engine_backend()
+    if engine is not None:
+        engine.remove([container_name], volumes)
+        return
     args = ['rm', '-f', container_name]
     if volumes:
         args.append('-v')
@@ -137,12 +522,15 @@ def get_all_containers() -> List[Dict[str, str]]:
     return containers
 
 
-def get_container_stats() -> List[Dict[str, str]]:
+def get_container_stats(backend: str = 'docker') -> List[Dict[str, str]]:
     """Get container resource usage"""
+    if backend == 'cgroup':
+        return _get_cgroup_stats()
+    
     result = run_docker(['stats', '--no-stream', '--format', 
                         '{{.Name}}|{{.CPUPerc}}|{{.MemUsage}}|{{.NetIO}}'], check=False)
     stats = []
-    for line in result.stdout.strip().split('\n')[1:]:  # Skip header
+    for line in result.stdout.strip().split('\n'):  # A --format template prints no header
         if line:
             parts = line.split('|')
             if len(parts) >= 3:
@@ -154,3 +542,38 @@ def get_container_stats() -> List[Dict[str, str]]:
                 })
     return stats
 
+
+def _get_cgroup_stats() -> List[Dict[str, str]]:
+    """Get container resource usage from cgroup v2 counters instead of `docker stats`"""
+    api = DockerAPI(timeout=10.0)
+    sampler = None
+    try:
+        sampler = CgroupSampler(api)
+        names = sorted(c['Names'][0].lstrip('/') for c in api.list_containers() if c.get('Names'))
+        started = time.monotonic()
+        first = sampler.read(names)
+        time.sleep(CGROUP_STATS_WINDOW)
+        elapsed = time.monotonic() - started
+        second = sampler.read(names)
+    finally:
+        # Also on Ctrl+C during the window: the sampler holds open cgroup and /proc files
+        if sampler is not None:
+            sampler.close()
+        api.close()
+    
+    stats = []
+    for name in names:
+        if name not in first or name not in second:
+            continue
+        (previous, _), (counters, limit) = first[name], second[name]
+        sample = sample_between(previous, counters, elapsed, 0)
+        if sample is None:
+            continue
+        memory = format_bytes(counters.memory) + (f" / {format_bytes(limit)}" if limit else '')
+        stats.append({
+            'name': name,
+            'cpu': f"{sample.cpu * 100:.2f}%",
+            'memory': memory,
+            'network': f"{format_bytes(counters.net_rx)} / {format_bytes(counters.net_tx)}"
+        })
+    return stats
@@ -0,0 +1,159 @@
+"""Minimal Docker Engine API client over the local unix socket
+
+The docker CLI costs a process spawn per call and `docker stats` waits to
+take its own sample, which is too slow for collectors that poll every few
+seconds. This client talks HTTP/1.1 to the daemon socket directly and
+reuses one keep-alive connection.
+"""
+
+import os
+import json
+import socket
+import http.client
+from urllib.parse import quote, urlencode
+from typing import Any, Dict, Iterator, List, Optional
+
+from .errors import DockerError
+
+DEFAULT_SOCKET = '/var/run/docker.sock'
+API_VERSION = 'v1.41'
+
+
+def get_socket_path() -> str:
+    """Get the daemon socket path, honouring DOCKER_HOST=unix://..."""
+    host = os.environ.get('DOCKER_HOST', '')
+    if host.startswith('unix://'):
+        return host[len('unix://'):]
+    return DEFAULT_SOCKET
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over an AF_UNIX socket"""
+    
+    def __init__(self, socket_path: str, timeout: Optional[float]):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+    
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class DockerAPI:
+    """A keep-alive connection to the Docker Engine API"""
+    
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = 30.0):
+        self.socket_path = socket_path or get_socket_path()
+        self.timeout = timeout
+        self._conn: Optional[_UnixHTTPConnection] = None
+    
+    def _url(self, path: str, params: Optional[Dict] = None) -> str:
+        url = f"/{API_VERSION}{path}"
+        if params:
+            url += '?' + urlencode(params)
+        return url
+    
+    def _check(self, response: http.client.HTTPResponse, path: str):
+        if response.status >= 400:
+            body = response.read()
+            try:
+                message = json.loads(body).get('message', '')
+            except ValueError:
+                message = body.decode(errors='replace').strip()
+            raise DockerError(f"Docker API {path} failed ({response.status}): {message}")
+    
+    def request_json(self, method: str, path: str, params: Optional[Dict] = None, body: Any = None) -> Any:
+        """Send a request with an optional JSON body and decode the JSON response, if any"""
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        for attempt in (1, 2):
+            if self._conn is None:
+                self._conn = _UnixHTTPConnection(self.socket_path, self.timeout)
+            try:
+                self._conn.request(method, self._url(path, params), body=payload, headers=headers)
+                response = self._conn.getresponse()
+                self._check(response, path)
+                data = response.read()
+                return json.loads(data) if data else None
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.CannotSendRequest):
+                # The daemon closed the idle keep-alive connection; reconnect once
+                self.close()
+                if attempt == 2:
+                    raise DockerError(f"Lost connection to the Docker daemon at {self.socket_path}")
+            except OSError as e:
+                self.close()
+                raise DockerError(f"Cannot reach the Docker daemon at {self.socket_path}: {e}")
+    
+    def get_json(self, path: str, params: Optional[Dict] = None) -> Any:
+        """GET an endpoint and decode its JSON body"""
+        return self.request_json('GET', path, params)
+    
+    def post_json(self, path: str, params: Optional[Dict] = None, body: Any = None) -> Any:
+        """POST to an endpoint and decode its JSON body, if any"""
+        return self.request_json('POST', path, params, body)
+    
+    def delete(self, path: str, params: Optional[Dict] = None):
+        """DELETE an object"""
+        self.request_json('DELETE', path, params)
+    
+    def stream_json(self, path: str, params: Optional[Dict] = None, method: str = 'GET') -> Iterator[Any]:
+        """
+        Request a streaming endpoint and yield each JSON document as it arrives
+        
+        A stream holds its own connection until the generator is closed or
+        the daemon ends it, so the keep-alive connection stays free.
+        """
+        conn = _UnixHTTPConnection(self.socket_path, None)
+        try:
+            conn.request(method, self._url(path, params))
+            response = conn.getresponse()
+            self._check(response, path)
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        except (OSError, http.client.HTTPException) as e:
+            raise DockerError(f"Docker API stream {path} failed: {e}")
+        finally:
+            conn.close()
+    
+    def events(self, filters: Optional[Dict[str, List[str]]] = None, since: Optional[float] = None) -> Iterator[Dict]:
+        """Yield daemon events as they happen, starting from `since` (a UNIX time) if given"""
+        params = {}
+        if filters:
+            params['filters'] = json.dumps(filters)
+        if since is not None:
+            params['since'] = f"{since:.9f}"
+        return self.stream_json('/events', params)
+    
+    def list_containers(self, include_stopped: bool = False,
+                        filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        """List containers, optionally including stopped ones"""
+        params = {'all': 'true' if include_stopped else 'false'}
+        if filters:
+            params['filters'] = json.dumps(filters)
+        return self.get_json('/containers/json', params)
+    
+    def inspect_container(self, container: str) -> Dict:
+        """Get the low-level information on a container"""
+        return self.get_json(f"/containers/{quote(container)}/json")
+    
+    def container_stats(self, container: str) -> Dict:
+        """Get one stats sample for a container without waiting for a second one"""
+        return self.get_json(f"/containers/{quote(container)}/stats",
+                             {'stream': 'false', 'one-shot': 'true'})
+    
+    def stream_container_stats(self, container: str) -> Iterator[Dict]:
+        """Yield a stats document for a container about once a second until it stops"""
+        return self.stream_json(f"/containers/{quote(container)}/stats", {'stream': 'true'})
+    
+    def close(self):
+        """Close the keep-alive connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,466 @@
+"""
+Orchestration through the Docker Engine API instead of docker-compose
+
+Service definitions come from generate_files, the same ones written to
+docker-compose.yml, and are translated into Engine API create requests.
+Networks, volumes and containers are named and labelled the way Compose
+names them, so either backend finds what the other created. A container
+is recreated only when its com.validay.config-hash label changed, which
+keeps every operation idempotent.
+"""
+
+import os
+import re
+import json
+import shlex
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from .docker import run_docker
+from .docker_api import DockerAPI
+from .errors import ConfigError, DockerError
+from .generate_compose import CONFIG_HASH_LABEL, MANAGED_LABEL, generate_files
+from .placement import parse_size
+
+PROJECT_LABEL = 'com.docker.compose.project'
+STOP_TIMEOUT = 10
+SECRETS_DIR = '/run/secrets'
+
+# Service keys generate_docker_compose produces and this backend translates
+SUPPORTED_KEYS = {
+    'build', 'image', 'platform', 'container_name', 'restart', 'ports', 'volumes', 'environment',
+    'secrets', 'networks', 'healthcheck', 'logging', 'labels', 'command', 'depends_on',
+    'cpus', 'cpuset', 'mem_limit', 'mem_reservation', 'pids_limit', 'ulimits', 'blkio_config'
+}
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|us|ns|h|m|s)')
+_DURATION_UNITS = {'h': 3600e9, 'm': 60e9, 's': 1e9, 'ms': 1e6, 'us': 1e3, 'ns': 1}
+
+
+def get_project_name(root: Path) -> str:
+    """Get the Compose project name: COMPOSE_PROJECT_NAME, else the project directory's name"""
+    name = os.environ.get('COMPOSE_PROJECT_NAME') or root.name
+    return re.sub(r'[^a-z0-9_-]', '', name.lower())
+
+
+def parse_duration(value) -> int:
+    """Parse a Compose duration such as 30s or 1m30s into nanoseconds"""
+    if isinstance(value, (int, float)):
+        return int(value * 1e9)
+    text = str(value).strip()
+    parts = _DURATION_PATTERN.findall(text)
+    if not parts or ''.join(number + unit for number, unit in parts) != text:
+        raise DockerError(f"Invalid duration '{value}'")
+    return int(sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts))
+
+
+def _unescape(value) -> str:
+    """Undo Compose's $$ escaping"""
+    return str(value).replace('$$', '$')
+
+
+def _split_port(spec) -> Tuple[str, str, str]:
+    """Split a short port mapping into (host IP, host port, container port/protocol)"""
+    port, _, protocol = str(spec).partition('/')
+    parts = port.rsplit(':', 2)
+    container = f"{parts[-1]}/{protocol or 'tcp'}"
+    if len(parts) == 1:
+        return '', '', container
+    if len(parts) == 2:
+        return '', parts[0], container
+    return parts[0], parts[1], container
+
+
+def _split_image(image: str) -> Tuple[str, str]:
+    """Split an image reference into repository and tag (empty for a digest)"""
+    if '@' in image:
+        return image, ''
+    repository, _, tag = image.rpartition(':')
+    if not repository or '/' in tag:
+        return image, 'latest'
+    return repository, tag
+
+
+class EngineBackend:
+    """Creates, starts and stops the project's services through the Engine API"""
+    
+    def __init__(self, root: Path, compose: Optional[Dict] = None, api: Optional[DockerAPI] = None):
+        self.root = root
+        self.compose = compose if compose is not None else generate_files(root)[0]
+        self.project = get_project_name(root)
+        # Stopping waits up to STOP_TIMEOUT for the container to exit
+        self.api = api or DockerAPI(timeout=STOP_TIMEOUT + 60)
+        self.services: Dict[str, Dict] = self.compose.get('services') or {}
+        for service_name, service in self.services.items():
+            unsupported = set(service) - SUPPORTED_KEYS
+            if unsupported:
+                raise ConfigError(f"Service '{service_name}' uses keys the engine backend does not support: "
+                                  f"{', '.join(sorted(unsupported))}")
+    
+    def service_name(self, name: str) -> str:
+        """Resolve a service or container name to its service"""
+        if name in self.services:
+            return name
+        for service_name, service in self.services.items():
+            if service.get('container_name') == name:
+                return service_name
+        raise DockerError(f"No such service: {name}")
+    
+    def container_name(self, service_name: str) -> str:
+        return self.services[service_name].get('container_name') or f"{self.project}-{service_name}-1"
+    
+    def image_name(self, service_name: str) -> str:
+        return self.services[service_name].get('image') or f"{self.project}-{service_name}"
+    
+    def _resource_name(self, kind: str, name: str) -> str:
+        """Get the engine name of a top-level network or volume, honouring name: and external:"""
+        definition = (self.compose.get(kind) or {}).get(name) or {}
+        if definition.get('name'):
+            return definition['name']
+        if definition.get('external'):
+            return name
+        return f"{self.project}_{name}"
+    
+    def _dependencies(self, service_names: List[str]) -> List[str]:
+        """Get services and everything they depend on, dependencies first"""
+        ordered: List[str] = []
+        visiting = set()
+        
+        def visit(service_name: str):
+            if service_name in ordered:
+                return
+            if service_name in visiting:
+                raise DockerError(f"Dependency cycle at service '{service_name}'")
+            visiting.add(service_name)
+            for dependency in self.services[service_name].get('depends_on') or []:
+                if dependency not in self.services:
+                    raise DockerError(f"Service '{service_name}' depends on undefined service '{dependency}'")
+                visit(dependency)
+            ordered.append(service_name)
+        
+        for service_name in service_names:
+            visit(service_name)
+        return ordered
+    
+    def _compose_labels(self, **extra) -> Dict[str, str]:
+        labels = {PROJECT_LABEL: self.project}
+        labels.update({f"com.docker.compose.{key}": value for key, value in extra.items()})
+        return labels
+    
+    def ensure_network(self, name: str) -> str:
+        """Create a top-level network unless it exists"""
+        engine_name = self._resource_name('networks', name)
+        existing = self.api.get_json('/networks', {'filters': json.dumps({'name': [engine_name]})})
+        if not any(network.get('Name') == engine_name for network in existing):
+            definition = (self.compose.get('networks') or {}).get(name) or {}
+            if definition.get('external'):
+                raise DockerError(f"External network '{engine_name}' does not exist")
+            self.api.post_json('/networks/create', body={
+                'Name': engine_name,
+                'Driver': definition.get('driver', 'bridge'),
+                'CheckDuplicate': True,
+                'Labels': self._compose_labels(network=name)
+            })
+        return engine_name
+    
+    def ensure_volume(self, name: str) -> str:
+        """Create a top-level named volume unless it exists"""
+        engine_name = self._resource_name('volumes', name)
+        existing = self.api.get_json('/volumes', {'filters': json.dumps({'name': [engine_name]})})
+        if not any(volume.get('Name') == engine_name for volume in existing.get('Volumes') or []):
+            self.api.post_json('/volumes/create', body={
+                'Name': engine_name,
+                'Labels': self._compose_labels(volume=name)
+            })
+        return engine_name
+    
+    def _image_exists(self, image: str) -> bool:
+        return bool(self.api.get_json('/images/json', {'filters': json.dumps({'reference': [image]})}))
+    
+    def build(self, service_name: str, no_cache: bool = False):
+        """
+        Build a service's image with `docker build`
+        
+        The CLI is used rather than the API so the context is sent with the
+        same .dockerignore handling and BuildKit support as `docker-compose build`.
+        """
+        service = self.services[service_name]
+        build = service['build']
+        if isinstance(build, str):
+            build = {'context': build}
+        context = (self.root / build.get('context', '.')).resolve()
+        args = ['build', '-t', self.image_name(service_name),
+                '-f', str(context / build.get('dockerfile', 'Dockerfile'))]
+        if service.get('platform'):
+            args.extend(['--platform', service['platform']])
+        for key, value in (build.get('args') or {}).items():
+            args.extend(['--build-arg', f"{key}={value}"])
+        if no_cache:
+            args.append('--no-cache')
+        run_docker(args + [str(context)])
+    
+    def ensure_image(self, service_name: str, build: bool = False):
+        """Build or pull a service's image unless it is present"""
+        service = self.services[service_name]
+        image = self.image_name(service_name)
+        if 'build' in service:
+            if build or not self._image_exists(image):
+                self.build(service_name)
+            return
+        if self._image_exists(image):
+            return
+        repository, tag = _split_image(image)
+        params = {'fromImage': repository}
+        if tag:
+            params['tag'] = tag
+        if service.get('platform'):
+            params['platform'] = service['platform']
+        for progress in self.api.stream_json('/images/create', params, method='POST'):
+            if progress.get('error'):
+                raise DockerError(f"Cannot pull {image}: {progress['error']}")
+    
+    def _binds(self, service_name: str) -> List[str]:
+        """Translate volumes and secrets into bind specifications"""
+        service = self.services[service_name]
+        binds = []
+        for spec in service.get('volumes') or []:
+            source, _, rest = str(spec).partition(':')
+            if not rest:
+                # An anonymous volume: the engine creates one for the path
+                continue
+            if source.startswith(('.', '/', '~')):
+                source = str((self.root / Path(source).expanduser()).resolve())
+            else:
+                source = self.ensure_volume(source)
+            binds.append(f"{source}:{rest}")
+        
+        for secret in service.get('secrets') or []:
+            secret_name = secret if isinstance(secret, str) else secret['source']
+            target = secret_name if isinstance(secret, str) else secret.get('target', secret_name)
+            definition = (self.compose.get('secrets') or {}).get(secret_name) or {}
+            if 'file' not in definition:
+                raise DockerError(f"Secret '{secret_name}' of service '{service_name}' has no file")
+            path = (self.root / definition['file']).resolve()
+            if not path.exists():
+                raise DockerError(f"Secret file {path} of service '{service_name}' does not exist")
+            binds.append(f"{path}:{target if target.startswith('/') else f'{SECRETS_DIR}/{target}'}:ro")
+        return binds
+    
+    def _anonymous_volumes(self, service_name: str) -> Dict[str, Dict]:
+        return {str(spec): {} for spec in self.services[service_name].get('volumes') or [] if ':' not in str(spec)}
+    
+    def _healthcheck(self, healthcheck: Dict) -> Dict:
+        if healthcheck.get('disable'):
+            return {'Test': ['NONE']}
+        test = healthcheck.get('test')
+        if isinstance(test, str):
+            test = ['CMD-SHELL', test]
+        config = {'Test': [_unescape(part) for part in test]}
+        for key, engine_key in (('interval', 'Interval'), ('timeout', 'Timeout'), ('start_period', 'StartPeriod')):
+            if key in healthcheck:
+                config[engine_key] = parse_duration(healthcheck[key])
+        if 'retries' in healthcheck:
+            config['Retries'] = int(healthcheck['retries'])
+        return config
+    
+    def _resources(self, service: Dict) -> Dict:
+        """Translate resource limits into HostConfig fields"""
+        host = {}
+        try:
+            if service.get('cpus') is not None:
+                host['NanoCpus'] = int(float(service['cpus']) * 1e9)
+            if service.get('cpuset') is not None:
+                host['CpusetCpus'] = str(service['cpuset'])
+            if service.get('mem_limit') is not None:
+                host['Memory'] = parse_size(service['mem_limit'])
+            if service.get('mem_reservation') is not None:
+                host['MemoryReservation'] = parse_size(service['mem_reservation'])
+            if service.get('pids_limit') is not None:
+                host['PidsLimit'] = int(service['pids_limit'])
+            ulimits = []
+            for name, value in (service.get('ulimits') or {}).items():
+                if isinstance(value, dict):
+                    ulimits.append({'Name': name, 'Soft': int(value['soft']), 'Hard': int(value['hard'])})
+                else:
+                    ulimits.append({'Name': name, 'Soft': int(value), 'Hard': int(value)})
+            if ulimits:
+                host['Ulimits'] = ulimits
+            blkio = service.get('blkio_config') or {}
+            if blkio.get('weight') is not None:
+                host['BlkioWeight'] = int(blkio['weight'])
+            for key, engine_key in (('device_read_bps', 'BlkioDeviceReadBps'),
+                                    ('device_write_bps', 'BlkioDeviceWriteBps'),
+                                    ('device_read_iops', 'BlkioDeviceReadIOps'),
+                                    ('device_write_iops', 'BlkioDeviceWriteIOps')):
+                if blkio.get(key):
+                    parse = parse_size if key.endswith('bps') else int
+                    host[engine_key] = [{'Path': device['path'], 'Rate': parse(device['rate'])}
+                                        for device in blkio[key]]
+        except (KeyError, TypeError, ValueError) as e:
+            raise DockerError(f"Invalid resource limit: {e}")
+        return host
+    
+    def container_config(self, service_name: str) -> Dict:
+        """Build the Engine API create request for a service"""
+        service = self.services[service_name]
+        
+        labels = {str(key): str(value) for key, value in (service.get('labels') or {}).items()}
+        labels.update(self._compose_labels(**{
+            'service': service_name,
+            'container-number': '1',
+            'oneoff': 'False',
+            'project.working_dir': str(self.root),
+            'project.config_files': str(self.root / 'docker-compose.yml')
+        }))
+        
+        environment = service.get('environment') or []
+        if isinstance(environment, dict):
+            environment = [f"{key}={'' if value is None else value}" for key, value in environment.items()]
+        
+        exposed, bindings = {}, {}
+        for spec in service.get('ports') or []:
+            host_ip, host_port, container_port = _split_port(spec)
+            exposed[container_port] = {}
+            if host_port:
+                bindings.setdefault(container_port, []).append({'HostIp': host_ip, 'HostPort': host_port})
+        
+        restart, _, retries = str(service.get('restart', 'no')).partition(':')
+        host_config = {
+            'Binds': self._binds(service_name),
+            'PortBindings': bindings,
+            'RestartPolicy': {'Name': restart, 'MaximumRetryCount': int(retries or 0)}
+        }
+        if service.get('logging'):
+            host_config['LogConfig'] = {
+                'Type': service['logging'].get('driver', 'json-file'),
+                'Config': {key: str(value) for key, value in (service['logging'].get('options') or {}).items()}
+            }
+        host_config.update(self._resources(service))
+        
+        config = {
+            'Image': self.image_name(service_name),
+            'Env': [_unescape(variable) for variable in environment],
+            'Labels': labels,
+            'ExposedPorts': exposed,
+            'Volumes': self._anonymous_volumes(service_name),
+            'HostConfig': host_config
+        }
+        command = service.get('command')
+        if command is not None:
+            config['Cmd'] = [_unescape(part) for part in (shlex.split(command) if isinstance(command, str)
+                                                          else command)]
+        if service.get('healthcheck'):
+            config['Healthcheck'] = self._healthcheck(service['healthcheck'])
+        
+        # The first network is joined at create time, any others once created
+        primary = self._resource_name('networks', (service.get('networks') or ['default'])[0])
+        host_config['NetworkMode'] = primary
+        config['NetworkingConfig'] = {'EndpointsConfig': {primary: {'Aliases': [service_name]}}}
+        return config
+    
+    def containers(self) -> Dict[str, Dict]:
+        """Get managed containers, running or not, by name"""
+        listing = self.api.list_containers(include_stopped=True, filters={'label': [MANAGED_LABEL]})
+        return {container['Names'][0].lstrip('/'): container for container in listing if container.get('Names')}
+    
+    def _create(self, service_name: str, build: bool = False) -> str:
+        service = self.services[service_name]
+        networks = service.get('networks') or ['default']
+        for network in networks:
+            self.ensure_network(network)
+        self.ensure_image(service_name, build)
+        
+        params = {'name': self.container_name(service_name)}
+        if service.get('platform'):
+            params['platform'] = service['platform']
+        container_id = self.api.post_json('/containers/create', params, self.container_config(service_name))['Id']
+        for network in networks[1:]:
+            self.api.post_json(f"/networks/{quote(self._resource_name('networks', network))}/connect",
+                               body={'Container': container_id, 'EndpointConfig': {'Aliases': [service_name]}})
+        return container_id
+    
+    def _remove(self, container_id: str, volumes: bool = False):
+        self.api.delete(f"/containers/{quote(container_id)}", {'force': 'true', 'v': 'true' if volumes else 'false'})
+    
+    def up(self, names: List[str], dependencies: bool = True, recreate: bool = False,
+           build: bool = False) -> Dict[str, str]:
+        """
+        Bring services to their defined state, like `docker-compose up -d`
+        
+        A container whose config hash matches its definition is only started
+        if it is stopped; one whose hash differs (or every one, with recreate)
+        is replaced. Returns what was done to each service: created,
+        recreated, started or running.
+        """
+        service_names = [self.service_name(name) for name in names]
+        if dependencies:
+            service_names = self._dependencies(service_names)
+        existing = self.containers()
+        results = {}
+        for service_name in service_names:
+            current = existing.get(self.container_name(service_name))
+            wanted_hash = (self.services[service_name].get('labels') or {}).get(CONFIG_HASH_LABEL)
+            if current is not None and not recreate \
+                    and (current.get('Labels') or {}).get(CONFIG_HASH_LABEL) == wanted_hash:
+                if current.get('State') == 'running':
+                    results[service_name] = 'running'
+                else:
+                    self.api.post_json(f"/containers/{quote(current['Id'])}/start")
+                    results[service_name] = 'started'
+                continue
+            
+            if current is not None:
+                self.api.post_json(f"/containers/{quote(current['Id'])}/stop", {'t': STOP_TIMEOUT})
+                self._remove(current['Id'])
+            container_id = self._create(service_name, build)
+            self.api.post_json(f"/containers/{quote(container_id)}/start")
+            results[service_name] = 'created' if current is None else 'recreated'
+        return results
+    
+    def _each(self, container_ids: List[str], action: str):
+        """POST an action to several containers in parallel, one connection each"""
+        def post(container_id: str):
+            api = DockerAPI(self.api.socket_path, self.api.timeout)
+            try:
+                api.post_json(f"/containers/{quote(container_id)}/{action}", {'t': STOP_TIMEOUT})
+            finally:
+                api.close()
+        
+        if len(container_ids) == 1:
+            self.api.post_json(f"/containers/{quote(container_ids[0])}/{action}", {'t': STOP_TIMEOUT})
+        elif container_ids:
+            # Each worker holds its own Engine API connection; bound them on big fleets
+            with ThreadPoolExecutor(max_workers=min(16, len(container_ids))) as executor:
+                # list() re-raises the first failure
+                list(executor.map(post, container_ids))
+    
+    def stop(self, names: List[str]):
+        """Stop services' running containers, in parallel"""
+        existing = self.containers()
+        running = [existing[container]['Id'] for container in
+                   (self.container_name(self.service_name(name)) for name in names)
+                   if container in existing and existing[container].get('State') in ('running', 'restarting', 'paused')]
+        self._each(running, 'stop')
+    
+    def restart(self, names: List[str]):
+        """Restart services' existing containers, in parallel"""
+        existing = self.containers()
+        self._each([existing[container]['Id'] for container in
+                    (self.container_name(self.service_name(name)) for name in names) if container in existing],
+                   'restart')
+    
+    def remove(self, names: List[str], volumes: bool = False):
+        """Force-remove services' containers and, with volumes, their anonymous volumes"""
+        existing = self.containers()
+        for name in names:
+            current = existing.get(self.container_name(self.service_name(name)))
+            if current is not None:
+                self._remove(current['Id'], volumes)
+    
+    def rebuild(self, names: List[str]):
+        """Rebuild the images of services that are built locally, without the cache"""
+        for name in names:
+            service_name = self.service_name(name)
+            if 'build' in self.services[service_name]:
+                self.build(service_name, no_cache=True)
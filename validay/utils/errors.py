@@ -25,3 +25,12 @@ class DockerError(ValidatorError):
     """Docker operation error"""
     pass
 
+
+class BackupStoreError(ValidatorError):
+    """Backup repository error"""
+    pass
+
+
+class PlacementError(ValidatorError):
+    """Chains cannot be placed on the host inventory"""
+    pass
@@ -4,87 +4,66 @@ This module creates a multi-chain validator setup with shared monitoring
 """
 
 import yaml
+import json
+import hashlib
 from typing import Dict, List, Tuple
 from pathlib import Path
 
-from ..config import load_chains_config, load_global_config, get_project_root
+from ..config import load_chains_config, load_global_config, get_project_root, get_chains
+from ..models import ChainConfig, build_chain_configs
+from .files import write_atomic
+from .yaml_cache import load_yaml
+from .errors import ConfigError
+from .ports import find_port_conflicts
+from .cpu_topology import read_cpu_topology, assign_cpusets
 
 
-def create_chain_service(chain_name: str, chain_config: Dict, global_config: Dict = None) -> Dict:
+# Labels put on every generated service; `validay apply` compares the hash
+# with the running container's to decide what to recreate
+MANAGED_LABEL = 'com.validay.managed'
+CONFIG_HASH_LABEL = 'com.validay.config-hash'
+
+
+def config_hash(service: Dict) -> str:
+    """Hash a service definition, ignoring its labels"""
+    definition = {key: value for key, value in service.items() if key != 'labels'}
+    return hashlib.sha256(json.dumps(definition, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def label_services(compose: Dict):
+    """Mark every service as managed and record its config hash"""
+    for service in compose['services'].values():
+        service['labels'] = {
+            MANAGED_LABEL: 'true',
+            CONFIG_HASH_LABEL: config_hash(service)
+        }
+
+
+def include_file_in_hash(service: Dict, content: str):
+    """Fold a bind-mounted file into a service's config hash, so editing it recreates the service"""
+    labels = service['labels']
+    labels[CONFIG_HASH_LABEL] = hashlib.sha256((labels[CONFIG_HASH_LABEL] + content).encode()).hexdigest()
+
+
+def create_chain_service(chain: ChainConfig, global_config: Dict = None) -> Dict:
     """Create a docker-compose service definition for a chain"""
     if global_config is None:
         global_config = {}
     
-    # Start with defaults from config.yml
-    validator_defaults = global_config.get('validator_defaults', {})
-    state_sync_defaults = global_config.get('state_sync_defaults', {})
-    consensus_defaults = global_config.get('consensus_defaults', {})
-    telemetry_defaults = global_config.get('telemetry_defaults', {})
     docker_config = global_config.get('docker', {})
-    healthcheck_defaults = docker_config.get('healthcheck_defaults', {})
-    logging_defaults = docker_config.get('logging_defaults', {})
-    
-    # Get chain-specific configs from chains.yaml (if present)
-    chain_validator_config = chain_config.get('validator', {})
-    chain_state_sync = chain_config.get('state_sync', {})
-    chain_consensus = chain_config.get('consensus', {})
-    chain_telemetry = chain_config.get('telemetry', {})
-    chain_healthcheck = chain_config.get('healthcheck', {})
-    chain_logging = chain_config.get('docker', {}).get('logging', {})
-    
-    # Merge: chains.yaml overrides > config.yml defaults
-    # Start with defaults, then override with chain-specific values
-    validator_config = {
-        'moniker': chain_validator_config.get('moniker', validator_defaults.get('moniker', '')),
-        'external_ip': chain_validator_config.get('external_ip', validator_defaults.get('external_ip', '')),
-        'name': chain_validator_config.get('name', validator_defaults.get('name', '')),
-        'website': chain_validator_config.get('website', validator_defaults.get('website', '')),
-        'identity': chain_validator_config.get('identity', validator_defaults.get('identity', '')),
-        'details': chain_validator_config.get('details', validator_defaults.get('details', '')),
-        'security_contact': chain_validator_config.get('security_contact', validator_defaults.get('security_contact', '')),
-        'commission_rate': chain_validator_config.get('commission_rate', validator_defaults.get('commission_rate', 0.10)),
-        'commission_max_rate': chain_validator_config.get('commission_max_rate', validator_defaults.get('commission_max_rate', 0.20)),
-        'commission_max_change_rate': chain_validator_config.get('commission_max_change_rate', validator_defaults.get('commission_max_change_rate', 0.01)),
-        'gas_adjustment': chain_validator_config.get('gas_adjustment', validator_defaults.get('gas_adjustment', 1.5))
-    }
-    
-    # Merge state-sync config
-    state_sync_config = {
-        'trust_height_offset': chain_state_sync.get('trust_height_offset', state_sync_defaults.get('trust_height_offset', 2000)),
-        'trust_period': chain_state_sync.get('trust_period', state_sync_defaults.get('trust_period', '168h0m0s'))
-    }
-    
-    # Merge consensus config
-    consensus_config = {
-        'timeout_commit': chain_consensus.get('timeout_commit', consensus_defaults.get('timeout_commit', '5s'))
-    }
     
-    # Merge telemetry config
-    telemetry_config = {
-        'prometheus_retention_time': chain_telemetry.get('prometheus_retention_time', telemetry_defaults.get('prometheus_retention_time', 60))
-    }
+    # Defaults from config.yml are already merged under chains.yaml overrides
+    validator_config = chain.validator
+    state_sync_config = chain.state_sync
+    consensus_config = chain.consensus
+    telemetry_config = chain.telemetry
+    healthcheck_config = chain.healthcheck
+    logging_config = chain.logging
     
-    # Merge healthcheck config
-    healthcheck_config = {
-        'interval': chain_healthcheck.get('interval', healthcheck_defaults.get('interval', '30s')),
-        'timeout': chain_healthcheck.get('timeout', healthcheck_defaults.get('timeout', '10s')),
-        'retries': chain_healthcheck.get('retries', healthcheck_defaults.get('retries', 3)),
-        'start_period': chain_healthcheck.get('start_period', healthcheck_defaults.get('start_period', '120s'))
-    }
-    
-    # Merge logging config
-    logging_config = {
-        'max_size': chain_logging.get('max_size', logging_defaults.get('max_size', '100m')),
-        'max_files': chain_logging.get('max_files', logging_defaults.get('max_files', 3))
-    }
-    
-    # If moniker is empty, use default pattern
-    if not validator_config['moniker']:
-        validator_config['moniker'] = f'{chain_name}-validator'
-    
-    binary_name = chain_config['binary_name']
-    daemon_home = chain_config['daemon_home']
-    ports = chain_config['ports']
+    chain_name = chain.name
+    chain_config = chain.raw
+    binary_name = chain.binary_name
+    daemon_home = chain.daemon_home
     
     # Get Docker platform and restart policy from config
     docker_platform = docker_config.get('platform', 'linux/amd64')
@@ -103,23 +82,18 @@ def create_chain_service(chain_name: str, chain_config: Dict, global_config: Dic
         },
         # Use platform from config (allows amd64 binaries on ARM64 hosts via QEMU)
         'platform': docker_platform,
-        'container_name': f'{chain_name}-validator',
+        'container_name': chain.container_name,
         'restart': restart_policy,
-        'ports': [
-            f"{ports['p2p']}:{ports['p2p']}",      # P2P
-            f"{ports['rpc']}:{ports['rpc']}",      # RPC
-            f"{ports['rest_api']}:{ports['rest_api']}",  # REST API
-            f"{ports['grpc']}:{ports['grpc']}",    # gRPC
-            f"{ports['prometheus']}:{ports['prometheus']}"  # Prometheus metrics
-        ],
+        # P2P, RPC, REST API, gRPC, Prometheus metrics
+        'ports': [f"{port}:{port}" for port in chain.port_list],
         'volumes': [
-            f'{chain_name}-data:{daemon_home}',
+            f'{chain.volume_name}:{daemon_home}',
             './scripts:/scripts:ro'
         ],
         'environment': [
             f"CHAIN_NAME={chain_name}",
             f"CHAIN_ID={chain_config['chain_id']}",
-            f"CHAIN_NETWORK={chain_config.get('chain_name', chain_name.title())}",
+            f"CHAIN_NETWORK={chain.display_name}",
             # Moniker: chains.yaml > config.yml defaults > pattern default
             f"MONIKER={validator_config['moniker']}",
             # External IP: chains.yaml > config.yml defaults
@@ -133,16 +107,20 @@ def create_chain_service(chain_name: str, chain_config: Dict, global_config: Dic
             f"DENOM={chain_config['denom']}",
             f"DENOM_DISPLAY={chain_config['denom_display']}",
             f"DECIMALS={chain_config.get('decimals', 6)}",
-            f"RPC_PORT={ports['rpc']}",
-            f"P2P_PORT={ports['p2p']}",
-            f"BLOCK_TIME_SECONDS={chain_config.get('block_time_seconds', 6)}",
-            f"BLOCK_EXPLORER_URL={chain_config.get('block_explorer_url', '')}",
+            # Listen ports; configure-ports.sh applies them on every start
+            f"RPC_PORT={chain.rpc_port}",
+            f"P2P_PORT={chain.p2p_port}",
+            f"REST_API_PORT={chain.ports['rest_api']}",
+            f"GRPC_PORT={chain.ports['grpc']}",
+            f"PROMETHEUS_PORT={chain.prometheus_port}",
+            f"BLOCK_TIME_SECONDS={chain.block_time_seconds}",
+            f"BLOCK_EXPLORER_URL={chain.block_explorer_url}",
             f"MIN_SELF_DELEGATION={chain_config.get('min_self_delegation', '1000000')}",
             f"GENESIS_URL={chain_config['genesis_url']}",
             f"SNAPSHOT_URL={chain_config['snapshot_url']}",
             f"SNAPSHOT_WASM_URL={chain_config['snapshot_wasm_url']}",
             f"PERSISTENT_PEERS={chain_config['persistent_peers']}",
-            f"STATE_SYNC_RPC={','.join(chain_config['state_sync_rpc'])}",
+            f"STATE_SYNC_RPC={','.join(chain.state_sync_rpc)}",
             f"PRUNING={chain_config['pruning']}",
             f"PRUNING_KEEP_RECENT={chain_config['pruning_keep_recent']}",
             f"PRUNING_KEEP_EVERY={chain_config['pruning_keep_every']}",
@@ -167,7 +145,7 @@ def create_chain_service(chain_name: str, chain_config: Dict, global_config: Dic
             f"PROMETHEUS_RETENTION_TIME={telemetry_config['prometheus_retention_time']}"
         ],
         'secrets': [
-            f'{chain_name}_private_key'
+            chain.secret_name
         ],
         'networks': [docker_config.get('network_name', 'validay-network')],
         'healthcheck': {
@@ -175,7 +153,7 @@ def create_chain_service(chain_name: str, chain_config: Dict, global_config: Dic
                 'CMD',
                 'curl',
                 '-f',
-                f"http://localhost:{ports['rpc']}/health"
+                f"http://localhost:{chain.rpc_port}/health"
             ],
             'interval': healthcheck_config['interval'],
             'timeout': healthcheck_config['timeout'],
@@ -190,10 +168,39 @@ def create_chain_service(chain_name: str, chain_config: Dict, global_config: Dic
             }
         }
     }
+    service.update(create_resource_limits(chain.limits))
     
     return service
 
 
+def create_resource_limits(limits: Dict) -> Dict:
+    """Translate a chain's resource limits into compose service keys"""
+    service = {}
+    if limits.get('cpus') is not None:
+        service['cpus'] = limits['cpus']
+    if limits.get('cpuset') is not None:
+        service['cpuset'] = str(limits['cpuset'])
+    if limits.get('memory') is not None:
+        service['mem_limit'] = limits['memory']
+    if limits.get('memory_reservation') is not None:
+        service['mem_reservation'] = limits['memory_reservation']
+    if limits.get('pids') is not None:
+        service['pids_limit'] = limits['pids']
+    if limits.get('nofile') is not None:
+        service['ulimits'] = {'nofile': {'soft': limits['nofile'], 'hard': limits['nofile']}}
+    
+    # Disk I/O: a relative weight, plus absolute throttles per block device
+    blkio = {}
+    if limits.get('blkio_weight') is not None:
+        blkio['weight'] = limits['blkio_weight']
+    for key in ('device_read_iops', 'device_write_iops', 'device_read_bps', 'device_write_bps'):
+        if limits.get(key):
+            blkio[key] = [{'path': path, 'rate': rate} for path, rate in limits[key].items()]
+    if blkio:
+        service['blkio_config'] = blkio
+    return service
+
+
 def create_prometheus_service(enabled_chains: List[str], global_config: Dict = None) -> Dict:
     """Create Prometheus service with dynamic scrape configs"""
     if global_config is None:
@@ -350,10 +357,13 @@ def create_monitoring_services(global_config: Dict = None) -> Dict:
     }
 
 
-def generate_docker_compose(config: Dict, global_config: Dict = None) -> Dict:
+def generate_docker_compose(config: Dict, global_config: Dict = None,
+                            chains: Dict[str, ChainConfig] = None) -> Dict:
     """Generate the complete docker-compose configuration"""
     if global_config is None:
         global_config = {}
+    if chains is None:
+        chains = build_chain_configs(config, global_config)
     
     docker_config = global_config.get('docker', {})
     network_name = docker_config.get('network_name', 'validay-network')
@@ -372,12 +382,12 @@ def generate_docker_compose(config: Dict, global_config: Dict = None) -> Dict:
     enabled_chains = []
     
     # Add chain services
-    for chain_name, chain_config in config['chains'].items():
-        if chain_config.get('enabled', False):
+    for chain_name, chain in chains.items():
+        if chain.enabled:
             enabled_chains.append(chain_name)
-            compose['services'][f'{chain_name}-validator'] = create_chain_service(chain_name, chain_config, global_config)
-            compose['volumes'][f'{chain_name}-data'] = None
-            compose['secrets'][f'{chain_name}_private_key'] = {
+            compose['services'][chain.container_name] = create_chain_service(chain, global_config)
+            compose['volumes'][chain.volume_name] = None
+            compose['secrets'][chain.secret_name] = {
                 'file': f'./secrets/{chain_name}-private-key.json'
             }
     
@@ -397,22 +407,26 @@ def generate_docker_compose(config: Dict, global_config: Dict = None) -> Dict:
     compose['volumes']['grafana-data'] = None
     compose['volumes']['alertmanager-data'] = None
     
+    label_services(compose)
+    
     return compose
 
 
-def generate_prometheus_config(config: Dict, global_config: Dict = None) -> str:
-    """Generate prometheus.yml configuration for all enabled chains"""
+def build_prometheus_config(config: Dict, global_config: Dict = None,
+                            chains: Dict[str, ChainConfig] = None) -> Dict:
+    """Build the prometheus.yml document for all enabled chains"""
     if global_config is None:
         global_config = {}
+    if chains is None:
+        chains = build_chain_configs(config, global_config)
     
-    enabled_chains = {name: cfg for name, cfg in config['chains'].items() if cfg.get('enabled', False)}
+    enabled_chains = {name: chain for name, chain in chains.items() if chain.enabled}
     
     monitoring_config = global_config.get('monitoring', {})
     retention = monitoring_config.get('prometheus_retention', '15d')
     prometheus_config = monitoring_config.get('prometheus', {})
     global_scrape_interval = prometheus_config.get('global_scrape_interval', '15s')
     global_evaluation_interval = prometheus_config.get('global_evaluation_interval', '15s')
-    chain_scrape_interval = prometheus_config.get('chain_scrape_interval', '10s')
     
     prom_config = {
         'global': {
@@ -432,25 +446,20 @@ def generate_prometheus_config(config: Dict, global_config: Dict = None) -> str:
     }
     
     # Add scrape config for each enabled chain
-    for chain_name, chain_config in enabled_chains.items():
-        prometheus_port = chain_config.get('ports', {}).get('prometheus', 26660)
-        chain_id = chain_config.get('chain_id', '')
-        # Get chain-specific scrape interval if set, otherwise use default
-        chain_monitoring = chain_config.get('monitoring', {})
-        chain_scrape_interval_override = chain_monitoring.get('scrape_interval', chain_scrape_interval)
-        
+    for chain_name, chain in enabled_chains.items():
         scrape_config = {
-            'job_name': f'{chain_name}-validator',
+            'job_name': chain.container_name,
             'static_configs': [{
-                'targets': [f'{chain_name}-validator:{prometheus_port}'],
+                'targets': [f'{chain.container_name}:{chain.prometheus_port}'],
                 'labels': {
-                    'chain': chain_id,
+                    'chain': chain.chain_id,
                     'chain_name': chain_name,
-                    'instance': f'{chain_name}-validator'
+                    'instance': chain.container_name
                 }
             }],
             'metrics_path': '/metrics',
-            'scrape_interval': chain_scrape_interval_override
+            # Chain-specific scrape interval if set, otherwise the default
+            'scrape_interval': chain.scrape_interval
         }
         prom_config['scrape_configs'].append(scrape_config)
     
@@ -473,6 +482,13 @@ def generate_prometheus_config(config: Dict, global_config: Dict = None) -> str:
         }
     ])
     
+    return prom_config
+
+
+def generate_prometheus_config(config: Dict, global_config: Dict = None,
+                               chains: Dict[str, ChainConfig] = None) -> str:
+    """Generate prometheus.yml configuration for all enabled chains"""
+    prom_config = build_prometheus_config(config, global_config, chains)
     return yaml.dump(prom_config, default_flow_style=False, sort_keys=False, width=120)
 
 
@@ -489,44 +505,109 @@ def generate_files(root: Path = None) -> Tuple[Dict, str]:
     # Load configurations
     config = load_chains_config()
     global_config = load_global_config()
+    chains = get_chains()
+    
+    # Fail here rather than when docker-compose cannot bind a port
+    conflicts = find_port_conflicts([chain for chain in chains.values() if chain.enabled], global_config)
+    if conflicts:
+        details = '; '.join(f"{port} ({', '.join(owners)})" for port, owners in conflicts.items())
+        raise ConfigError(
+            f"Host port conflicts: {details}. Change the ports in chains.yaml "
+            f"or set docker.port_allocation.auto_assign in config.yml"
+        )
+    
+    # Pin chains to cores of this host
+    pinning = global_config.get('docker', {}).get('cpu_pinning', {})
+    if pinning.get('enabled', False):
+        cpusets = assign_cpusets([chain for chain in chains.values() if chain.enabled],
+                                 read_cpu_topology(), int(pinning.get('reserve_cores', 0)))
+        chains = dict(chains)
+        for name, cpuset in cpusets.items():
+            chains[name] = chains[name].with_limits(cpuset=cpuset)
     
     # Generate docker-compose
-    compose = generate_docker_compose(config, global_config)
+    compose = generate_docker_compose(config, global_config, chains)
     
     # Generate prometheus.yml
-    prom_config = generate_prometheus_config(config, global_config)
+    prom_config = generate_prometheus_config(config, global_config, chains)
+    
+    # Prometheus reads prometheus.yml from a bind mount, so a change to the
+    # file must also change the service's config hash
+    prometheus_service = compose['services'].get('prometheus')
+    if prometheus_service:
+        include_file_in_hash(prometheus_service, prom_config)
     
     return compose, prom_config
 
 
-def write_files(root: Path = None) -> Tuple[Path, Path]:
+GENERATED_HEADER = (
+    "# Auto-generated by validay config generate from chains.yaml and config.yml\n"
+    "# DO NOT EDIT THIS FILE MANUALLY - Changes will be overwritten\n"
+    "# To make changes, edit chains.yaml or config.yml and run: validay config generate\n\n"
+)
+
+
+def service_hashes(compose: Dict) -> Dict[str, str]:
+    """Hash each service definition of a compose document"""
+    return {
+        name: hashlib.sha256(json.dumps(service, sort_keys=True, default=str).encode()).hexdigest()
+        for name, service in (compose.get('services') or {}).items()
+    }
+
+
+def _read_existing_compose(path: Path) -> Dict:
+    """Parse a previously generated docker-compose.yml, if there is a usable one"""
+    try:
+        return load_yaml(path) or {}
+    except (OSError, yaml.YAMLError):
+        return {}
+
+
+def write_files(root: Path = None) -> Dict:
     """
-    Generate and write docker-compose.yml and prometheus.yml files
+    Generate docker-compose.yml and prometheus.yml, writing only files whose content changed
+    
+    Unchanged files keep their mtime, so tools watching them (and
+    docker-compose) see no change.
     
     Returns:
-        tuple: (docker_compose_path, prometheus_path)
+        dict: compose (the generated document), compose_file, prom_file,
+        compose_written, prom_written and the added, removed and changed
+        service names
     """
     if root is None:
         root = get_project_root()
     
     compose, prom_config = generate_files(root)
     
-    # Write docker-compose.yml
     output_file = root / 'docker-compose.yml'
-    with open(output_file, 'w') as f:
-        f.write("# Auto-generated by validay config generate from chains.yaml and config.yml\n")
-        f.write("# DO NOT EDIT THIS FILE MANUALLY - Changes will be overwritten\n")
-        f.write("# To make changes, edit chains.yaml or config.yml and run: validay config generate\n\n")
-        yaml.dump(compose, f, default_flow_style=False, sort_keys=False, width=120)
-    
-    # Generate prometheus.yml
     prom_file = root / 'prometheus' / 'prometheus.yml'
-    prom_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(prom_file, 'w') as f:
-        f.write("# Auto-generated by validay config generate from chains.yaml and config.yml\n")
-        f.write("# DO NOT EDIT THIS FILE MANUALLY - Changes will be overwritten\n")
-        f.write("# To make changes, edit chains.yaml or config.yml and run: validay config generate\n\n")
-        f.write(prom_config)
+    compose_text = GENERATED_HEADER + yaml.dump(compose, default_flow_style=False, sort_keys=False, width=120)
+    prom_text = GENERATED_HEADER + prom_config
+    
+    # Per-service diff against the file currently on disk
+    old_hashes = service_hashes(_read_existing_compose(output_file)) if output_file.exists() else {}
+    new_hashes = service_hashes(compose)
+    result = {
+        'compose': compose,
+        'compose_file': output_file,
+        'prom_file': prom_file,
+        'compose_written': False,
+        'prom_written': False,
+        'added': sorted(set(new_hashes) - set(old_hashes)),
+        'removed': sorted(set(old_hashes) - set(new_hashes)),
+        'changed': sorted(name for name in set(new_hashes) & set(old_hashes)
+                          if new_hashes[name] != old_hashes[name])
+    }
     
-    return output_file, prom_file
-
+    for path, text, key in ((output_file, compose_text, 'compose_written'),
+                            (prom_file, prom_text, 'prom_written')):
+        try:
+            unchanged = path.read_text() == text
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            write_atomic(path, text)
+            result[key] = True
+    
+    return result
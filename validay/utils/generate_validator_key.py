@@ -1,106 +1,90 @@
 """
 Generate a Tendermint priv_validator_key.json file with mnemonic
+
+The expensive part of deriving keys from a mnemonic is the BIP39 seed
+(2048 rounds of PBKDF2-HMAC-SHA512). It is computed once into a MnemonicSeed
+and shared by the consensus-key and account-address derivations.
 """
 import json
 import base64
 import hashlib
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from mnemonic import Mnemonic
 import bech32
-from bip_utils import Bip39SeedGenerator, Bip44, Bip44Coins, Bip44Changes
+from bip_utils import Bip44, Bip44Coins, Bip44Changes
 
+from .files import write_atomic
 
-def derive_cosmos_address_from_mnemonic(mnemonic_phrase: str, address_prefix: str = "cosmos") -> Optional[str]:
-    """Derive Cosmos account address from mnemonic using BIP44"""
+
+class MnemonicSeed:
+    """BIP39 seed derived once from a mnemonic phrase"""
+    __slots__ = ('mnemonic', 'seed')
+    
+    # Seeds derived (PBKDF2 runs) in this process, reported by `keys bench`
+    derivations = 0
+    
+    def __init__(self, mnemonic_phrase: str, validate: bool = True):
+        mnemo = Mnemonic("english")
+        if validate and not mnemo.check(mnemonic_phrase):
+            raise ValueError("Invalid mnemonic phrase")
+        self.mnemonic = mnemonic_phrase
+        self.seed = mnemo.to_seed(mnemonic_phrase)
+        MnemonicSeed.derivations += 1
+
+
+def derive_seed(mnemonic_phrase: str, validate: bool = True) -> MnemonicSeed:
+    """Run the BIP39 seed derivation for a mnemonic"""
+    return MnemonicSeed(mnemonic_phrase, validate=validate)
+
+
+def derive_account_public_key(seed: MnemonicSeed) -> bytes:
+    """Derive the compressed secp256k1 account public key at m/44'/118'/0'/0/0"""
+    # Create BIP44 object for Cosmos (coin type 118)
+    bip44_mst_key = Bip44.FromSeed(seed.seed, Bip44Coins.COSMOS)
+    bip44_acc_key = bip44_mst_key.Purpose().Coin().Account(0)
+    bip44_chg_key = bip44_acc_key.Change(Bip44Changes.CHAIN_EXT)
+    bip44_addr_key = bip44_chg_key.AddressIndex(0)
+    return bip44_addr_key.PublicKey().RawCompressed().ToBytes()
+
+
+def encode_account_address(public_key_bytes: bytes, address_prefix: str) -> str:
+    """Encode an account public key as a bech32 address"""
+    sha256_hash = hashlib.sha256(public_key_bytes).digest()
     try:
         # Import RIPEMD160 (available via pycryptodome which is a dependency of bip-utils)
         from Crypto.Hash import RIPEMD160
-        
-        # Generate seed from mnemonic
-        seed_bytes = Bip39SeedGenerator(mnemonic_phrase).Generate()
-        
-        # Create BIP44 object for Cosmos (coin type 118)
-        # Cosmos uses BIP44 path: m/44'/118'/0'/0/0
-        bip44_mst_key = Bip44.FromSeed(seed_bytes, Bip44Coins.COSMOS)
-        bip44_acc_key = bip44_mst_key.Purpose().Coin().Account(0)
-        bip44_chg_key = bip44_acc_key.Change(Bip44Changes.CHAIN_EXT)
-        bip44_addr_key = bip44_chg_key.AddressIndex(0)
-        
-        # Get the public key (compressed secp256k1)
-        public_key_bytes = bip44_addr_key.PublicKey().RawCompressed().ToBytes()
-        
         # Cosmos uses RIPEMD160(SHA256(pubkey)) for address derivation
-        sha256_hash = hashlib.sha256(public_key_bytes).digest()
-        ripemd160_hash = RIPEMD160.new(sha256_hash).digest()
-        address_bytes = ripemd160_hash  # RIPEMD160 output is already 20 bytes
-        
-        # Encode with bech32
-        cosmos_address = bech32.bech32_encode(address_prefix, bech32.convertbits(address_bytes, 8, 5, True))
-        
-        return cosmos_address
+        address_bytes = RIPEMD160.new(sha256_hash).digest()
     except ImportError:
-        # Fallback if RIPEMD160 is not available
-        try:
-            # Alternative: use SHA256 only (less accurate but works)
-            seed_bytes = Bip39SeedGenerator(mnemonic_phrase).Generate()
-            bip44_mst_key = Bip44.FromSeed(seed_bytes, Bip44Coins.COSMOS)
-            bip44_acc_key = bip44_mst_key.Purpose().Coin().Account(0)
-            bip44_chg_key = bip44_acc_key.Change(Bip44Changes.CHAIN_EXT)
-            bip44_addr_key = bip44_chg_key.AddressIndex(0)
-            public_key_bytes = bip44_addr_key.PublicKey().RawCompressed().ToBytes()
-            sha256_hash = hashlib.sha256(public_key_bytes).digest()
-            address_bytes = sha256_hash[:20]
-            cosmos_address = bech32.bech32_encode(address_prefix, bech32.convertbits(address_bytes, 8, 5, True))
-            return cosmos_address
-        except Exception:
-            return None
+        # Fallback if RIPEMD160 is not available (less accurate but works)
+        address_bytes = sha256_hash[:20]
+    return bech32.bech32_encode(address_prefix, bech32.convertbits(address_bytes, 8, 5, True))
+
+
+def derive_cosmos_address_from_seed(seed: MnemonicSeed, address_prefix: str = "cosmos") -> Optional[str]:
+    """Derive Cosmos account address from an already-derived seed using BIP44"""
+    try:
+        return encode_account_address(derive_account_public_key(seed), address_prefix)
     except Exception:
-        # Fallback: try alternative derivation
+        # Fallback: use first 20 bytes of seed hash as address (simplified)
         try:
-            # Alternative: use seed directly
-            mnemo = Mnemonic("english")
-            seed = mnemo.to_seed(mnemonic_phrase)
-            
-            # Use first 20 bytes of seed hash as address (simplified)
-            address_bytes = hashlib.sha256(seed).digest()[:20]
-            cosmos_address = bech32.bech32_encode(address_prefix, bech32.convertbits(address_bytes, 8, 5, True))
-            return cosmos_address
+            address_bytes = hashlib.sha256(seed.seed).digest()[:20]
+            return bech32.bech32_encode(address_prefix, bech32.convertbits(address_bytes, 8, 5, True))
         except Exception:
             # If both methods fail, return None (will be handled in caller)
             return None
 
 
-def get_address_prefix(chain_name: Optional[str]) -> str:
-    """Get the bech32 address prefix for a chain"""
-    prefix_map = {
-        'cosmos': 'cosmos',
-        'osmosis': 'osmo',
-        'juno': 'juno',
-        'akash': 'akash',
-        'stargaze': 'stars',
-        'regen': 'regen',
-        'sentinel': 'sent',
-        'persistence': 'persistence',
-        'cryptoorg': 'cro',
-        'iris': 'iaa',
-        'emoney': 'emoney',
-    }
-    return prefix_map.get(chain_name, chain_name if chain_name else 'cosmos')
+def derive_cosmos_address_from_mnemonic(mnemonic_phrase: str, address_prefix: str = "cosmos") -> Optional[str]:
+    """Derive Cosmos account address from mnemonic using BIP44"""
+    return derive_cosmos_address_from_seed(derive_seed(mnemonic_phrase, validate=False), address_prefix)
 
 
-def derive_ed25519_from_mnemonic(mnemonic_phrase: str) -> Ed25519PrivateKey:
-    """Derive Ed25519 private key from mnemonic deterministically"""
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-    
-    # Generate seed from mnemonic
-    mnemo = Mnemonic("english")
-    if not mnemo.check(mnemonic_phrase):
-        raise ValueError("Invalid mnemonic phrase")
-    
-    seed = mnemo.to_seed(mnemonic_phrase)
-    
+def derive_ed25519_from_seed(seed: MnemonicSeed) -> Ed25519PrivateKey:
+    """Derive Ed25519 private key from an already-derived seed deterministically"""
     # Use HKDF to derive Ed25519 private key (32 bytes) from seed
     # Use a specific context for validator keys to differentiate from account keys
     hkdf = HKDF(
@@ -109,118 +93,165 @@ def derive_ed25519_from_mnemonic(mnemonic_phrase: str) -> Ed25519PrivateKey:
         salt=None,
         info=b'cosmos-validator-ed25519-key',
     )
-    private_key_bytes = hkdf.derive(seed)
+    private_key_bytes = hkdf.derive(seed.seed)
     
     # Create Ed25519 private key from derived bytes
-    private_key = Ed25519PrivateKey.from_private_bytes(private_key_bytes)
-    return private_key
+    return Ed25519PrivateKey.from_private_bytes(private_key_bytes)
 
 
-def generate_validator_key_from_mnemonic(mnemonic_phrase: str, output_path: str, chain_name: Optional[str] = None) -> Dict:
-    """Generate priv_validator_key.json from provided mnemonic"""
-    # Derive Ed25519 key from mnemonic
-    private_key = derive_ed25519_from_mnemonic(mnemonic_phrase)
-    public_key = private_key.public_key()
-    
+def derive_ed25519_from_mnemonic(mnemonic_phrase: str) -> Ed25519PrivateKey:
+    """Derive Ed25519 private key from mnemonic deterministically"""
+    return derive_ed25519_from_seed(derive_seed(mnemonic_phrase))
+
+
+def build_key_data(private_key: Ed25519PrivateKey) -> Dict:
+    """Build the priv_validator_key.json structure for an Ed25519 key"""
     # Get raw bytes
     priv_bytes = private_key.private_bytes_raw()
-    pub_bytes = public_key.public_bytes_raw()
-    
-    # Base64 encode
-    priv_b64 = base64.b64encode(priv_bytes).decode('utf-8')
-    pub_b64 = base64.b64encode(pub_bytes).decode('utf-8')
+    pub_bytes = private_key.public_key().public_bytes_raw()
     
     # Calculate validator address (first 20 bytes of SHA256 of public key)
     address_bytes = hashlib.sha256(pub_bytes).digest()[:20]
-    address_hex = address_bytes.hex().upper()
-    
-    # Derive Cosmos account address from mnemonic
-    address_prefix = get_address_prefix(chain_name)
-    cosmos_address = derive_cosmos_address_from_mnemonic(mnemonic_phrase, address_prefix)
     
-    # Create key data structure
-    key_data = {
-        'address': address_hex,
+    return {
+        'address': address_bytes.hex().upper(),
         'pub_key': {
             'type': 'tendermint/PubKeyEd25519',
-            'value': pub_b64
+            'value': base64.b64encode(pub_bytes).decode('utf-8')
         },
         'priv_key': {
             'type': 'tendermint/PrivKeyEd25519',
-            'value': priv_b64
+            'value': base64.b64encode(priv_bytes).decode('utf-8')
         }
     }
+
+
+def encode_consensus_address(address_bytes: bytes, address_prefix: str) -> str:
+    """Encode a validator consensus address as bech32 ({prefix}valcons1...)"""
+    return bech32.bech32_encode(f"{address_prefix}valcons", bech32.convertbits(address_bytes, 8, 5, True))
+
+
+def generate_key_record(address_prefix: str = "cosmos", with_mnemonic: bool = False) -> Dict:
+    """
+    Generate a consensus key in memory, without writing it
+    
+    Without a mnemonic the key is random; with one, the key and account
+    address are derived from a fresh 24-word mnemonic exactly as
+    `keys setup` would derive them, which costs one PBKDF2 run per key.
+    """
+    if with_mnemonic:
+        mnemonic_phrase = Mnemonic("english").generate(strength=256)
+        seed = derive_seed(mnemonic_phrase, validate=False)
+        key_data = build_key_data(derive_ed25519_from_seed(seed))
+    else:
+        key_data = build_key_data(Ed25519PrivateKey.generate())
+    
+    key_data['consensus_address'] = encode_consensus_address(bytes.fromhex(key_data['address']), address_prefix)
+    if with_mnemonic:
+        key_data['account_address'] = derive_cosmos_address_from_seed(seed, address_prefix)
+        key_data['mnemonic'] = mnemonic_phrase
+    return key_data
+
+
+def _write_key_file(key_data: Dict, output_path: str):
+    """Write priv_validator_key.json atomically, readable only by the owner"""
+    write_atomic(output_path, json.dumps(key_data, indent=2), mode=0o600)
+
+
+def generate_validator_key_from_seed(seed: MnemonicSeed, output_path: str,
+                                     address_prefix: str = "cosmos") -> Dict:
+    """Generate priv_validator_key.json from an already-derived seed"""
+    key_data = build_key_data(derive_ed25519_from_seed(seed))
+    
+    # Derive Cosmos account address from the same seed
+    cosmos_address = derive_cosmos_address_from_seed(seed, address_prefix)
     
     # Store account address if derived from mnemonic
     if cosmos_address:
         key_data['account_address'] = cosmos_address
     
-    # Write to file
-    with open(output_path, 'w') as f:
-        json.dump(key_data, f, indent=2)
+    _write_key_file(key_data, output_path)
     
     return {
-        'address_hex': address_hex,
+        'address_hex': key_data['address'],
         'account_address': cosmos_address,
         'address_prefix': address_prefix,
-        'public_key': pub_b64,
+        'public_key': key_data['pub_key']['value'],
         'output_path': output_path
     }
 
 
-def generate_validator_key(output_path: str, chain_name: Optional[str] = None) -> Dict:
+def generate_validator_keys_from_seed(seed: MnemonicSeed, targets: Dict[str, Tuple[str, str]]) -> Dict[str, Dict]:
+    """
+    Generate priv_validator_key.json for many chains from one seed
+    
+    The consensus key and the BIP44 account public key do not depend on the
+    chain, so they are derived once; each chain only costs a bech32 encoding
+    and a file write.
+    
+    Args:
+        seed: Seed derived from the shared mnemonic
+        targets: Mapping of chain name to (output_path, address_prefix)
+    
+    Returns:
+        dict: Per-chain result, as returned by generate_validator_key_from_seed
+    """
+    base_key_data = build_key_data(derive_ed25519_from_seed(seed))
+    try:
+        account_public_key = derive_account_public_key(seed)
+    except Exception:
+        account_public_key = None
+    
+    results = {}
+    for chain_name, (output_path, address_prefix) in targets.items():
+        key_data = dict(base_key_data)
+        if account_public_key is not None:
+            cosmos_address = encode_account_address(account_public_key, address_prefix)
+        else:
+            cosmos_address = derive_cosmos_address_from_seed(seed, address_prefix)
+        if cosmos_address:
+            key_data['account_address'] = cosmos_address
+        
+        _write_key_file(key_data, output_path)
+        
+        results[chain_name] = {
+            'address_hex': key_data['address'],
+            'account_address': cosmos_address,
+            'address_prefix': address_prefix,
+            'public_key': key_data['pub_key']['value'],
+            'output_path': output_path
+        }
+    return results
+
+
+def generate_validator_key_from_mnemonic(mnemonic_phrase: str, output_path: str, address_prefix: str = "cosmos") -> Dict:
+    """Generate priv_validator_key.json from provided mnemonic"""
+    return generate_validator_key_from_seed(derive_seed(mnemonic_phrase), output_path, address_prefix)
+
+
+def generate_validator_key(output_path: str, address_prefix: str = "cosmos") -> Dict:
     """Generate a new Ed25519 key pair for Tendermint validator with mnemonic"""
     # Generate BIP39 mnemonic (24 words)
     mnemo = Mnemonic("english")
     mnemonic_phrase = mnemo.generate(strength=256)
     
     # Generate Ed25519 key pair (for validator consensus)
-    private_key = Ed25519PrivateKey.generate()
-    public_key = private_key.public_key()
-    
-    # Get raw bytes
-    priv_bytes = private_key.private_bytes_raw()
-    pub_bytes = public_key.public_bytes_raw()
-    
-    # Base64 encode
-    priv_b64 = base64.b64encode(priv_bytes).decode('utf-8')
-    pub_b64 = base64.b64encode(pub_bytes).decode('utf-8')
-    
-    # Calculate validator address (first 20 bytes of SHA256 of public key)
-    address_bytes = hashlib.sha256(pub_bytes).digest()[:20]
-    address_hex = address_bytes.hex().upper()
+    key_data = build_key_data(Ed25519PrivateKey.generate())
     
     # Derive Cosmos account address from mnemonic
-    address_prefix = get_address_prefix(chain_name)
-    cosmos_address = derive_cosmos_address_from_mnemonic(mnemonic_phrase, address_prefix)
-    
-    # Create key data structure
-    key_data = {
-        'address': address_hex,
-        'pub_key': {
-            'type': 'tendermint/PubKeyEd25519',
-            'value': pub_b64
-        },
-        'priv_key': {
-            'type': 'tendermint/PrivKeyEd25519',
-            'value': priv_b64
-        }
-    }
+    cosmos_address = derive_cosmos_address_from_seed(derive_seed(mnemonic_phrase, validate=False), address_prefix)
     
     # Store account address if derived from mnemonic
     if cosmos_address:
         key_data['account_address'] = cosmos_address
     
-    # Write to file
-    with open(output_path, 'w') as f:
-        json.dump(key_data, f, indent=2)
+    _write_key_file(key_data, output_path)
     
     return {
         'mnemonic': mnemonic_phrase,
-        'address_hex': address_hex,
+        'address_hex': key_data['address'],
         'account_address': cosmos_address,
         'address_prefix': address_prefix,
-        'public_key': pub_b64,
+        'public_key': key_data['pub_key']['value'],
         'output_path': output_path
     }
-
@@ -0,0 +1,97 @@
+"""Batch consensus-key generation across worker processes"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .generate_validator_key import MnemonicSeed, generate_key_record
+
+# Keys generated per task: large enough to amortize pickling, small enough
+# to keep every worker busy until the end of the run
+CHUNK_SIZE = 256
+
+
+def _generate_chunk(attempts: int, address_prefix: str, with_mnemonic: bool,
+                    vanity: Optional[str]) -> Tuple[int, List[Dict], int]:
+    """Generate a chunk of keys, keeping only those matching the vanity prefix"""
+    records = []
+    derivations = MnemonicSeed.derivations
+    for _ in range(attempts):
+        record = generate_key_record(address_prefix, with_mnemonic)
+        if vanity is None or record['address'].startswith(vanity):
+            records.append(record)
+    return attempts, records, MnemonicSeed.derivations - derivations
+
+
+def generate_keys(count: int, on_records: Callable[[List[Dict]], None],
+                  workers: Optional[int] = None, address_prefix: str = "cosmos",
+                  with_mnemonic: bool = False, vanity: Optional[str] = None) -> Dict:
+    """
+    Generate `count` keys across `workers` processes
+    
+    Each chunk of results is handed to `on_records` in the calling process
+    as soon as it arrives. With `vanity`, keys are generated until `count`
+    of them have a hex address starting with that prefix. The BIP39 seed
+    derivations (PBKDF2 runs) behind the attempts are counted as well.
+    
+    Returns:
+        dict: keys, attempts, elapsed (seconds), workers, pbkdf2_runs
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    vanity = vanity.upper() if vanity else None
+    started = time.perf_counter()
+    attempts = 0
+    produced = 0
+    pbkdf2_runs = 0
+    
+    def _consume(chunk_attempts: int, records: List[Dict], chunk_pbkdf2_runs: int):
+        nonlocal attempts, produced, pbkdf2_runs
+        attempts += chunk_attempts
+        pbkdf2_runs += chunk_pbkdf2_runs
+        records = records[:count - produced]
+        if records:
+            produced += len(records)
+            on_records(records)
+    
+    def _next_chunk() -> int:
+        # Without a vanity filter every attempt yields a key, so never
+        # schedule more than is still needed
+        if vanity is None:
+            return min(CHUNK_SIZE, count - produced - in_flight_attempts)
+        return CHUNK_SIZE
+    
+    if workers == 1:
+        in_flight_attempts = 0
+        while produced < count:
+            _consume(*_generate_chunk(_next_chunk(), address_prefix, with_mnemonic, vanity))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            in_flight_attempts = 0
+            while produced < count:
+                # Keep two chunks queued per worker
+                while len(pending) < workers * 2:
+                    size = _next_chunk()
+                    if size <= 0:
+                        break
+                    future = executor.submit(_generate_chunk, size, address_prefix, with_mnemonic, vanity)
+                    pending[future] = size
+                    in_flight_attempts += size
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight_attempts -= pending.pop(future)
+                    if produced < count:
+                        _consume(*future.result())
+            
+            for future in pending:
+                future.cancel()
+    
+    return {
+        'keys': produced,
+        'attempts': attempts,
+        'elapsed': time.perf_counter() - started,
+        'workers': workers,
+        'pbkdf2_runs': pbkdf2_runs,
+    }
@@ -0,0 +1,130 @@
+"""
+Live container resource usage from streaming Engine API stats
+
+Each running container gets one long-lived `stats?stream=true` connection
+read by a daemon thread, which keeps only the latest cumulative counters.
+With a cgroup sampler the counters are instead read from cgroup v2 files
+at every refresh. Rates are computed in process between two readings, so
+a refresh costs no docker calls beyond listing containers.
+"""
+
+import time
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+from .cgroup import CgroupSampler
+from .docker_api import DockerAPI
+from .errors import DockerError
+from .profiler import Counters, counters_from_stats, sample_between
+
+
+class Reading(NamedTuple):
+    """Counters of a container and when they were received"""
+    counters: Counters
+    memory_limit: int
+    received: float
+
+
+class ContainerUsage(NamedTuple):
+    """Resource usage of a container between two readings"""
+    name: str
+    cpu: float
+    memory: int
+    memory_limit: int
+    net_rx: float
+    net_tx: float
+    disk_read: float
+    disk_write: float
+
+
+class StatsWatcher:
+    """Follows the counters of running containers and turns readings into rates"""
+    
+    def __init__(self, api: Optional[DockerAPI] = None, sampler: Optional[CgroupSampler] = None):
+        self.api = api or DockerAPI()
+        self.sampler = sampler
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Reading] = {}
+        self._previous: Dict[str, Reading] = {}
+        self._rates: Dict[str, ContainerUsage] = {}
+        self._streams: Dict[str, threading.Thread] = {}
+    
+    def _follow(self, name: str):
+        """Read a container's stats stream until it ends"""
+        try:
+            for stats in self.api.stream_container_stats(name):
+                counters = counters_from_stats(stats)
+                if counters is None:
+                    continue
+                limit = (stats.get('memory_stats') or {}).get('limit', 0)
+                with self._lock:
+                    self._latest[name] = Reading(counters, limit, time.monotonic())
+        except DockerError:
+            pass
+        finally:
+            with self._lock:
+                self._latest.pop(name, None)
+                self._streams.pop(name, None)
+    
+    def refresh_containers(self) -> List[str]:
+        """Start streams for containers that started since the last refresh"""
+        names = sorted(container['Names'][0].lstrip('/') for container in self.api.list_containers()
+                       if container.get('Names'))
+        self._names = names
+        if self.sampler is not None:
+            return names
+        with self._lock:
+            for name in names:
+                if name not in self._streams:
+                    thread = threading.Thread(target=self._follow, args=(name,), daemon=True)
+                    self._streams[name] = thread
+                    thread.start()
+        return names
+    
+    def usage(self) -> List[ContainerUsage]:
+        """
+        Get each container's usage between its two most recently used readings
+        
+        Rates only move forward when a new reading has arrived, so refreshing
+        faster than the daemon samples (about once a second) repeats the last
+        rates. A container seen for the first time is left out until its
+        second reading.
+        """
+        if self.sampler is not None:
+            now = time.monotonic()
+            latest = {name: Reading(counters, limit, now)
+                      for name, (counters, limit) in self.sampler.read(self._names).items()}
+        else:
+            with self._lock:
+                latest = dict(self._latest)
+        
+        for name, reading in latest.items():
+            previous = self._previous.get(name)
+            if previous is not None and reading.received <= previous.received:
+                continue
+            if previous is not None:
+                sample = sample_between(previous.counters, reading.counters,
+                                        reading.received - previous.received, 0)
+                if sample is not None:
+                    self._rates[name] = ContainerUsage(name, sample.cpu, sample.memory, reading.memory_limit,
+                                                       sample.net_rx, sample.net_tx,
+                                                       sample.disk_read, sample.disk_write)
+            self._previous[name] = reading
+        
+        for name in set(self._previous) - set(latest):
+            del self._previous[name]
+            self._rates.pop(name, None)
+        return list(self._rates.values())
+
+
+def sort_usage(usage: List[ContainerUsage], key: str) -> List[ContainerUsage]:
+    """Sort usage rows, busiest first (alphabetically for 'name')"""
+    if key == 'name':
+        return sorted(usage, key=lambda u: u.name)
+    keys = {
+        'cpu': lambda u: u.cpu,
+        'memory': lambda u: u.memory,
+        'network': lambda u: u.net_rx + u.net_tx
+    }
+    return sorted(usage, key=lambda u: (-keys[key](u), u.name))
@@ -0,0 +1,336 @@
+"""
+Placement of enabled chains across several hosts
+
+The host inventory (placement.hosts in config.yml) gives each machine a
+capacity in CPUs, memory, disk and disk IOPS; each chain declares what it
+needs under `resources` in chains.yaml, falling back to
+placement.default_profile. Chains are packed first-fit decreasing, largest
+first, while honouring pins, anti-affinity and host port collisions. The
+previous placement is read back and every chain that still fits stays where
+it was, so re-running only moves what has to move.
+
+Each host gets its own docker-compose.yml and prometheus/prometheus.yml;
+the central host additionally runs Grafana and Alertmanager and federates
+the Prometheus of every other host.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional
+
+import yaml
+
+from ..models import ChainConfig, PORT_ROLES
+from .errors import ConfigError, PlacementError
+from .files import write_atomic
+from .generate_compose import (
+    build_prometheus_config, create_monitoring_services,
+    create_prometheus_service, generate_docker_compose, include_file_in_hash, label_services
+)
+from .ports import find_port_conflicts
+
+RESOURCES = ('cpus', 'memory', 'disk', 'iops')
+
+DEFAULT_PROFILE = {
+    'cpus': 2,
+    'memory': '8G',
+    'disk': '500G',
+    'iops': 1000
+}
+
+STATE_FILE = 'placement.yml'
+
+# libyaml's emitter; per-host files are dumped for every chain on every run
+SafeDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+PLACEMENT_HEADER = (
+    "# Auto-generated by validay place from chains.yaml and config.yml\n"
+    "# DO NOT EDIT THIS FILE MANUALLY - Changes will be overwritten\n\n"
+)
+
+# Services only the central host runs
+CENTRAL_SERVICES = ('grafana', 'alertmanager')
+
+_SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGTP]?)(?:I?B)?\s*$', re.IGNORECASE)
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4, 'P': 1024 ** 5}
+
+
+class Host(NamedTuple):
+    """A machine from the placement inventory"""
+    name: str
+    address: str
+    capacity: Dict[str, float]
+
+
+class ChainProfile(NamedTuple):
+    """What a chain needs from the host it is placed on"""
+    name: str
+    demand: Dict[str, float]
+    ports: FrozenSet[int]
+    anti_affinity: FrozenSet[str]
+    pinned: Optional[str]
+
+
+def parse_size(value) -> int:
+    """Parse a byte size such as 512M, 64G or 2T (binary units); plain numbers are bytes"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _SIZE_PATTERN.match(str(value))
+    if not match:
+        raise ValueError(f"invalid size '{value}'")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(size: float) -> str:
+    """Format a byte count with the largest unit that keeps it above 1"""
+    for unit in ('P', 'T', 'G', 'M', 'K'):
+        if size >= _SIZE_UNITS[unit]:
+            return f"{size / _SIZE_UNITS[unit]:.4g}{unit}"
+    return f"{int(size)}"
+
+
+def _parse_amounts(raw: Dict, where: str) -> Dict[str, float]:
+    """Parse a cpus/memory/disk/iops mapping"""
+    try:
+        return {
+            'cpus': float(raw['cpus']),
+            'memory': parse_size(raw['memory']),
+            'disk': parse_size(raw['disk']),
+            'iops': int(raw['iops'])
+        }
+    except KeyError as e:
+        raise ConfigError(f"{where}: missing {e.args[0]}")
+    except (TypeError, ValueError) as e:
+        raise ConfigError(f"{where}: {e}")
+
+
+def load_inventory(global_config: Dict) -> Dict[str, Host]:
+    """Read the host inventory from placement.hosts in config.yml"""
+    hosts = global_config.get('placement', {}).get('hosts') or {}
+    if not hosts:
+        raise ConfigError("No hosts configured under placement.hosts in config.yml")
+    inventory = {}
+    for name, raw in hosts.items():
+        raw = raw or {}
+        if not raw.get('address'):
+            raise ConfigError(f"placement.hosts.{name}: missing address")
+        inventory[name] = Host(name, str(raw['address']), _parse_amounts(raw, f"placement.hosts.{name}"))
+    return inventory
+
+
+def load_profiles(chains: Iterable[ChainConfig], global_config: Dict) -> Dict[str, ChainProfile]:
+    """Build the resource profile of every chain"""
+    defaults = dict(DEFAULT_PROFILE)
+    defaults.update(global_config.get('placement', {}).get('default_profile') or {})
+    profiles = {}
+    for chain in chains:
+        resources = dict(defaults)
+        resources.update(chain.get('resources') or {})
+        placement = chain.get('placement') or {}
+        profiles[chain.name] = ChainProfile(
+            name=chain.name,
+            demand=_parse_amounts(resources, f"chains.{chain.name}.resources"),
+            ports=frozenset(chain.ports[role] for role in PORT_ROLES),
+            anti_affinity=frozenset(placement.get('anti_affinity') or ()),
+            pinned=placement.get('host')
+        )
+    return profiles
+
+
+def _dominant_share(profile: ChainProfile, total: Dict[str, float]) -> float:
+    """The largest fraction of the fleet's capacity of any resource the chain needs"""
+    return max(profile.demand[r] / total[r] if total[r] else 0.0 for r in RESOURCES)
+
+
+def place_chains(profiles: Dict[str, ChainProfile], hosts: Dict[str, Host],
+                 previous: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Assign every chain to a host
+    
+    Pinned chains are placed first, then chains keep their previous host
+    while it still has room, then the rest are placed first-fit decreasing
+    by dominant resource share, over hosts in inventory order. Previous
+    placements are re-admitted smallest first, so a host that no longer
+    fits everything evicts as few chains as possible.
+    
+    Returns:
+        dict: chain name -> host name
+    Raises:
+        PlacementError: if some chains cannot be placed
+    """
+    previous = previous or {}
+    free = {name: dict(host.capacity) for name, host in hosts.items()}
+    residents: Dict[str, List[ChainProfile]] = {name: [] for name in hosts}
+    placement: Dict[str, str] = {}
+    failures: List[str] = []
+    
+    total = {r: sum(host.capacity[r] for host in hosts.values()) for r in RESOURCES}
+    order = sorted(profiles.values(), key=lambda p: (-_dominant_share(p, total), p.name))
+    
+    def _conflict(profile: ChainProfile, host_name: str) -> Optional[str]:
+        for r in RESOURCES:
+            if profile.demand[r] > free[host_name][r]:
+                return f"not enough {r}"
+        for other in residents[host_name]:
+            if other.name in profile.anti_affinity or profile.name in other.anti_affinity:
+                return f"anti-affinity with {other.name}"
+            if profile.ports & other.ports:
+                return f"port collision with {other.name}"
+        return None
+    
+    def _assign(profile: ChainProfile, host_name: str):
+        for r in RESOURCES:
+            free[host_name][r] -= profile.demand[r]
+        residents[host_name].append(profile)
+        placement[profile.name] = host_name
+    
+    for profile in order:
+        if profile.pinned is None:
+            continue
+        if profile.pinned not in hosts:
+            failures.append(f"{profile.name}: pinned to unknown host '{profile.pinned}'")
+            continue
+        reason = _conflict(profile, profile.pinned)
+        if reason:
+            failures.append(f"{profile.name}: does not fit on pinned host {profile.pinned} ({reason})")
+        else:
+            _assign(profile, profile.pinned)
+    
+    for profile in reversed(order):
+        host_name = previous.get(profile.name)
+        if profile.name not in placement and profile.pinned is None and host_name in hosts:
+            if _conflict(profile, host_name) is None:
+                _assign(profile, host_name)
+    
+    for profile in order:
+        if profile.name in placement or profile.pinned is not None:
+            continue
+        for host_name in hosts:
+            if _conflict(profile, host_name) is None:
+                _assign(profile, host_name)
+                break
+        else:
+            reasons = ', '.join(f"{host_name}: {_conflict(profile, host_name)}" for host_name in hosts)
+            failures.append(f"{profile.name}: no host has room ({reasons})")
+    
+    if failures:
+        raise PlacementError("Cannot place all chains:\n  " + "\n  ".join(failures))
+    return placement
+
+
+def host_usage(placement: Dict[str, str], profiles: Dict[str, ChainProfile],
+               hosts: Dict[str, Host]) -> Dict[str, Dict[str, float]]:
+    """Sum the demand of the chains placed on each host"""
+    usage = {name: {r: 0.0 for r in RESOURCES} for name in hosts}
+    for chain_name, host_name in placement.items():
+        for r in RESOURCES:
+            usage[host_name][r] += profiles[chain_name].demand[r]
+    return usage
+
+
+def read_placement(output_dir: Path) -> Dict[str, str]:
+    """Read the placement written by the previous run, if any"""
+    try:
+        with open(output_dir / STATE_FILE) as f:
+            state = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        return {}
+    return {chain: host for host, chains in (state.get('hosts') or {}).items() for chain in chains or ()}
+
+
+def render_placement(chains_config: Dict, global_config: Dict, chains: Dict[str, ChainConfig],
+                     placement: Dict[str, str], hosts: Dict[str, Host], central: str) -> Dict[str, str]:
+    """
+    Render the per-host compose and Prometheus files
+    
+    Returns:
+        dict: path relative to the output directory -> file content
+    """
+    monitoring_ports = global_config.get('monitoring', {}).get('ports', {})
+    prometheus_port = monitoring_ports.get('prometheus', 9091)
+    alertmanager_port = monitoring_ports.get('alertmanager', 9093)
+    central_address = hosts[central].address
+    network_name = global_config.get('docker', {}).get('network_name', 'validay-network')
+    files = {}
+    
+    for host_name, host in hosts.items():
+        host_chains = {name: chain for name, chain in chains.items() if placement.get(name) == host_name}
+        is_central = host_name == central
+        
+        conflicts = find_port_conflicts(host_chains.values(), global_config)
+        if conflicts:
+            details = '; '.join(f"{port} ({', '.join(owners)})" for port, owners in conflicts.items())
+            raise PlacementError(f"Host port conflicts on {host_name}: {details}")
+        
+        if host_chains:
+            compose = generate_docker_compose(chains_config, global_config, host_chains)
+        else:
+            compose = {'services': {}, 'networks': {}, 'volumes': {}, 'secrets': {}}
+            if is_central:
+                # The central host runs the shared monitoring stack even without chains
+                compose['networks'] = {network_name: {'driver': 'bridge'}}
+                compose['services']['prometheus'] = create_prometheus_service([], global_config)
+                compose['services'].update(create_monitoring_services(global_config))
+                compose['volumes'] = {'prometheus-data': None, 'grafana-data': None, 'alertmanager-data': None}
+                label_services(compose)
+        if not is_central:
+            for service in CENTRAL_SERVICES:
+                compose['services'].pop(service, None)
+                compose['volumes'].pop(f'{service}-data', None)
+        
+        prom_config = build_prometheus_config(chains_config, global_config, host_chains)
+        prom_config['global']['external_labels']['host'] = host_name
+        for job in prom_config['scrape_configs']:
+            if job['job_name'] == 'node-exporter':
+                job['static_configs'][0]['labels']['instance'] = host_name
+        if is_central:
+            others = [f"{other.address}:{prometheus_port}" for other in hosts.values()
+                      if other.name != central and other.name in placement.values()]
+            if others:
+                prom_config['scrape_configs'].append({
+                    'job_name': 'federate',
+                    'honor_labels': True,
+                    'metrics_path': '/federate',
+                    'params': {'match[]': ['{job=~".+"}']},
+                    'static_configs': [{'targets': others}]
+                })
+        else:
+            prom_config['alerting']['alertmanagers'][0]['static_configs'][0]['targets'] = [
+                f"{central_address}:{alertmanager_port}"
+            ]
+            prom_config['scrape_configs'] = [job for job in prom_config['scrape_configs']
+                                             if job['job_name'] != 'alertmanager']
+        prom_text = yaml.dump(prom_config, Dumper=SafeDumper, default_flow_style=False, sort_keys=False, width=120)
+        
+        if 'prometheus' in compose['services']:
+            include_file_in_hash(compose['services']['prometheus'], prom_text)
+        
+        files[f"{host_name}/docker-compose.yml"] = PLACEMENT_HEADER + yaml.dump(
+            compose, Dumper=SafeDumper, default_flow_style=False, sort_keys=False, width=120)
+        files[f"{host_name}/prometheus/prometheus.yml"] = PLACEMENT_HEADER + prom_text
+    
+    state = {
+        'central': central,
+        'hosts': {host_name: sorted(name for name, h in placement.items() if h == host_name)
+                  for host_name in hosts}
+    }
+    files[STATE_FILE] = (
+        "# Written by validay place; chains stay on these hosts while they fit\n"
+        + yaml.dump(state, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
+    )
+    return files
+
+
+def write_placement_files(output_dir: Path, files: Dict[str, str]) -> List[str]:
+    """Write the rendered files whose content changed; returns their relative paths"""
+    written = []
+    for relative, content in files.items():
+        path = output_dir / relative
+        try:
+            unchanged = path.read_text() == content
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            write_atomic(path, content)
+            written.append(relative)
+    return written
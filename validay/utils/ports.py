@@ -0,0 +1,88 @@
+"""Host port allocation for chain and monitoring services"""
+
+from typing import Dict, Iterable, List
+
+from ..models import ChainConfig, DEFAULT_PORTS, PORT_ROLES
+
+# Monitoring services publish these host ports (monitoring.ports in config.yml)
+MONITORING_PORTS = {
+    'prometheus': 9091,
+    'grafana': 3001,
+    'alertmanager': 9093,
+    'node_exporter': 9100
+}
+
+MAX_PORT = 65535
+
+
+def get_monitoring_ports(global_config: Dict) -> Dict[str, int]:
+    """Get the host ports published by the monitoring services"""
+    configured = global_config.get('monitoring', {}).get('ports', {})
+    return {name: int(configured.get(name, default)) for name, default in MONITORING_PORTS.items()}
+
+
+def build_port_index(chains: Iterable[ChainConfig], global_config: Dict) -> Dict[int, List[str]]:
+    """
+    Map every published host port to the services using it
+    
+    Owners are named "<chain>.<role>" for chains and "monitoring.<service>"
+    for the shared monitoring stack.
+    """
+    index: Dict[int, List[str]] = {}
+    for name, port in get_monitoring_ports(global_config).items():
+        index.setdefault(port, []).append(f"monitoring.{name}")
+    for chain in chains:
+        for role in PORT_ROLES:
+            index.setdefault(chain.ports[role], []).append(f"{chain.name}.{role}")
+    return index
+
+
+def find_port_conflicts(chains: Iterable[ChainConfig], global_config: Dict) -> Dict[int, List[str]]:
+    """Get every host port published by more than one service"""
+    return {port: owners for port, owners in sorted(build_port_index(chains, global_config).items())
+            if len(owners) > 1}
+
+
+def assign_ports(chains: Iterable[ChainConfig], global_config: Dict, stride: int = 100) -> Dict[str, Dict[str, int]]:
+    """
+    Move chains off colliding ports
+    
+    Every chain whose configured ports are free keeps them; those blocks are
+    reserved before anything moves, so a block laid out by hand is never
+    taken by a relocated chain. When chains collide, the first in chains.yaml
+    order keeps its ports and the others get the first free block of the
+    default ports shifted by a multiple of `stride`. The result only depends
+    on the chain order and the configured ports, so the same chains.yaml
+    always yields the same ports.
+    
+    Returns:
+        dict: chain name -> new ports, for the chains that were moved
+    """
+    if stride <= 0:
+        raise ValueError("stride must be positive")
+    taken = set(get_monitoring_ports(global_config).values())
+    colliding = []
+    for chain in chains:
+        wanted = [chain.ports[role] for role in PORT_ROLES]
+        if len(set(wanted)) == len(wanted) and taken.isdisjoint(wanted):
+            taken.update(wanted)
+        else:
+            colliding.append(chain)
+    
+    moved = {}
+    # Ports are only ever added to `taken`, so a block found busy stays busy
+    # and the search can resume where the previous one stopped
+    slot = 0
+    for chain in colliding:
+        while True:
+            candidate = {role: DEFAULT_PORTS[role] + slot * stride for role in PORT_ROLES}
+            ports = list(candidate.values())
+            if max(ports) > MAX_PORT:
+                raise ValueError(f"No free port block left for chain '{chain.name}'")
+            if len(set(ports)) == len(ports) and taken.isdisjoint(ports):
+                break
+            slot += 1
+        
+        taken.update(ports)
+        moved[chain.name] = candidate
+    return moved
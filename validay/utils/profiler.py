@@ -0,0 +1,207 @@
+"""
+Per-chain resource usage history for right-sizing limits
+
+The collector stores one fixed-size record per sample in a ring buffer file
+per container: a small header followed by `capacity` records, overwritten
+oldest first. A week of 10-second samples is about 2 MB per chain, and the
+file never grows past its initial size.
+"""
+
+import os
+import math
+import struct
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+# timestamp (s), CPU (cores), memory (bytes), net rx/tx, disk read/write (bytes/s)
+RECORD = struct.Struct('<IfQffff')
+# magic, format version, record size, capacity, next slot, records written
+HEADER = struct.Struct('<4sHHIIQ')
+MAGIC = b'VDPR'
+VERSION = 1
+
+FIELDS = ('cpu', 'memory', 'net_rx', 'net_tx', 'disk_read', 'disk_write')
+
+# Headroom applied to observed usage when suggesting limits
+CPU_HEADROOM = 1.5
+MEMORY_HEADROOM = 1.25
+MEMORY_STEP = 256 * 1024 ** 2
+
+
+class Counters(NamedTuple):
+    """Cumulative counters of a container at one point in time"""
+    cpu_ns: int
+    memory: int
+    net_rx: int
+    net_tx: int
+    disk_read: int
+    disk_write: int
+
+
+class Sample(NamedTuple):
+    """Usage over one sampling interval"""
+    timestamp: int
+    cpu: float
+    memory: int
+    net_rx: float
+    net_tx: float
+    disk_read: float
+    disk_write: float
+
+
+def counters_from_stats(stats: Dict) -> Optional[Counters]:
+    """Extract cumulative counters from an Engine API stats document"""
+    cpu_stats = stats.get('cpu_stats') or {}
+    memory_stats = stats.get('memory_stats') or {}
+    total_usage = (cpu_stats.get('cpu_usage') or {}).get('total_usage')
+    if total_usage is None or 'usage' not in memory_stats:
+        # Stopped containers report empty stats
+        return None
+    
+    # Like `docker stats`, don't count reclaimable page cache as used memory
+    memory_detail = memory_stats.get('stats') or {}
+    cache = memory_detail.get('inactive_file', memory_detail.get('total_inactive_file', 0))
+    memory = max(0, memory_stats['usage'] - cache)
+    
+    net_rx = net_tx = 0
+    for interface in (stats.get('networks') or {}).values():
+        net_rx += interface.get('rx_bytes', 0)
+        net_tx += interface.get('tx_bytes', 0)
+    
+    disk_read = disk_write = 0
+    for entry in (stats.get('blkio_stats') or {}).get('io_service_bytes_recursive') or ():
+        op = entry.get('op', '').lower()
+        if op == 'read':
+            disk_read += entry.get('value', 0)
+        elif op == 'write':
+            disk_write += entry.get('value', 0)
+    
+    return Counters(total_usage, memory, net_rx, net_tx, disk_read, disk_write)
+
+
+def sample_between(previous: Counters, current: Counters, elapsed: float, timestamp: int) -> Optional[Sample]:
+    """Turn two counter readings into rates; None if the counters went backwards (a restart)"""
+    if elapsed <= 0:
+        return None
+    deltas = (current.cpu_ns - previous.cpu_ns, current.net_rx - previous.net_rx,
+              current.net_tx - previous.net_tx, current.disk_read - previous.disk_read,
+              current.disk_write - previous.disk_write)
+    if min(deltas) < 0:
+        return None
+    cpu_ns, net_rx, net_tx, disk_read, disk_write = deltas
+    return Sample(timestamp, cpu_ns / 1e9 / elapsed, current.memory,
+                  net_rx / elapsed, net_tx / elapsed, disk_read / elapsed, disk_write / elapsed)
+
+
+class RingBuffer:
+    """A fixed-size on-disk ring of samples"""
+    
+    def __init__(self, path: Path, capacity: int):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        header = os.pread(self.fd, HEADER.size, 0)
+        if len(header) == HEADER.size:
+            magic, version, record_size, self.capacity, self.next, self.written = HEADER.unpack(header)
+            if magic == MAGIC and version == VERSION and record_size == RECORD.size and self.capacity:
+                return
+        # New or unreadable file: start over with the requested capacity
+        self.capacity, self.next, self.written = capacity, 0, 0
+        os.ftruncate(self.fd, 0)
+        os.ftruncate(self.fd, HEADER.size + capacity * RECORD.size)
+        self._write_header()
+    
+    def _write_header(self):
+        os.pwrite(self.fd, HEADER.pack(MAGIC, VERSION, RECORD.size, self.capacity, self.next, self.written), 0)
+    
+    def append(self, sample: Sample):
+        """Store a sample, overwriting the oldest once the ring is full"""
+        os.pwrite(self.fd, RECORD.pack(*sample), HEADER.size + self.next * RECORD.size)
+        self.next = (self.next + 1) % self.capacity
+        self.written += 1
+        self._write_header()
+    
+    def read(self, since: int = 0) -> List[Sample]:
+        """Get the stored samples taken at or after `since`, oldest first"""
+        return _read_records(self.fd, self.capacity, self.next, self.written, since)
+    
+    def close(self):
+        os.close(self.fd)
+
+
+def _read_records(fd: int, capacity: int, next_slot: int, written: int, since: int) -> List[Sample]:
+    """Read a ring's records in the order they were written"""
+    count = min(written, capacity)
+    data = os.pread(fd, capacity * RECORD.size, HEADER.size)
+    start = next_slot if written >= capacity else 0
+    samples = []
+    for i in range(count):
+        sample = Sample(*RECORD.unpack_from(data, ((start + i) % capacity) * RECORD.size))
+        if sample.timestamp >= since:
+            samples.append(sample)
+    return samples
+
+
+def read_ring(path: Path, since: int = 0) -> List[Sample]:
+    """Read the samples of a ring file without opening it for writing"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        header = os.pread(fd, HEADER.size, 0)
+        if len(header) < HEADER.size:
+            return []
+        magic, version, record_size, capacity, next_slot, written = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size or not capacity:
+            return []
+        return _read_records(fd, capacity, next_slot, written, since)
+    finally:
+        os.close(fd)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def summarize(samples: List[Sample]) -> Dict[str, Dict[str, float]]:
+    """p50, p95 and max of every field"""
+    summary = {}
+    for index, field in enumerate(FIELDS, start=1):
+        values = sorted(sample[index] for sample in samples)
+        summary[field] = {
+            'p50': percentile(values, 0.50),
+            'p95': percentile(values, 0.95),
+            'max': values[-1] if values else 0.0
+        }
+    return summary
+
+
+def suggest_limits(summary: Dict[str, Dict[str, float]]) -> Dict[str, object]:
+    """
+    Suggest `docker.limits` values from observed usage
+    
+    The CPU quota leaves headroom over p95 for catch-up bursts; it only
+    throttles. The memory limit is set over the observed maximum because
+    hitting it gets the node OOM-killed, and the reservation is the median.
+    """
+    cpus = math.ceil(summary['cpu']['p95'] * CPU_HEADROOM * 2) / 2 or 0.5
+    memory = math.ceil(summary['memory']['max'] * MEMORY_HEADROOM / MEMORY_STEP) * MEMORY_STEP or MEMORY_STEP
+    reservation = math.ceil(summary['memory']['p50'] / MEMORY_STEP) * MEMORY_STEP or MEMORY_STEP
+    return {
+        'cpus': cpus,
+        'memory': f"{memory // 1024 ** 2}m",
+        'memory_reservation': f"{reservation // 1024 ** 2}m"
+    }
+
+
+def parse_window(value: str) -> int:
+    """Parse a window such as 90m, 24h or 7d into seconds"""
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    value = value.strip().lower()
+    try:
+        if value and value[-1] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+        return int(value)
+    except ValueError:
+        raise ValueError(f"invalid window '{value}' (examples: 90m, 24h, 7d)")
@@ -0,0 +1,134 @@
+"""
+Health-gated wave scheduling for starting or restarting many chains
+
+Starting every chain at once after host maintenance makes all of them
+replay their WAL and catch up together, saturating disk IO; one at a time
+takes too long. The scheduler keeps at most `concurrency` chains starting:
+each opening is filled with the next chains by priority (one batched
+docker operation per wave), and a chain frees its slot once its container
+is healthy and its node reports catching_up false, or once it fails.
+"""
+
+import json
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from ..models import ChainConfig
+from .docker import get_health_states, exec_in_container
+from .errors import ValidatorError
+
+POLL_INTERVAL = 5.0
+STATUS_TIMEOUT = 5.0
+
+# Container states that are still on their way to healthy
+_PENDING_STATES = ('starting', 'created', 'restarting')
+
+# Container states a chain cannot recover from without intervention; any
+# other state, including a failing healthcheck, is waited on until timeout
+_FAILED_STATES = ('exited', 'dead', 'missing')
+
+
+class WaveResult(NamedTuple):
+    """How a chain came up"""
+    chain: str
+    wave: int
+    state: str
+    healthy_after: Optional[float]
+    ready_after: Optional[float]
+
+
+def order_by_priority(chains: List[ChainConfig]) -> List[ChainConfig]:
+    """Order chains highest priority first, keeping chains.yaml order among equals"""
+    return sorted(chains, key=lambda chain: -chain.priority)
+
+
+def is_caught_up(chain: ChainConfig) -> Optional[bool]:
+    """
+    Ask a node's RPC /status whether it has caught up; None if it does not answer
+    
+    The request is made inside the container, like the healthcheck, so it
+    works whichever interface the node's RPC listens on.
+    """
+    command = ['curl', '-sf', '--max-time', str(int(STATUS_TIMEOUT)), f"http://localhost:{chain.rpc_port}/status"]
+    try:
+        result = exec_in_container(chain.container_name, command, timeout=STATUS_TIMEOUT + 5)
+        if result.returncode != 0:
+            return None
+        sync_info = json.loads(result.stdout)['result']['sync_info']
+        return not sync_info['catching_up']
+    except (ValidatorError, ValueError, KeyError, TypeError):
+        return None
+
+
+def run_waves(chains: List[ChainConfig], operation: Callable[[List[str]], None], concurrency: int,
+              timeout: float, on_result: Optional[Callable[[WaveResult], None]] = None,
+              on_wave: Optional[Callable[[int, List[str]], None]] = None) -> Dict[str, WaveResult]:
+    """
+    Start chains through operation, at most concurrency at a time
+    
+    A chain is ready when its container is healthy (or running, without a
+    healthcheck) and its node is no longer catching up. A chain whose
+    container exits, dies or disappears, or that is not ready within timeout
+    seconds of its wave, fails and frees its slot; the remaining chains
+    still start. A concurrency of 0 starts every chain in one wave. The
+    operation should report its own errors rather than raise: which
+    containers came up is read back from their states.
+    
+    Returns:
+        dict: chain name -> WaveResult, in the order chains finished
+    """
+    queue = order_by_priority(chains)
+    limit = concurrency if concurrency > 0 else len(queue)
+    in_flight: Dict[str, ChainConfig] = {}
+    admitted: Dict[str, float] = {}
+    healthy: Dict[str, float] = {}
+    waves: Dict[str, int] = {}
+    caught_up: Dict[str, Optional[bool]] = {}
+    results: Dict[str, WaveResult] = {}
+    wave = 0
+    
+    def finish(chain: ChainConfig, state: str, now: float):
+        del in_flight[chain.name]
+        healthy_after = healthy[chain.name] - admitted[chain.name] if chain.name in healthy else None
+        ready_after = now - admitted[chain.name] if state == 'ready' else None
+        result = WaveResult(chain.name, waves[chain.name], state, healthy_after, ready_after)
+        results[chain.name] = result
+        if on_result:
+            on_result(result)
+    
+    while queue or in_flight:
+        if queue and len(in_flight) < limit:
+            batch = queue[:limit - len(in_flight)]
+            queue = queue[len(batch):]
+            wave += 1
+            if on_wave:
+                on_wave(wave, [chain.name for chain in batch])
+            now = time.monotonic()
+            for chain in batch:
+                in_flight[chain.name] = chain
+                admitted[chain.name] = now
+                waves[chain.name] = wave
+            operation([chain.container_name for chain in batch])
+        
+        time.sleep(POLL_INTERVAL)
+        states = get_health_states([chain.container_name for chain in in_flight.values()])
+        now = time.monotonic()
+        for chain in list(in_flight.values()):
+            state = states.get(chain.container_name, 'missing')
+            if state in ('healthy', 'running'):
+                healthy.setdefault(chain.name, now)
+                caught_up[chain.name] = is_caught_up(chain)
+                if caught_up[chain.name]:
+                    finish(chain, 'ready', now)
+                    continue
+            elif state in _FAILED_STATES:
+                finish(chain, state, now)
+                continue
+            if now - admitted[chain.name] > timeout:
+                if state in ('healthy', 'running'):
+                    finish(chain, 'catching up' if caught_up.get(chain.name) is False else 'rpc unreachable', now)
+                else:
+                    # Still unhealthy (a node replaying its WAL can fail
+                    # checks for a while) or never got past starting
+                    finish(chain, 'timeout' if state in _PENDING_STATES else state, now)
+    return results
@@ -0,0 +1,105 @@
+"""Compiled cache for parsed YAML configuration files
+
+Parsing chains.yaml is a visible share of CLI startup once it holds many
+chains with long peer lists. The parsed document is stored as JSON next to
+the project (.validay/cache/) and reused while the source file is unchanged:
+a matching mtime and size is trusted directly, and a matching content hash
+revalidates the entry after the file is touched without being modified.
+Documents JSON cannot represent exactly (timestamps, non-string keys) are
+not cached. The cache holds plain data only, so a tampered entry can at
+worst feed wrong values, never run code.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import yaml
+
+# libyaml's C loader is several times faster; fall back when it is not built
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+CACHE_VERSION = 2
+
+_ENTRY_KEYS = ('mtime_ns', 'size', 'sha256', 'racy', 'data')
+
+# A file modified this soon before it was cached could change again within
+# the same mtime tick, so such entries are always revalidated by hash
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def _read_cache(cache_file: Path) -> Optional[dict]:
+    """Read a cache entry, ignoring missing, stale-format or corrupt files"""
+    try:
+        with open(cache_file, 'rb') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION
+            or not all(key in entry for key in _ENTRY_KEYS)):
+        return None
+    return entry
+
+
+def _write_cache(cache_file: Path, entry: dict):
+    """Write a cache entry atomically; the cache is best effort"""
+    try:
+        encoded = json.dumps(entry, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return
+    # Skip documents that would not read back identically, e.g. with int keys
+    if json.loads(encoded)['data'] != entry['data']:
+        return
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, prefix=f".{cache_file.name}.")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(encoded)
+            os.replace(tmp_path, cache_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+
+def load_yaml(path: Path, cache_dir: Optional[Path] = None) -> Any:
+    """
+    Load a YAML file, going through the compiled cache when cache_dir is set
+    
+    Raises yaml.YAMLError for invalid YAML and OSError if the file cannot be read.
+    """
+    if cache_dir is None:
+        with open(path, 'rb') as f:
+            return yaml.load(f, Loader=SafeLoader)
+    
+    st = os.stat(path)
+    cache_file = cache_dir / f"{path.name}.json"
+    entry = _read_cache(cache_file)
+    if (entry is not None and not entry['racy']
+            and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size):
+        return entry['data']
+    
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    
+    if entry is not None and entry['sha256'] == digest:
+        data = entry['data']
+    else:
+        data = yaml.load(content, Loader=SafeLoader)
+    
+    _write_cache(cache_file, {
+        'version': CACHE_VERSION,
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+        'sha256': digest,
+        'racy': time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS,
+        'data': data,
+    })
+    return data